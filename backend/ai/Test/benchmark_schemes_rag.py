@@ -0,0 +1,235 @@
+"""
+Schemes RAG Benchmark
+
+Measures retrieval quality and latency of SchemesRAGService on the labelled
+farmer questions in schemes_benchmark_questions.json, for every retriever
+backend and pipeline mode (LLM router on/off, query expansion on/off).
+
+Runs offline by default: the Cerebras client is replaced by StubLLMClient and
+Zilliz by an InMemoryMilvusClient seeded from Schemes.md, queried through the
+regular FastVectorRetriever (see services/local_stubs.py). Add
+`--backends memory zilliz` to also benchmark the live collection.
+
+Reported for each backend and mode:
+- recall@k and MRR against the expected Schemes.md sections
+- p50/p95 latency of the route -> expand -> search pipeline
+- embedding and LLM calls per question
+
+Usage:
+    python benchmark_schemes_rag.py
+    python benchmark_schemes_rag.py --embedding-provider local --output results.json
+"""
+
+import io
+import sys
+import json
+import time
+import argparse
+import contextlib
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+
+from implementations.schemes_rag import SchemesRAGService
+from services.embedding_providers import get_embed_model
+from services.local_stubs import StubLLMClient, InMemoryMilvusClient, seed_collection_from_markdown
+from services.vector_service import FastVectorRetriever, get_fast_retriever
+
+# Load environment variables
+load_dotenv()
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+KB_DIR = BASE_DIR / "implementations" / "Kb"
+QUESTIONS_PATH = Path(__file__).parent / "schemes_benchmark_questions.json"
+COLLECTION_NAME = "government_schemes_knowledge_base"
+
+K_VALUES = (1, 3, 5)
+
+# Pipeline modes: name -> (use_router, expand_queries)
+MODES = {
+    "route+expand": (True, True),
+    "route": (True, False),
+    "expand": (False, True),
+    "direct": (False, False),
+}
+
+
+class CountingRetriever:
+    """Wraps a retriever and counts searches (each search embeds exactly one query)."""
+
+    def __init__(self, retriever):
+        self.retriever = retriever
+        self.calls = 0
+
+    def search(self, query: str, top_k: int = None) -> list:
+        self.calls += 1
+        return self.retriever.search(query, top_k=top_k)
+
+    def __getattr__(self, name):
+        return getattr(self.retriever, name)
+
+
+def build_backends(names: list, embedding_provider: str, embedding_dim: int,
+                   search_latency_ms: float) -> dict:
+    """Create the retriever for each requested backend, with its build time in ms."""
+    backends = {}
+
+    if "memory" in names:
+        start = time.perf_counter()
+        milvus_client = InMemoryMilvusClient(search_latency_ms=search_latency_ms)
+        seed_collection_from_markdown(milvus_client, COLLECTION_NAME, KB_DIR,
+                                      get_embed_model(embedding_provider, dimensions=embedding_dim))
+        retriever = FastVectorRetriever(COLLECTION_NAME, embedding_dim=embedding_dim,
+                                        embedding_provider=embedding_provider, milvus_client=milvus_client)
+        backends["memory"] = (retriever, (time.perf_counter() - start) * 1000)
+
+    if "zilliz" in names:
+        start = time.perf_counter()
+        retriever = get_fast_retriever(COLLECTION_NAME, embedding_dim=3072)
+        backends["zilliz"] = (retriever, (time.perf_counter() - start) * 1000)
+
+    return backends
+
+
+def section_title(result) -> str:
+    """Schemes.md section a retrieved chunk belongs to (its first header line)."""
+    first_line = result.get_content().strip().split("\n", 1)[0]
+    return first_line.replace("\\", "").strip("#* ")
+
+
+def is_relevant(title: str, expected_sections: list) -> bool:
+    return any(section.lower() in title.lower() for section in expected_sections)
+
+
+def evaluate(service: SchemesRAGService, retriever: CountingRetriever,
+             llm: StubLLMClient, questions: list) -> dict:
+    """Run every question through the service and aggregate quality, latency and call counts."""
+    per_question = []
+
+    for item in questions:
+        retriever.calls = 0
+        llm.reset_counters()
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, nodes = service.get_relevant_nodes(item["question"])
+        latency_ms = (time.perf_counter() - start) * 1000
+
+        titles = [section_title(node) for node in nodes]
+        relevant_ranks = [rank for rank, title in enumerate(titles, 1)
+                          if is_relevant(title, item["expected_sections"])]
+
+        recall = {}
+        for k in K_VALUES:
+            found = {section for section in item["expected_sections"]
+                     if any(is_relevant(title, [section]) for title in titles[:k])}
+            recall[f"recall@{k}"] = len(found) / len(item["expected_sections"])
+
+        per_question.append({
+            "id": item["id"],
+            "question": item["question"],
+            "latency_ms": round(latency_ms, 3),
+            "embedding_calls": retriever.calls,
+            "llm_calls": llm.chat_calls,
+            "first_relevant_rank": relevant_ranks[0] if relevant_ranks else None,
+            "retrieved_sections": titles[:max(K_VALUES)],
+            **recall,
+        })
+
+    latencies = [q["latency_ms"] for q in per_question]
+    count = len(per_question)
+    summary = {f"recall@{k}": round(sum(q[f"recall@{k}"] for q in per_question) / count, 4) for k in K_VALUES}
+    summary["mrr"] = round(sum(1 / q["first_relevant_rank"] for q in per_question
+                               if q["first_relevant_rank"]) / count, 4)
+    summary["latency_ms"] = {
+        "p50": round(float(np.percentile(latencies, 50)), 3),
+        "p95": round(float(np.percentile(latencies, 95)), 3),
+        "mean": round(float(np.mean(latencies)), 3),
+    }
+    summary["embedding_calls"] = {
+        "total": sum(q["embedding_calls"] for q in per_question),
+        "per_question": round(sum(q["embedding_calls"] for q in per_question) / count, 2),
+    }
+    summary["llm_calls"] = {
+        "total": sum(q["llm_calls"] for q in per_question),
+        "per_question": round(sum(q["llm_calls"] for q in per_question) / count, 2),
+    }
+    summary["per_question"] = per_question
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark retrieval quality and latency of the schemes RAG")
+    parser.add_argument("--backends", nargs="+", default=["memory"], choices=["memory", "zilliz"],
+                        help="Retriever backends to benchmark")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES),
+                        help="Pipeline modes to benchmark")
+    parser.add_argument("--embedding-provider", default="hashing",
+                        help="Embedding provider for the in-memory backend (hashing, local, openai)")
+    parser.add_argument("--embedding-dim", type=int, default=1024,
+                        help="Embedding dimension for the in-memory backend")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0,
+                        help="Simulated latency of each stand-in LLM call")
+    parser.add_argument("--search-latency-ms", type=float, default=0.0,
+                        help="Simulated latency of each stand-in vector search")
+    parser.add_argument("--output", default="schemes_rag_benchmark.json",
+                        help="Where to write the JSON results")
+    args = parser.parse_args()
+
+    questions = json.loads(QUESTIONS_PATH.read_text(encoding="utf-8"))["questions"]
+
+    print("📏 Schemes RAG Benchmark")
+    print("=" * 60)
+    print(f"Questions: {len(questions)} | Backends: {', '.join(args.backends)} | Modes: {', '.join(args.modes)}")
+
+    results = []
+    backends = build_backends(args.backends, args.embedding_provider, args.embedding_dim,
+                              args.search_latency_ms)
+    for backend, (retriever, build_ms) in backends.items():
+        print(f"\n🔧 Backend '{backend}' ready in {build_ms:.0f} ms")
+        counting_retriever = CountingRetriever(retriever)
+
+        for mode in args.modes:
+            use_router, expand_queries = MODES[mode]
+            llm = StubLLMClient(chat_latency_ms=args.llm_latency_ms)
+            with contextlib.redirect_stdout(io.StringIO()):
+                service = SchemesRAGService(client=llm, retriever=counting_retriever,
+                                            use_router=use_router, expand_queries=expand_queries)
+
+            summary = evaluate(service, counting_retriever, llm, questions)
+            results.append({
+                "backend": backend,
+                "mode": mode,
+                "use_router": use_router,
+                "expand_queries": expand_queries,
+                "backend_build_ms": round(build_ms, 1),
+                **summary,
+            })
+
+            recalls = "  ".join(f"R@{k}={summary[f'recall@{k}']:.2f}" for k in K_VALUES)
+            print(f"   {mode:<13} {recalls}  MRR={summary['mrr']:.3f}  "
+                  f"p50={summary['latency_ms']['p50']:.1f}ms  p95={summary['latency_ms']['p95']:.1f}ms  "
+                  f"embed/q={summary['embedding_calls']['per_question']}  llm/q={summary['llm_calls']['per_question']}")
+
+    report = {
+        "generated_at": datetime.now().isoformat(),
+        "questions": len(questions),
+        "k_values": list(K_VALUES),
+        "embedding_provider": args.embedding_provider,
+        "embedding_dim": args.embedding_dim,
+        "llm_latency_ms": args.llm_latency_ms,
+        "search_latency_ms": args.search_latency_ms,
+        "results": results,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"\n💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+"""
+Pre-warmed Voice Agent Pool for Krishi Jyoti
+
+Starting a Deepgram agent means building the client, configuring the
+settings, a WebSocket handshake and the settings negotiation, all before the
+greeting can play. The pool keeps VOICE_AGENT_POOL_SIZE agents already
+connected and configured for each warmed language (the default language
+unless VOICE_AGENT_POOL_LANGUAGES says otherwise), and hands one to each new
+/ws/voice session in its language. It is off by default: a warm agent is
+billed by Deepgram for its connected time, and each one first synthesizes
+the greeting, so enable it where the latency win is worth that cost:
+
+1. A warm agent's events (ready status, greeting audio) are parked until a
+   session claims it; on hand-off they are replayed to the session's callback
+   in order, and the agent is rebound to it
+2. A background task keeps warm agents alive, evicts ones that stopped,
+   reported an error or idled longer than VOICE_AGENT_POOL_MAX_IDLE_S, and
+   replenishes the pool, starting the missing agents in parallel (with
+   backoff while starts keep failing)
+3. Sessions with a configuration the pool does not warm (another sample rate,
+   or a state/season-specific MSP prompt), or arriving while it is empty, get
+   an agent started on demand; the blocking start runs in a worker thread
+   either way
+4. Once a language's greeting has been spoken (and stored in the
+   GreetingCache), agents are configured without one and the session is sent
+   the cached greeting on hand-off, without waiting for speech synthesis
+
+Usage:
+    from ai.Voice.agent_pool import VoiceAgentPool
+
+    pool = VoiceAgentPool.get_instance()
+    pool.start()                                      # inside a running event loop
+    agent = await pool.acquire(on_response, input_sample_rate=48000, language="ml")
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import functools
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Awaitable, Callable, ClassVar, Dict, List, Optional, Tuple
+
+# Add the ai directory to the path for services.* imports
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from ai.Voice.voice_languages import GreetingCache, available_languages, default_language, get_profile
+
+# Pool settings (overridable from .env)
+POOL_SIZE = int(os.getenv("VOICE_AGENT_POOL_SIZE", "0"))
+# Comma-separated languages to keep warm agents for (default: the default session language)
+POOL_LANGUAGES = [code.strip().lower() for code in os.getenv("VOICE_AGENT_POOL_LANGUAGES", "").split(",")
+                  if code.strip()]
+POOL_SAMPLE_RATE = int(os.getenv("VOICE_AGENT_POOL_SAMPLE_RATE", "48000"))
+MAX_IDLE_S = float(os.getenv("VOICE_AGENT_POOL_MAX_IDLE_S", "300"))
+CHECK_INTERVAL_S = float(os.getenv("VOICE_AGENT_POOL_CHECK_INTERVAL_S", "5"))
+
+# Greeting audio held for a warm agent (about 20 s at 24 kHz)
+MAX_PARKED_AUDIO_BYTES = 1_000_000
+MAX_RETRY_DELAY_S = 60.0
+
+logger = logging.getLogger(__name__)
+
+
+def create_voice_agent(response_callback: Callable, input_sample_rate: int = 48000,
+                       state: Optional[str] = None, season: Optional[str] = None,
+                       language: Optional[str] = None, greeting: bool = True):
+    """Deepgram VoiceAgent, or the local stand-in when upstreams are stubbed."""
+    from services.upstreams import stubs_enabled, create_stub_voice_agent
+
+    language = language or default_language()
+    if stubs_enabled():
+        from ai.Voice.think_router import VoiceThinkRouter, think_locally
+        think = None
+        if think_locally():
+            think = functools.partial(VoiceThinkRouter.get_instance().answer, language=language)
+        return create_stub_voice_agent(response_callback, input_sample_rate=input_sample_rate, think=think,
+                                       greeting=get_profile(language)["greeting"] if greeting else None)
+
+    from ai.Voice.voice_agent_class import VoiceAgent
+    return VoiceAgent(response_callback, input_sample_rate=input_sample_rate, state=state, season=season,
+                      language=language, greeting=greeting)
+
+
+class ParkedEvents:
+    """
+    Callback of a warm agent: holds its events until a session claims it,
+    then forwards to the session's callback.
+    """
+
+    def __init__(self):
+        self.events: List[Tuple[str, Any]] = []
+        self.audio_bytes = 0
+        self.failed = False
+        self.target: Optional[Callable[[str, Any], Awaitable[None]]] = None
+
+    async def __call__(self, role: str, content):
+        if self.target is not None:
+            await self.target(role, content)
+            return
+        if role == "error":
+            self.failed = True
+        if role == "audio":
+            if self.audio_bytes + len(content) > MAX_PARKED_AUDIO_BYTES:
+                return
+            self.audio_bytes += len(content)
+        self.events.append((role, content))
+
+
+class WarmAgent:
+    """A started agent waiting in the pool (`greets`: it speaks the greeting itself)."""
+
+    __slots__ = ("agent", "parked", "language", "greets", "created_at")
+
+    def __init__(self, agent, parked: ParkedEvents, language: str, greets: bool):
+        self.agent = agent
+        self.parked = parked
+        self.language = language
+        self.greets = greets
+        self.created_at = time.monotonic()
+
+    def healthy(self, max_idle_s: float) -> bool:
+        return (self.agent.is_running() and not self.parked.failed
+                and time.monotonic() - self.created_at <= max_idle_s)
+
+
+class VoiceAgentPool:
+    """
+    Agents connected ahead of time for one configuration per language (input
+    sample rate, whole MSP table), handed out to voice sessions and
+    replenished in the background.
+    """
+
+    _instance: ClassVar[Optional['VoiceAgentPool']] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, size: int = POOL_SIZE, sample_rate: int = POOL_SAMPLE_RATE, max_idle_s: float = MAX_IDLE_S,
+                 check_interval_s: float = CHECK_INTERVAL_S, factory: Callable = create_voice_agent,
+                 languages: Optional[List[str]] = None):
+        """
+        Args:
+            size: Warm agents to keep per language (0 disables pre-warming)
+            sample_rate: Input sample rate the warm agents are configured for
+            max_idle_s: Longest an agent may wait in the pool
+            check_interval_s: Period of the keep-alive/health check
+            factory: Called with (response_callback, input_sample_rate=..., state=..., season=...,
+                language=..., greeting=...) to build an agent
+            languages: Languages to keep warm agents for (default: VOICE_AGENT_POOL_LANGUAGES,
+                else the default session language)
+        """
+        self.size = size
+        self._languages = languages or POOL_LANGUAGES or None
+        self.sample_rate = sample_rate
+        self.max_idle_s = max_idle_s
+        self.check_interval_s = check_interval_s
+        self.factory = factory
+
+        self._warm: Dict[str, deque] = {}
+        self._starting: Dict[str, int] = {}
+        self.greetings = GreetingCache.get_instance()
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._metrics = {
+            "hits": 0,
+            "misses": 0,
+            "started": 0,
+            "start_failures": 0,
+            "evicted": 0,
+            "last_start_ms": None,
+        }
+
+    @classmethod
+    def get_instance(cls) -> 'VoiceAgentPool':
+        """Shared pool for this process."""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    @property
+    def languages(self) -> List[str]:
+        """Languages warmed by the pool (offered languages only)."""
+        offered = available_languages()
+        return [code for code in self._languages if code in offered] if self._languages else [default_language()]
+
+    def start(self):
+        """Starts warming agents on the running event loop (no-op when the pool size is 0)."""
+        loop = asyncio.get_running_loop()
+        if self.size <= 0:
+            return
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._warm = {language: deque() for language in self.languages}
+            self._starting = {language: 0 for language in self._warm}
+            self._wake = asyncio.Event()
+            self._task = loop.create_task(self._run())
+
+    async def stop(self):
+        """Stops the background task and closes the warm agents."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        warm = [item for items in self._warm.values() for item in items]
+        self._warm = {language: deque() for language in self._warm}
+        for item in warm:
+            await asyncio.to_thread(item.agent.stop)
+
+    async def acquire(self, response_callback: Callable[[str, Any], Awaitable[None]],
+                      input_sample_rate: int = 48000, state: Optional[str] = None, season: Optional[str] = None,
+                      language: Optional[str] = None):
+        """
+        A started agent bound to `response_callback`.
+
+        Args:
+            response_callback: The session's coroutine function called with (role, content)
+            input_sample_rate: Sample rate of the audio the session will send
+            state: Caller's state, to narrow the agent's MSP prompt (never pre-warmed)
+            season: 'kharif' or 'rabi', likewise
+            language: Session language (default: the default voice language)
+
+        Returns:
+            The agent, or None if no agent could be started
+        """
+        self.start()
+        language = language or default_language()
+        warm = self._warm.get(language)
+        if input_sample_rate == self.sample_rate and state is None and season is None:
+            while warm:
+                item = warm.popleft()
+                if item.healthy(self.max_idle_s):
+                    self._metrics["hits"] += 1
+                    self._wake.set()
+                    await self._hand_off(item, response_callback)
+                    if not item.greets:
+                        await self.greetings.play(language, response_callback)
+                    return item.agent
+                self._evict(item)
+
+        self._metrics["misses"] += 1
+        if self._wake is not None:
+            self._wake.set()
+        greets = not self.greetings.has(language)
+        callback = self.greetings.recorder(language, response_callback) if greets else response_callback
+        try:
+            agent = self.factory(callback, input_sample_rate=input_sample_rate, state=state, season=season,
+                                 language=language, greeting=greets)
+            agent._main_loop = asyncio.get_running_loop()
+            if await asyncio.to_thread(agent.start):
+                if not greets:
+                    await self.greetings.play(language, response_callback)
+                return agent
+        except Exception as e:
+            logger.error(f"Could not start voice agent: {e}")
+        return None
+
+    @staticmethod
+    async def _hand_off(item: WarmAgent, response_callback):
+        parked = item.parked
+        # Replay in order; events parked meanwhile are replayed too. The switch
+        # below happens without an await, so nothing can slip in between.
+        while parked.events:
+            role, content = parked.events.pop(0)
+            await response_callback(role, content)
+        parked.target = response_callback
+        item.agent.response_callback = response_callback
+
+    def _evict(self, item: WarmAgent):
+        self._metrics["evicted"] += 1
+        asyncio.get_running_loop().run_in_executor(None, item.agent.stop)
+
+    async def _run(self):
+        retry_delay_s = 0.0
+        while True:
+            for warm in self._warm.values():
+                for item in [item for item in warm if not item.healthy(self.max_idle_s)]:
+                    warm.remove(item)
+                    self._evict(item)
+            waiting = [item for warm in self._warm.values() for item in warm]
+            if waiting:
+                await asyncio.to_thread(self._keep_alive, waiting)
+
+            starts = [self._start_one(language) for language, warm in self._warm.items()
+                      for _ in range(self.size - len(warm) - self._starting[language])]
+            if starts:
+                started = await asyncio.gather(*starts)
+                if all(started):
+                    retry_delay_s = 0.0
+                else:
+                    retry_delay_s = min(MAX_RETRY_DELAY_S, max(1.0, retry_delay_s * 2))
+
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=retry_delay_s or self.check_interval_s)
+            except asyncio.TimeoutError:
+                pass
+
+    @staticmethod
+    def _keep_alive(items: List[WarmAgent]):
+        for item in items:
+            try:
+                item.agent.send_keep_alive()
+            except Exception as e:
+                logger.warning(f"Keep-alive error on warm voice agent: {e}")
+
+    async def _start_one(self, language: str) -> bool:
+        parked = ParkedEvents()
+        # Until the language's greeting is cached, warm agents speak it themselves (and it is recorded)
+        greets = not self.greetings.has(language)
+        callback = self.greetings.recorder(language, parked) if greets else parked
+        self._starting[language] += 1
+        start = time.perf_counter()
+        try:
+            agent = self.factory(callback, input_sample_rate=self.sample_rate, language=language, greeting=greets)
+            agent._main_loop = asyncio.get_running_loop()
+            started = await asyncio.to_thread(agent.start)
+        except Exception as e:
+            logger.warning(f"Could not warm voice agent: {e}")
+            started = False
+        finally:
+            self._starting[language] -= 1
+
+        if not started:
+            self._metrics["start_failures"] += 1
+            return False
+        self._metrics["started"] += 1
+        self._metrics["last_start_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        self._warm[language].append(WarmAgent(agent, parked, language, greets))
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        """Warm/starting agents (in total and per language), target size, hit/miss/eviction counters and greetings."""
+        return {
+            "size": self.size,
+            "sample_rate": self.sample_rate,
+            "languages": list(self._warm) or self.languages,
+            "warm": sum(len(warm) for warm in self._warm.values()),
+            "warm_by_language": {language: len(warm) for language, warm in self._warm.items()},
+            "starting": sum(self._starting.values()),
+            "greetings": self.greetings.status(),
+            "running": self._task is not None and not self._task.done(),
+            **self._metrics,
+        }
@@ -0,0 +1,119 @@
+"""
+Pooled Reply Audio Buffers for the Voice WebSocket
+
+WAV playback on /ws/voice collects each agent reply before sending it. Instead
+of a bytearray per session that grows for the length of every utterance, a
+reply is written into a preallocated buffer from a process-wide pool:
+
+- Each buffer reserves room for the 44-byte WAV header followed by at most
+  VOICE_MAX_BUFFERED_AUDIO_BYTES of PCM, so a session never buffers more
+  than that (longer replies are sent as several WAV segments)
+- Chunks are copied once, from the agent's bytes into the buffer via a
+  memoryview; the header is written in place and the WAV is base64 encoded
+  straight from a view of the buffer
+- Buffers go back to the pool after each segment (at most
+  VOICE_AUDIO_BUFFER_POOL are kept), so idle sessions hold no audio memory
+
+Usage:
+    from ai.Voice.audio_buffers import AudioBufferPool
+
+    pool = AudioBufferPool.get_instance()
+    buffer = pool.acquire()
+    written = buffer.write(chunk)       # < len(chunk) when the buffer is full
+    wav = buffer.wav_view(header)       # memoryview over header + PCM
+    pool.release(buffer)
+"""
+
+import os
+import threading
+from typing import ClassVar, List, Optional
+
+WAV_HEADER_BYTES = 44
+
+# Pool settings (overridable from .env)
+MAX_BUFFERED_AUDIO_BYTES = int(os.getenv("VOICE_MAX_BUFFERED_AUDIO_BYTES", "480000"))  # 10 s at 24 kHz
+POOL_SIZE = int(os.getenv("VOICE_AUDIO_BUFFER_POOL", "16"))
+
+
+class ReplyAudioBuffer:
+    """Fixed-size buffer: a WAV header slot followed by up to `capacity` bytes of PCM."""
+
+    __slots__ = ("capacity", "length", "_data", "_view")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.length = 0
+        self._data = bytearray(WAV_HEADER_BYTES + capacity)
+        self._view = memoryview(self._data)
+
+    @property
+    def full(self) -> bool:
+        return self.length >= self.capacity
+
+    def write(self, chunk) -> int:
+        """Copies as much of `chunk` (any bytes-like) as fits; returns the number of bytes written."""
+        chunk = memoryview(chunk).cast("B")
+        count = min(len(chunk), self.capacity - self.length)
+        start = WAV_HEADER_BYTES + self.length
+        self._view[start:start + count] = chunk[:count]
+        self.length += count
+        return count
+
+    def wav_view(self, header: bytes) -> memoryview:
+        """Writes the WAV header in place and returns a view of the complete file (valid until reset)."""
+        self._view[:WAV_HEADER_BYTES] = header
+        return self._view[:WAV_HEADER_BYTES + self.length]
+
+    def reset(self):
+        self.length = 0
+
+
+class AudioBufferPool:
+    """Process-wide pool of ReplyAudioBuffer objects of one capacity."""
+
+    _instance: ClassVar[Optional['AudioBufferPool']] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, capacity: int = MAX_BUFFERED_AUDIO_BYTES, max_free: int = POOL_SIZE):
+        """
+        Args:
+            capacity: PCM bytes per buffer (the per-session cap)
+            max_free: Free buffers kept for reuse; extra ones are left to the garbage collector
+        """
+        self.capacity = capacity
+        self.max_free = max_free
+        self._free: List[ReplyAudioBuffer] = []
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.allocated = 0
+
+    @classmethod
+    def get_instance(cls) -> 'AudioBufferPool':
+        """Shared pool for this process."""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def acquire(self) -> ReplyAudioBuffer:
+        with self._lock:
+            self.in_use += 1
+            if self._free:
+                return self._free.pop()
+            self.allocated += 1
+        return ReplyAudioBuffer(self.capacity)
+
+    def release(self, buffer: Optional[ReplyAudioBuffer]):
+        if buffer is None:
+            return
+        buffer.reset()
+        with self._lock:
+            self.in_use -= 1
+            if len(self._free) < self.max_free:
+                self._free.append(buffer)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"buffer_bytes": WAV_HEADER_BYTES + self.capacity, "in_use": self.in_use,
+                    "free": len(self._free), "allocated": self.allocated}
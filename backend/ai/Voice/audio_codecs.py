@@ -0,0 +1,193 @@
+"""
+Audio Codecs for the Voice WebSocket
+
+Transcodes /ws/voice audio between what a client can afford to send over a
+rural mobile link and what the Deepgram agent speaks (16-bit mono PCM):
+
+- Uplink: raw linear16 or Opus packets, decoded to PCM at the rate forwarded
+  to Deepgram. Raw 48 kHz PCM can be decimated to 16 kHz on the way, so the
+  speech-to-text stream is a third of the size
+- Downlink: the agent's 24 kHz PCM passed through, or re-encoded as 20 ms Opus
+  packets
+
+Raw 48 kHz PCM is 768 kbps; Opus speech at 16-24 kbps is roughly 30x smaller.
+Opus needs the optional `opuslib` package (and libopus); without it only
+linear16 is offered. Encoders and decoders keep per-session state, so use one
+of each per connection and call them from a worker thread.
+
+Usage:
+    from ai.Voice.audio_codecs import UplinkDecoder, DownlinkEncoder
+
+    decoder = UplinkDecoder("opus", uplink_rate=48000, output_rate=16000)
+    pcm = decoder.decode(packet)
+    encoder = DownlinkEncoder("opus", sample_rate=24000)
+    packets = encoder.encode(agent_pcm) + encoder.flush()
+"""
+
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+try:
+    import opuslib
+except ImportError:  # Optional: Opus transport is offered only when available
+    opuslib = None
+
+PCM_SAMPLE_WIDTH = 2
+
+# Sample rates a client may send and Deepgram may be fed
+SUPPORTED_RATES = (48000, 16000)
+
+# Opus packet duration produced for the downlink
+OPUS_FRAME_MS = 20
+# Longest Opus packet a decoder has to accept (120 ms)
+OPUS_MAX_FRAME_MS = 120
+OPUS_DOWNLINK_BITRATE = 24000
+
+# Windowed-sinc low-pass taps per unit of decimation factor
+TAPS_PER_FACTOR = 16
+
+
+def available_codecs() -> Tuple[str, ...]:
+    """Codecs this server can negotiate on either direction."""
+    return ("linear16", "opus") if opuslib is not None else ("linear16",)
+
+
+def _int16(samples: np.ndarray) -> bytes:
+    return np.clip(np.rint(samples), -32768, 32767).astype("<i2").tobytes()
+
+
+class Downsampler:
+    """
+    Streaming integer-factor decimator for 16-bit mono PCM (FIR low-pass at
+    the new Nyquist frequency, then every `factor`-th sample). Filter history
+    and phase carry over between chunks, so arbitrary chunk sizes give the
+    same output as one long buffer.
+    """
+
+    def __init__(self, factor: int):
+        self.factor = factor
+        taps = TAPS_PER_FACTOR * factor + 1
+        n = np.arange(taps) - (taps - 1) / 2
+        kernel = np.sinc(n / factor) * np.hamming(taps)
+        self._kernel = (kernel / kernel.sum()).astype(np.float32)
+        self._history = np.zeros(taps - 1, dtype=np.float32)
+        self._phase = 0
+        self._odd_byte = b""
+
+    def process(self, pcm: bytes) -> bytes:
+        """Decimates one chunk of PCM; returns the samples that are complete so far."""
+        if self._odd_byte:
+            pcm = self._odd_byte + pcm
+        usable = len(pcm) - len(pcm) % PCM_SAMPLE_WIDTH
+        self._odd_byte = pcm[usable:]
+        samples = np.frombuffer(pcm, dtype="<i2", count=usable // PCM_SAMPLE_WIDTH).astype(np.float32)
+        if not len(samples):
+            return b""
+
+        signal = np.concatenate((self._history, samples))
+        filtered = np.convolve(signal, self._kernel, mode="valid")
+        output = filtered[self._phase::self.factor]
+        self._history = signal[len(samples):]
+        self._phase = (self._phase - len(samples)) % self.factor
+        return _int16(output)
+
+
+class UplinkDecoder:
+    """Client audio (linear16 or Opus) -> 16-bit PCM at the rate Deepgram is fed."""
+
+    def __init__(self, codec: str = "linear16", uplink_rate: int = 48000, output_rate: int = 48000):
+        """
+        Args:
+            codec: 'linear16' (raw PCM frames) or 'opus' (one Opus packet per message)
+            uplink_rate: Sample rate of the client's PCM (before Opus encoding)
+            output_rate: Sample rate forwarded to Deepgram (a divisor of uplink_rate for linear16)
+        """
+        if codec not in available_codecs():
+            raise ValueError(f"Unsupported uplink codec '{codec}' (available: {', '.join(available_codecs())})")
+        if uplink_rate not in SUPPORTED_RATES or output_rate not in SUPPORTED_RATES:
+            raise ValueError(f"Sample rates must be one of {SUPPORTED_RATES}")
+        if codec == "linear16" and uplink_rate % output_rate:
+            raise ValueError(f"Cannot forward {uplink_rate} Hz PCM at {output_rate} Hz")
+
+        self.codec = codec
+        self.output_rate = output_rate
+        self._downsampler = None
+        self._opus = None
+        if codec == "opus":
+            # Opus decodes straight to any supported rate; no resampling needed
+            self._opus = opuslib.Decoder(output_rate, 1)
+            self._max_frame = output_rate * OPUS_MAX_FRAME_MS // 1000
+        elif output_rate != uplink_rate:
+            self._downsampler = Downsampler(uplink_rate // output_rate)
+
+    @property
+    def passthrough(self) -> bool:
+        """True when client frames are forwarded unchanged (no worker thread needed)."""
+        return self._opus is None and self._downsampler is None
+
+    def decode(self, data: bytes) -> bytes:
+        """PCM for one client message."""
+        if self._opus is not None:
+            return self._opus.decode(bytes(data), self._max_frame)
+        if self._downsampler is not None:
+            return self._downsampler.process(data)
+        return data
+
+
+class DownlinkEncoder:
+    """Agent PCM -> what the client asked to receive (raw PCM or Opus packets)."""
+
+    def __init__(self, codec: str = "linear16", sample_rate: int = 24000, frame_ms: int = OPUS_FRAME_MS):
+        """
+        Args:
+            codec: 'linear16' or 'opus'
+            sample_rate: Sample rate of the agent's PCM
+            frame_ms: Duration of each Opus packet
+        """
+        if codec not in available_codecs():
+            raise ValueError(f"Unsupported downlink codec '{codec}' (available: {', '.join(available_codecs())})")
+        self.codec = codec
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self._pending = bytearray()
+        self._opus = None
+        if codec == "opus":
+            self._opus = opuslib.Encoder(sample_rate, 1, opuslib.APPLICATION_VOIP)
+            self._opus.bitrate = OPUS_DOWNLINK_BITRATE
+            self._frame_bytes = sample_rate * frame_ms // 1000 * PCM_SAMPLE_WIDTH
+
+    @property
+    def passthrough(self) -> bool:
+        return self._opus is None
+
+    @property
+    def format(self) -> Dict[str, Any]:
+        """Description of the frames sent to the client (for the stream preamble)."""
+        description = {"encoding": self.codec, "sample_rate": self.sample_rate, "channels": 1, "container": "none"}
+        if self._opus is not None:
+            description["frame_ms"] = self.frame_ms
+        return description
+
+    def encode(self, pcm: bytes) -> List[bytes]:
+        """Frames ready to send for one chunk of agent PCM (partial Opus frames wait for more)."""
+        if self._opus is None:
+            return [pcm] if pcm else []
+        self._pending.extend(pcm)
+        return self._drain()
+
+    def flush(self) -> List[bytes]:
+        """Frames for the rest of a reply (the last Opus frame is padded with silence)."""
+        if self._opus is None or not self._pending:
+            return []
+        self._pending.extend(bytes(-len(self._pending) % self._frame_bytes))
+        return self._drain()
+
+    def _drain(self) -> List[bytes]:
+        frame_samples = self._frame_bytes // PCM_SAMPLE_WIDTH
+        packets = []
+        complete = len(self._pending) - len(self._pending) % self._frame_bytes
+        for start in range(0, complete, self._frame_bytes):
+            packets.append(self._opus.encode(bytes(self._pending[start:start + self._frame_bytes]), frame_samples))
+        del self._pending[:complete]
+        return packets
@@ -0,0 +1,236 @@
+"""
+Voice Session Scheduler for Krishi Jyoti
+
+One asyncio task on the server loop looks after every open voice session of
+the process, instead of a keep-alive thread per session (the Deepgram SDK's
+own keep-alive thread is disabled too, leaving its listener as the only
+thread a session costs):
+
+1. Admission: at most VOICE_MAX_SESSIONS sessions are open at once; further
+   clients are refused up front instead of degrading everyone
+2. Keep-alive: a session whose agent has been forwarded no uplink audio for
+   KEEPALIVE_INTERVAL_S (silence held back by the VAD gate counts as none)
+   gets a KeepAlive; all keep-alives due in a tick are sent in one
+   worker-thread call
+3. Reaping: sessions with no client audio or agent output for
+   VOICE_IDLE_TIMEOUT_S, or open longer than VOICE_MAX_SESSION_S, are closed
+   through their on_close callback
+
+Usage:
+    from ai.Voice.session_scheduler import VoiceSessionScheduler
+
+    scheduler = VoiceSessionScheduler.get_instance()
+    session = scheduler.open(agent, on_close=close_socket)   # None when full
+    session.touch(uplink=True)
+    scheduler.close(session)
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Callable, ClassVar, Dict, Optional
+
+# Scheduler settings (overridable from .env)
+MAX_SESSIONS = int(os.getenv("VOICE_MAX_SESSIONS", "200"))
+KEEPALIVE_INTERVAL_S = float(os.getenv("VOICE_KEEPALIVE_INTERVAL_S", "5"))
+IDLE_TIMEOUT_S = float(os.getenv("VOICE_IDLE_TIMEOUT_S", "300"))
+MAX_SESSION_S = float(os.getenv("VOICE_MAX_SESSION_S", "1800"))
+
+# How often the scheduler wakes up
+TICK_S = 1.0
+
+logger = logging.getLogger(__name__)
+
+
+class VoiceSession:
+    """Bookkeeping of one open voice session."""
+
+    __slots__ = ("agent", "on_close", "opened_at", "last_activity", "last_uplink", "last_keep_alive", "closing",
+                 "uplink")
+
+    def __init__(self, agent, on_close: Callable[[str], Awaitable[None]]):
+        now = time.monotonic()
+        self.agent = agent
+        self.on_close = on_close
+        self.opened_at = now
+        self.last_activity = now
+        self.last_uplink = now
+        self.last_keep_alive = now
+        self.closing = False
+        # UplinkQueue of the session, if any (its counters feed status())
+        self.uplink = None
+
+    def touch(self, uplink: bool = False):
+        """Records activity (client audio, or output from the agent); uplink=True when audio reached the agent."""
+        self.last_activity = time.monotonic()
+        if uplink:
+            self.last_uplink = self.last_activity
+
+
+class VoiceSessionScheduler:
+    """
+    Admission control, keep-alives and idle reaping for all voice sessions of
+    this process.
+    """
+
+    _instance: ClassVar[Optional['VoiceSessionScheduler']] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS, keep_alive_interval_s: float = KEEPALIVE_INTERVAL_S,
+                 idle_timeout_s: float = IDLE_TIMEOUT_S, max_session_s: float = MAX_SESSION_S,
+                 tick_s: float = TICK_S):
+        """
+        Args:
+            max_sessions: Sessions allowed open at once
+            keep_alive_interval_s: Uplink silence after which an agent gets a KeepAlive
+            idle_timeout_s: Inactivity after which a session is closed
+            max_session_s: Longest a session may stay open
+            tick_s: Scheduler period
+        """
+        self.max_sessions = max_sessions
+        self.keep_alive_interval_s = keep_alive_interval_s
+        self.idle_timeout_s = idle_timeout_s
+        self.max_session_s = max_session_s
+        self.tick_s = tick_s
+
+        self.sessions: Dict[int, VoiceSession] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._metrics = {
+            "admitted": 0,
+            "rejected": 0,
+            "peak_sessions": 0,
+            "keep_alives_sent": 0,
+            "keep_alive_errors": 0,
+            "reaped_idle": 0,
+            "reaped_max_duration": 0,
+            "max_tick_lag_ms": 0.0,
+        }
+        # Uplink queue counters of sessions already closed
+        self._closed_uplink = {"dropped_bytes": 0, "coalesced_frames": 0, "flow_control_pauses": 0,
+                               "vad_input_bytes": 0, "vad_suppressed_bytes": 0}
+
+    @classmethod
+    def get_instance(cls) -> 'VoiceSessionScheduler':
+        """Shared scheduler for this process."""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def open(self, agent, on_close: Callable[[str], Awaitable[None]]) -> Optional[VoiceSession]:
+        """
+        Admits a session (call from the event loop that serves it).
+
+        Args:
+            agent: VoiceAgent (or stand-in) with send_keep_alive(); may be set on
+                the session later (sessions without one get no keep-alives)
+            on_close: Coroutine function called with the reason ('idle' or
+                'max_duration') when the scheduler ends the session
+
+        Returns:
+            The session, or None when VOICE_MAX_SESSIONS are already open
+        """
+        if len(self.sessions) >= self.max_sessions:
+            self._metrics["rejected"] += 1
+            return None
+
+        session = VoiceSession(agent, on_close)
+        self.sessions[id(session)] = session
+        self._metrics["admitted"] += 1
+        self._metrics["peak_sessions"] = max(self._metrics["peak_sessions"], len(self.sessions))
+        self._ensure_running()
+        return session
+
+    def close(self, session: Optional[VoiceSession]):
+        """Releases a session's slot (safe to call more than once)."""
+        if session is not None and self.sessions.pop(id(session), None) is not None and session.uplink is not None:
+            for key in self._closed_uplink:
+                self._closed_uplink[key] += session.uplink.metrics[key]
+
+    def _ensure_running(self):
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.tick_s
+            await asyncio.sleep(self.tick_s)
+            lag_ms = max(0.0, (loop.time() - expected) * 1000)
+            self._metrics["max_tick_lag_ms"] = round(max(self._metrics["max_tick_lag_ms"], lag_ms), 2)
+            try:
+                await self._tick()
+            except Exception as e:
+                logger.exception(f"Voice session scheduler tick failed: {e}")
+
+    async def _tick(self):
+        now = time.monotonic()
+        due = []
+        for session in list(self.sessions.values()):
+            if session.closing:
+                continue
+            if now - session.opened_at > self.max_session_s:
+                self._reap(session, "max_duration")
+            elif now - session.last_activity > self.idle_timeout_s:
+                self._reap(session, "idle")
+            elif (session.agent is not None and now - session.last_uplink >= self.keep_alive_interval_s
+                  and now - session.last_keep_alive >= self.keep_alive_interval_s):
+                session.last_keep_alive = now
+                due.append(session)
+
+        if due:
+            sent = await asyncio.to_thread(self._send_keep_alives, due)
+            self._metrics["keep_alives_sent"] += sent
+            self._metrics["keep_alive_errors"] += len(due) - sent
+
+    @staticmethod
+    def _send_keep_alives(sessions) -> int:
+        sent = 0
+        for session in sessions:
+            try:
+                if session.agent.send_keep_alive():
+                    sent += 1
+            except Exception as e:
+                logger.warning(f"Keep-alive error: {e}")
+        return sent
+
+    def _reap(self, session: VoiceSession, reason: str):
+        # The slot is free as soon as the session is told to close
+        session.closing = True
+        self.close(session)
+        self._metrics["reaped_idle" if reason == "idle" else "reaped_max_duration"] += 1
+        asyncio.get_running_loop().create_task(session.on_close(reason))
+
+    def status(self) -> Dict[str, Any]:
+        """Open sessions, limits, keep-alive/reaping/uplink queue counters and process thread count."""
+        queues = [session.uplink.stats() for session in self.sessions.values() if session.uplink is not None]
+        uplink = {
+            "queued_bytes": sum(q["queued_bytes"] for q in queues),
+            "max_queued_bytes": max((q["queued_bytes"] for q in queues), default=0),
+            "paused_sessions": sum(q["paused"] for q in queues),
+            **{key: total + sum(q[key] for q in queues) for key, total in self._closed_uplink.items()},
+        }
+        return {
+            "active_sessions": len(self.sessions),
+            "max_sessions": self.max_sessions,
+            "keep_alive_interval_s": self.keep_alive_interval_s,
+            "idle_timeout_s": self.idle_timeout_s,
+            "max_session_s": self.max_session_s,
+            "scheduler_running": self._task is not None and not self._task.done(),
+            "threads": threading.active_count(),
+            **self._metrics,
+            "uplink": uplink,
+        }
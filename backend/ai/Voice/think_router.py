@@ -0,0 +1,344 @@
+"""
+Voice Think Router for Krishi Jyoti
+
+Answers the voice agent's user turns in process, and calls an LLM only for
+what cannot be answered locally:
+
+1. Schemes: questions about government schemes are answered from the schemes
+   knowledge base (SchemesRAGService context + LLM) and the answer is cached
+   per language for VOICE_ANSWER_CACHE_TTL_S, so repeated questions skip
+   both; concurrent misses for the same question share one call. Checked
+   first, so "support under PM-KISAN" for a wheat farmer is not an MSP question
+2. MSP: a question naming crops and asking for their MSP or price is answered
+   exactly from the MSP table (services/msp_store), phrased in the session language,
+   for the year it names and with the change from the previous year when it
+   asks for a comparison
+3. Anything else goes to the LLM with the conversation as sent by the agent
+
+With VOICE_THINK=local, Deepgram agents call the OpenAI-compatible endpoint
+/api/v1/voice/think/chat/completions (VOICE_THINK_URL, authenticated with
+VOICE_THINK_TOKEN) instead of OpenAI, and stub agents call the router
+directly. The default, VOICE_THINK=deepgram, leaves thinking to Deepgram's
+OpenAI provider.
+
+Usage:
+    from ai.Voice.think_router import VoiceThinkRouter
+
+    router = VoiceThinkRouter.get_instance()
+    text, route = await router.answer([{"role": "user", "content": "MSP of wheat?"}], language="en")
+"""
+
+import os
+import re
+import sys
+import time
+import asyncio
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, ClassVar, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+# Add the ai directory to the path for services.* imports
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from ai.services.msp_store import MSPStore
+from ai.Voice.voice_languages import get_profile
+
+load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
+
+# Think settings (overridable from .env)
+THINK_MODE = os.getenv("VOICE_THINK", "deepgram").strip().lower()
+THINK_URL = os.getenv("VOICE_THINK_URL", "")
+THINK_TOKEN = os.getenv("VOICE_THINK_TOKEN", "")
+ANSWER_CACHE_TTL_S = float(os.getenv("VOICE_ANSWER_CACHE_TTL_S", "3600"))
+ANSWER_CACHE_SIZE = int(os.getenv("VOICE_ANSWER_CACHE_SIZE", "512"))
+
+FALLBACK_MODEL = "llama-4-scout-17b-16e-instruct"
+ROUTES = ("msp", "cache", "scheme", "llm")
+
+# Think prompt of the voice agent; the MSP table (config/msp_rates.json) is appended per session
+MSP_PROMPT = (
+    "You are 'MSP Mitra,' an expert AI assistant from Krishi Jyoti. "
+    "Your sole purpose is to provide Minimum Support Price (MSP) information based on the data provided below. "
+    "You must only use the following data to answer questions. If a crop is not in this data, state that you do not have the information for that crop. "
+    "Response Style: Provide answers in plain text only. Do not use any special characters like asterisks or markdown formatting. State the MSP per quintal. "
+    "\n"
+)
+
+SCHEME_PROMPT = (
+    "You are 'Scheme Mitra' from Krishi Jyoti, answering a farmer on a voice call. "
+    "Answer the question about Indian government schemes in at most three short sentences of plain text, "
+    "without lists or any markdown characters, using the CONTEXT when it is relevant."
+)
+
+# Lookarounds rather than \b: Devanagari and Malayalam words may end in a vowel sign, which is not \w.
+# MSP or price terms only: generic words (support, rate, cost) also occur in scheme questions
+PRICE_WORDS = re.compile(
+    r"(?<!\w)(msp|prices?|daam|bhav|mulya|keemat|vila|"
+    r"एमएसपी|कीमत|दाम|भाव|मूल्य|വില|താങ്ങുവില|എംഎസ്പി)(?!\w)",
+    re.IGNORECASE
+)
+# A comparison with the previous year is answered from increase_from_previous
+COMPARISON_WORDS = re.compile(
+    r"(?<!\w)(higher|lower|more|less|increased?|decreased?|hike|rise|raised|compared?|difference|change|than|"
+    r"badha|badhi|badhe|zyada|jyada|kam|बढ़|बढ़ोतरी|ज़्यादा|ज्यादा|कम|तुलना|अंतर|"
+    r"കൂടി|കുറഞ്ഞ|വർധന|വ്യത്യാസം)(?!\w)",
+    re.IGNORECASE
+)
+PREVIOUS_YEAR_WORDS = re.compile(
+    r"(?<!\w)(last year|previous year|pichh?le saal|pichh?le varsh|पिछले साल|पिछले वर्ष|गत वर्ष|കഴിഞ്ഞ വർഷ)",
+    re.IGNORECASE
+)
+# Marketing seasons as "2024-25", or a bare year taken as the season starting in it
+SEASON_YEAR = re.compile(r"(?<!\d)(20\d\d)(?:\s*[-–/]\s*(\d\d))?(?!\d)")
+SCHEME_WORDS = re.compile(
+    r"(?<!\w)(schemes?|yojana|pm[- ]?kisan|kisan samman|pmfby|fasal bima|insurance|subsid\w*|loans?|kcc|"
+    r"credit card|pension|eligib\w*|apply|application|benefits?|"
+    r"योजना|किसान सम्मान|बीमा|लोन|ऋण|सब्सिडी|पेंशन|आवेदन|"
+    r"പദ്ധതി|ഇൻഷുറൻസ്|വായ്പ|സബ്സിഡി|പെൻഷൻ|അപേക്ഷ)(?!\w)",
+    re.IGNORECASE
+)
+
+logger = logging.getLogger(__name__)
+
+
+def think_locally() -> bool:
+    """True when VOICE_THINK=local (answers come from this router instead of Deepgram's LLM)."""
+    return THINK_MODE == "local"
+
+
+def normalize_question(text: str) -> str:
+    """Cache key of a question: lower case, punctuation dropped (vowel signs kept), single spaces."""
+    return " ".join("".join(" " if unicodedata.category(ch)[0] in "PS" else ch for ch in text.lower()).split())
+
+
+class VoiceThinkRouter:
+    """
+    MSP lookup, cached scheme answers and LLM fallback for voice user turns.
+    Counts answers and their latency per route.
+    """
+
+    _instance: ClassVar[Optional['VoiceThinkRouter']] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, client=None, cache_ttl_s: float = ANSWER_CACHE_TTL_S, cache_size: int = ANSWER_CACHE_SIZE):
+        """
+        Args:
+            client: Chat completions client (default: the configured upstream, stubbed or Cerebras)
+            cache_ttl_s: How long a scheme answer is reused
+            cache_size: Scheme answers kept (least recently used are dropped)
+        """
+        self._client = client
+        self.cache_ttl_s = cache_ttl_s
+        self.cache_size = cache_size
+
+        self._cache: OrderedDict = OrderedDict()
+        self._inflight: Dict[Any, asyncio.Task] = {}
+        self._rag_service = None
+        self._lock = threading.Lock()
+        self._counts = {route: 0 for route in ROUTES}
+        self._total_ms = {route: 0.0 for route in ROUTES}
+        self._errors = 0
+
+    @classmethod
+    def get_instance(cls) -> 'VoiceThinkRouter':
+        """Shared router for this process."""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    @property
+    def client(self):
+        if self._client is None:
+            from services.upstreams import create_chat_client
+            self._client = create_chat_client("CEREBRAS_API_KEY")
+        return self._client
+
+    async def answer(self, messages: List[Dict[str, str]], language: str = "en") -> Tuple[str, str]:
+        """
+        Reply to the last user message of a conversation.
+
+        Args:
+            messages: OpenAI-style chat messages (the agent's prompt, history and the new user turn)
+            language: Session language (config/voice_languages.json) the reply is spoken in
+
+        Returns:
+            (reply text, route): route is 'msp', 'cache', 'scheme' or 'llm'
+        """
+        start = time.perf_counter()
+        question = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+        if isinstance(question, list):
+            # Content given as parts ([{"type": "text", "text": ...}])
+            question = " ".join(part.get("text", "") for part in question if isinstance(part, dict))
+
+        profile = get_profile(language)
+        if SCHEME_WORDS.search(question):
+            text, route = await self._answer_scheme(question, language)
+        else:
+            text, route = self.answer_msp(question, language), "msp"
+        if text is None:
+            if not any(m.get("role") == "system" for m in messages):
+                prompt = MSP_PROMPT + MSPStore.get_instance().prompt_table()
+                if profile.get("reply_instruction"):
+                    prompt += "\n" + profile["reply_instruction"]
+                messages = [{"role": "system", "content": prompt}, *messages]
+            text, route = await asyncio.to_thread(self._complete, messages), "llm"
+
+        self._counts[route] += 1
+        self._total_ms[route] += (time.perf_counter() - start) * 1000
+        return text, route
+
+    @staticmethod
+    def answer_msp(question: str, language: str = "en") -> Optional[str]:
+        """
+        Spoken MSP answer when the question asks for the price of crops in the table, else None.
+
+        A named year ("2024-25", "last year") is answered with that year's rates and a
+        comparison ("higher than last year") with the change from the previous year;
+        years or changes the table does not hold are left to the LLM.
+        """
+        if not PRICE_WORDS.search(question):
+            return None
+        store = MSPStore.get_instance()
+        year = VoiceThinkRouter._asked_year(question, store)
+        if year is None:
+            return None
+        entries = store.find(question, year=year)
+        if not entries:
+            return None
+        compare = COMPARISON_WORDS.search(question) is not None
+        if compare and any(e["increase_from_previous"] is None for e in entries):
+            return None
+
+        profile = get_profile(language)
+        sentences = []
+        for name in dict.fromkeys(e["crop_name"] for e in entries):
+            rates = [e for e in entries if e["crop_name"] == name]
+            if len(rates) == 1:
+                spoken = profile["rate"].format(rate=rates[0]["msp_rate"])
+            else:
+                spoken = profile["joiner"].join(profile["rate_variety"].format(rate=e["msp_rate"], variety=e["variety"])
+                                                for e in rates)
+            sentences.append(profile["msp_answer"].format(crop=name, year=year, rates=spoken))
+            if compare:
+                template = profile["change"] if len(rates) == 1 else profile["change_variety"]
+                changes = profile["joiner"].join(
+                    template.format(difference=abs(e["increase_from_previous"]), variety=e["variety"],
+                                    direction=profile["higher" if e["increase_from_previous"] >= 0 else "lower"])
+                    for e in rates)
+                previous = store.years[store.years.index(year) - 1]
+                sentences.append(profile["msp_change"].format(changes=changes, previous=previous))
+        return " ".join(sentences)
+
+    @staticmethod
+    def _asked_year(question: str, store: MSPStore) -> Optional[str]:
+        """Marketing season the question asks about (current by default), None when the table lacks it."""
+        match = SEASON_YEAR.search(question)
+        if match:
+            start = int(match.group(1))
+            year = f"{start}-{match.group(2) or f'{(start + 1) % 100:02d}'}"
+            return year if year in store.years else None
+        year = store.current_year
+        if PREVIOUS_YEAR_WORDS.search(question) and not COMPARISON_WORDS.search(question):
+            index = store.years.index(year) if year in store.years else 0
+            return store.years[index - 1] if index > 0 else None
+        return year
+
+    async def _answer_scheme(self, question: str, language: str) -> Tuple[Optional[str], str]:
+        key = (language, normalize_question(question))
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and time.monotonic() - entry[1] < self.cache_ttl_s:
+                self._cache.move_to_end(key)
+                return entry[0], "cache"
+
+        loop = asyncio.get_running_loop()
+        flight = (loop, key)
+        task = self._inflight.get(flight)
+        if task is None:
+            async def run():
+                try:
+                    text = await asyncio.to_thread(self._complete_scheme, question, language)
+                    if text:
+                        with self._lock:
+                            self._cache[key] = (text, time.monotonic())
+                            self._cache.move_to_end(key)
+                            while len(self._cache) > self.cache_size:
+                                self._cache.popitem(last=False)
+                    return text
+                finally:
+                    self._inflight.pop(flight, None)
+
+            task = loop.create_task(run())
+            self._inflight[flight] = task
+        # Shield so one cancelled caller does not cancel the answer for the others
+        return await asyncio.shield(task), "scheme"
+
+    def _complete_scheme(self, question: str, language: str) -> Optional[str]:
+        """Knowledge-base context and one LLM call; None when the LLM fails (the caller falls back)."""
+        context = ""
+        rag_service = self._get_rag_service()
+        if rag_service is not None:
+            _, context = rag_service.get_enhanced_context(question)
+
+        instruction = get_profile(language).get("reply_instruction")
+        messages = [{"role": "system", "content": f"{SCHEME_PROMPT} {instruction}" if instruction else SCHEME_PROMPT}]
+        if context:
+            messages.append({"role": "system", "content": f"CONTEXT:\n{context}"})
+        messages.append({"role": "user", "content": question})
+        try:
+            return self._create(messages)
+        except Exception as e:
+            self._errors += 1
+            logger.warning(f"Scheme answer failed: {e}")
+            return None
+
+    def _get_rag_service(self):
+        if self._rag_service is None:
+            with self._lock:
+                if self._rag_service is None:
+                    try:
+                        from ai.implementations.schemes_rag import create_rag_service
+                        # The question is known to be about schemes: no LLM router, no query expansion
+                        self._rag_service = create_rag_service(client=self.client, use_router=False,
+                                                               expand_queries=False)
+                    except Exception as e:
+                        logger.warning(f"Schemes RAG service unavailable for voice answers: {e}")
+                        return None
+        return self._rag_service
+
+    def _complete(self, messages: List[Dict[str, str]]) -> str:
+        try:
+            return self._create(messages)
+        except Exception as e:
+            self._errors += 1
+            logger.warning(f"Voice LLM fallback failed: {e}")
+            return "Sorry, I could not answer that right now. Please try again."
+
+    def _create(self, messages: List[Dict[str, str]]) -> str:
+        response = self.client.chat.completions.create(
+            messages=messages,
+            model=FALLBACK_MODEL,
+            temperature=0.3,
+            max_tokens=200
+        )
+        return response.choices[0].message.content.strip()
+
+    def status(self) -> Dict[str, Any]:
+        """Answers and mean latency per route, LLM errors and cached scheme answers."""
+        answered = sum(self._counts.values())
+        return {
+            "mode": THINK_MODE,
+            "answers": dict(self._counts),
+            "avg_ms": {route: round(self._total_ms[route] / count, 1) if count else None
+                       for route, count in self._counts.items()},
+            # Share of answers that needed no LLM call
+            "no_llm_ratio": round((self._counts["msp"] + self._counts["cache"]) / answered, 3) if answered else None,
+            "llm_errors": self._errors,
+            "cached_answers": len(self._cache),
+        }
@@ -0,0 +1,222 @@
+"""
+Voice Uplink Queue for Krishi Jyoti
+
+Decouples the /ws/voice receive loop from the Deepgram socket: client frames
+are put on a bounded per-session queue and a dedicated sender task decodes
+them and forwards them to the agent in a worker thread, so a slow upstream
+never blocks the event loop and nothing is dropped silently. An optional
+VoiceActivityGate on the decoded PCM holds back silence between utterances.
+
+- Bounds: at most VOICE_UPLINK_QUEUE_ITEMS pending upstream sends and
+  VOICE_UPLINK_QUEUE_BYTES of queued client audio
+- Overflow policy (VOICE_UPLINK_OVERFLOW):
+  - coalesce (default): when the item limit is reached new frames join the
+    newest pending send, so no audio is lost until the byte limit
+  - drop_oldest: the oldest pending send is discarded (lowest latency)
+  At the byte limit the oldest audio is always dropped
+- Flow control: on_flow_control("pause") once the queue is saturated (item
+  limit reached or queued bytes at the high watermark),
+  on_flow_control("resume") when both have drained to the low watermark
+- Sends run on a dedicated, bounded thread pool (VOICE_UPLINK_SEND_THREADS)
+  rather than the default executor, so a stalled upstream cannot starve
+  other to_thread users; a session has at most one send in flight
+- Metrics: queue depth (items/bytes), peak depth, sent, coalesced and dropped
+  frames/bytes, pauses, and PCM bytes seen/suppressed by the VAD gate
+
+Usage:
+    from ai.Voice.uplink_queue import UplinkQueue
+
+    uplink = UplinkQueue(agent, decoder, gate=VoiceActivityGate(16000), on_flow_control=notify_client)
+    uplink.start()
+    await uplink.put(frame)
+    await uplink.close()
+"""
+
+import os
+import asyncio
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# Queue settings (overridable from .env)
+MAX_ITEMS = int(os.getenv("VOICE_UPLINK_QUEUE_ITEMS", "25"))
+MAX_BYTES = int(os.getenv("VOICE_UPLINK_QUEUE_BYTES", "192000"))  # 2 s of 48 kHz linear16
+OVERFLOW_POLICY = os.getenv("VOICE_UPLINK_OVERFLOW", "coalesce").strip().lower()
+OVERFLOW_POLICIES = ("coalesce", "drop_oldest")
+SEND_THREADS = int(os.getenv("VOICE_UPLINK_SEND_THREADS", "32"))
+
+# Fractions of the limits at which the client is asked to pause / may resume
+HIGH_WATERMARK = 0.75
+LOW_WATERMARK = 0.25
+
+logger = logging.getLogger(__name__)
+
+# Shared by all sessions of the process; threads are created on demand
+_send_executor = ThreadPoolExecutor(max_workers=SEND_THREADS, thread_name_prefix="voice-uplink")
+
+
+class UplinkQueue:
+    """Bounded queue of client audio frames with a dedicated sender to the voice agent."""
+
+    def __init__(self, agent, decoder=None, gate=None, max_items: int = MAX_ITEMS, max_bytes: int = MAX_BYTES,
+                 overflow: str = OVERFLOW_POLICY,
+                 on_flow_control: Optional[Callable[[str, Dict[str, Any]], Awaitable[None]]] = None,
+                 on_forwarded: Optional[Callable[[], None]] = None):
+        """
+        Args:
+            agent: VoiceAgent (or stand-in); send_audio() is called from a worker thread
+            decoder: UplinkDecoder applied to each frame before sending (None: frames are PCM)
+            gate: VoiceActivityGate applied to the decoded PCM (None: everything is forwarded)
+            max_items: Pending upstream sends allowed
+            max_bytes: Queued client audio allowed, in bytes
+            overflow: 'coalesce' or 'drop_oldest'
+            on_flow_control: Coroutine function called with ('pause' | 'resume', stats)
+            on_forwarded: Called (on the event loop) after audio actually reached the agent
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow}' (use one of: {', '.join(OVERFLOW_POLICIES)})")
+        self.agent = agent
+        self.decoder = decoder
+        self.gate = gate
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.overflow = overflow
+        self.on_flow_control = on_flow_control
+        self.on_forwarded = on_forwarded
+
+        # Pending sends: [frames, bytes]; frames stay separate (Opus packets cannot be joined)
+        self._items: deque = deque()
+        self._bytes = 0
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.paused = False
+        self.metrics = {
+            "peak_items": 0,
+            "peak_bytes": 0,
+            "sent_items": 0,
+            "sent_bytes": 0,
+            "coalesced_frames": 0,
+            "dropped_frames": 0,
+            "dropped_bytes": 0,
+            "send_errors": 0,
+            "flow_control_pauses": 0,
+            "vad_input_bytes": 0,
+            "vad_suppressed_bytes": 0,
+        }
+
+    def start(self):
+        """Starts the sender task on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self):
+        """Stops the sender; audio still queued is discarded."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._items.clear()
+        self._bytes = 0
+
+    async def put(self, frame: bytes):
+        """Queues one client frame, applying the overflow policy (never blocks on the upstream)."""
+        size = len(frame)
+        if len(self._items) >= self.max_items:
+            if self.overflow == "coalesce" and self._items:
+                tail = self._items[-1]
+                tail[0].append(frame)
+                tail[1] += size
+                self.metrics["coalesced_frames"] += 1
+            else:
+                self._drop_oldest()
+                self._items.append([[frame], size])
+        else:
+            self._items.append([[frame], size])
+        self._bytes += size
+
+        while self._bytes > self.max_bytes and len(self._items) > 1:
+            self._drop_oldest()
+
+        self.metrics["peak_items"] = max(self.metrics["peak_items"], len(self._items))
+        self.metrics["peak_bytes"] = max(self.metrics["peak_bytes"], self._bytes)
+        self._ready.set()
+
+        if not self.paused and (len(self._items) >= self.max_items
+                                or self._bytes >= HIGH_WATERMARK * self.max_bytes):
+            self.paused = True
+            self.metrics["flow_control_pauses"] += 1
+            await self._notify("pause")
+
+    def _drop_oldest(self):
+        frames, size = self._items.popleft()
+        self._bytes -= size
+        self.metrics["dropped_frames"] += len(frames)
+        self.metrics["dropped_bytes"] += size
+
+    async def _notify(self, state: str):
+        if self.on_flow_control is not None:
+            try:
+                await self.on_flow_control(state, self.stats())
+            except Exception as e:
+                logger.warning(f"Flow-control notification failed: {e}")
+
+    async def _run(self):
+        while True:
+            await self._ready.wait()
+            if not self._items:
+                self._ready.clear()
+                continue
+            frames, size = self._items.popleft()
+            self._bytes -= size
+            if not self._items:
+                self._ready.clear()
+
+            try:
+                forwarded = await asyncio.get_running_loop().run_in_executor(_send_executor, self._send, frames)
+                if forwarded is False:
+                    self.metrics["send_errors"] += 1
+                else:
+                    self.metrics["sent_items"] += 1
+                    self.metrics["sent_bytes"] += size
+                    if forwarded and self.on_forwarded is not None:
+                        self.on_forwarded()
+            except Exception as e:
+                self.metrics["send_errors"] += 1
+                logger.warning(f"Error sending audio upstream: {e}")
+            if self.gate is not None:
+                gate_stats = self.gate.stats()
+                self.metrics["vad_input_bytes"] = gate_stats["input_bytes"]
+                self.metrics["vad_suppressed_bytes"] = gate_stats["suppressed_bytes"]
+
+            if (self.paused and len(self._items) <= LOW_WATERMARK * self.max_items
+                    and self._bytes <= LOW_WATERMARK * self.max_bytes):
+                self.paused = False
+                await self._notify("resume")
+
+    def _send(self, frames):
+        """Bytes forwarded to the agent (0 when nothing was due), or False if the send failed."""
+        if self.decoder is not None and not self.decoder.passthrough:
+            audio = b"".join(self.decoder.decode(frame) for frame in frames)
+        else:
+            audio = frames[0] if len(frames) == 1 else b"".join(frames)
+        if self.gate is not None:
+            audio = self.gate.process(audio)
+        if not audio:
+            return 0
+        return len(audio) if self.agent.send_audio(audio) is not False else False
+
+    def stats(self) -> Dict[str, Any]:
+        """Current depth, limits and counters of this queue."""
+        return {
+            "queued_items": len(self._items),
+            "queued_bytes": self._bytes,
+            "max_items": self.max_items,
+            "max_bytes": self.max_bytes,
+            "overflow": self.overflow,
+            "paused": self.paused,
+            **self.metrics,
+        }
@@ -0,0 +1,156 @@
+"""
+Voice Activity Detection for the Voice WebSocket
+
+Farmers pause to think and talk from noisy fields, so much of what a client
+streams on /ws/voice is silence or background noise that Deepgram transcribes
+(and bills) for nothing. VoiceActivityGate sits after the uplink decoder and
+forwards only the audio around speech:
+
+- PCM is split into 20 ms frames; short-term energy and zero-crossing rate of
+  all frames of a chunk are computed at once with numpy
+- A frame is speech when its energy clears both VOICE_VAD_MIN_SPEECH_DBFS and
+  the noise floor (quietest frame of the last few seconds) by a margin; near the threshold, frames with a high
+  zero-crossing rate (wind, hiss) count as noise
+- Around speech, VOICE_VAD_PREROLL_MS of audio before it (word onsets) and
+  VOICE_VAD_HANGOVER_MS after it (so Deepgram still hears the silence that
+  ends an utterance) are forwarded too; everything else is held back
+- Counters: PCM bytes seen, forwarded and suppressed
+
+Usage:
+    from ai.Voice.voice_activity import VoiceActivityGate
+
+    gate = VoiceActivityGate(sample_rate=16000)
+    audio = gate.process(pcm)       # b"" while the caller is silent
+    saved = gate.stats()["suppressed_bytes"]
+"""
+
+import os
+from collections import deque
+from typing import Any, Dict
+
+import numpy as np
+
+PCM_SAMPLE_WIDTH = 2
+
+# VAD settings (overridable from .env)
+VAD_ENABLED = os.getenv("VOICE_VAD", "on").strip().lower() not in ("off", "false", "0")
+PREROLL_MS = int(os.getenv("VOICE_VAD_PREROLL_MS", "300"))
+HANGOVER_MS = int(os.getenv("VOICE_VAD_HANGOVER_MS", "800"))
+MIN_SPEECH_DBFS = float(os.getenv("VOICE_VAD_MIN_SPEECH_DBFS", "-50"))
+
+FRAME_MS = 20
+# Energy above the noise floor needed for speech, in dB
+MARGIN_DB = 9.0
+# Zero crossings per sample above which a frame near the threshold is noise
+MAX_ZCR = 0.35
+# The noise floor is the quietest frame of this window (pauses between words reach it)
+NOISE_FLOOR_WINDOW_S = 3.0
+INITIAL_NOISE_FLOOR_DBFS = -60.0
+
+
+class VoiceActivityGate:
+    """
+    Per-session energy/zero-crossing VAD over 16-bit mono PCM that drops
+    silence between utterances. Keeps state across chunks, so use one per
+    connection (it is called from the uplink sender's worker thread).
+    """
+
+    def __init__(self, sample_rate: int = 16000, preroll_ms: int = PREROLL_MS, hangover_ms: int = HANGOVER_MS,
+                 min_speech_dbfs: float = MIN_SPEECH_DBFS, frame_ms: int = FRAME_MS):
+        """
+        Args:
+            sample_rate: Sample rate of the PCM passed to process()
+            preroll_ms: Audio forwarded ahead of each speech onset
+            hangover_ms: Audio forwarded after the last speech frame
+            min_speech_dbfs: Quietest frame energy that can count as speech
+            frame_ms: Analysis frame duration
+        """
+        self.frame_ms = frame_ms
+        self.frame_bytes = sample_rate * frame_ms // 1000 * PCM_SAMPLE_WIDTH
+        self.preroll_frames = -(-preroll_ms // frame_ms)
+        self.hangover_frames = -(-hangover_ms // frame_ms)
+        self.min_speech_dbfs = min_speech_dbfs
+        self.noise_floor_db = INITIAL_NOISE_FLOOR_DBFS
+        # Energies of the frames in the noise floor window, in dBFS
+        self._recent_db = np.empty(0, dtype=np.float32)
+        self._window_frames = int(NOISE_FLOOR_WINDOW_S * 1000 // frame_ms)
+
+        # Incomplete frame carried to the next chunk
+        self._pending = b""
+        # Frames held back since the last forwarded audio, newest last (pre-roll candidates)
+        self._held: deque = deque(maxlen=self.preroll_frames or 1)
+        # Frames since the last speech frame, counted from the end of the previous chunk
+        self._since_speech = self.hangover_frames + 1
+        self.input_bytes = 0
+        self.forwarded_bytes = 0
+        self.speech_frames = 0
+
+    def process(self, pcm: bytes) -> bytes:
+        """PCM to forward for one chunk (possibly empty; complete frames only)."""
+        data = self._pending + pcm if self._pending else pcm
+        usable = len(data) - len(data) % self.frame_bytes
+        self._pending = bytes(data[usable:])
+        count = usable // self.frame_bytes
+        if not count:
+            return b""
+        self.input_bytes += usable
+
+        frames = np.frombuffer(data, dtype="<i2", count=usable // PCM_SAMPLE_WIDTH).reshape(count, -1)
+        speech = self._classify(frames)
+        self.speech_frames += int(np.count_nonzero(speech))
+
+        index = np.arange(count)
+        # Hangover: frames within hangover_frames after a speech frame (also one from an earlier chunk)
+        last_speech = np.maximum.accumulate(np.where(speech, index, -self._since_speech))
+        since_speech = index - last_speech
+        keep = since_speech <= self.hangover_frames
+        # Pre-roll: frames within preroll_frames before a speech frame
+        no_speech = count + self.preroll_frames
+        next_speech = np.minimum.accumulate(np.where(speech, index, no_speech)[::-1])[::-1]
+        keep |= next_speech - index <= self.preroll_frames
+        self._since_speech = int(since_speech[-1]) + 1
+
+        output = b""
+        if next_speech[0] < no_speech and self._held:
+            # Held frames from earlier chunks sit at positions -len(held) .. -1
+            first = int(next_speech[0]) - self.preroll_frames
+            held = list(self._held)
+            output = b"".join(held[max(0, len(held) + first):])
+        kept = np.flatnonzero(keep)
+        if len(kept):
+            self._held.clear()
+            output += frames[keep].tobytes()
+        tail = kept[-1] + 1 if len(kept) else 0
+        if self.preroll_frames:
+            self._held.extend(frame.tobytes() for frame in frames[max(tail, count - self.preroll_frames):])
+
+        self.forwarded_bytes += len(output)
+        return output
+
+    def _classify(self, frames: np.ndarray) -> np.ndarray:
+        samples = frames.astype(np.float32)
+        energy = np.mean(samples * samples, axis=1)
+        energy_db = 10 * np.log10(energy / (32768.0 ** 2) + 1e-10)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frames.shape[1] - 1)
+
+        threshold = max(self.min_speech_dbfs, self.noise_floor_db + MARGIN_DB)
+        speech = (energy_db > threshold) & ((zcr <= MAX_ZCR) | (energy_db > threshold + MARGIN_DB))
+
+        self._recent_db = np.concatenate((self._recent_db, energy_db.astype(np.float32)))[-self._window_frames:]
+        self.noise_floor_db = float(self._recent_db.min())
+        if len(self._recent_db) < self._window_frames:
+            # Until a whole window was heard (a caller may start talking right away) the floor only falls
+            self.noise_floor_db = min(self.noise_floor_db, INITIAL_NOISE_FLOOR_DBFS)
+        return speech
+
+    def stats(self) -> Dict[str, Any]:
+        """PCM bytes seen, forwarded and suppressed so far (held-back pre-roll is not counted yet)."""
+        held_bytes = sum(len(frame) for frame in self._held)
+        return {
+            "input_bytes": self.input_bytes,
+            "forwarded_bytes": self.forwarded_bytes,
+            "suppressed_bytes": self.input_bytes - self.forwarded_bytes - held_bytes,
+            "speech_frames": self.speech_frames,
+            "noise_floor_dbfs": round(self.noise_floor_db, 1),
+        }
@@ -3,6 +3,7 @@ import wave
 import io
 import time
 import os
+import sys
 import json
 import threading
 from datetime import datetime
@@ -17,6 +18,10 @@ from deepgram import (
 )
 from deepgram.clients.agent.v1.websocket.options import SettingsOptions
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from ai.services.msp_store import MSPStore
+from ai.Voice.think_router import MSP_PROMPT
+
 # Load environment variables
 load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
 
@@ -71,41 +76,8 @@ def main():
         options.agent.think.provider.type = "open_ai"
         options.agent.think.provider.model = "gpt-4o-mini"
         
-        options.agent.think.prompt = (
-            "You are 'MSP Mitra,' an expert AI assistant from Krishi Jyoti. "
-            "Your sole purpose is to provide Minimum Support Price (MSP) information based on the data provided below. "
-            "You must only use the following data to answer questions. If a crop is not in this data, state that you do not have the information for that crop. "
-            "Response Style: Provide answers in plain text only. Do not use any special characters like asterisks or markdown formatting. State the MSP per quintal. "
-            "\n"
-            "--- MSP Data for 2025-26 ---\n"
-            "Paddy (Common): 2369\n"
-            "Paddy (Grade 'A'): 2389\n"
-            "Jowar (Hybrid): 3699\n"
-            "Jowar (Maldandi): 3749\n"
-            "Bajra: 2775\n"
-            "Ragi: 4886\n"
-            "Maize: 2400\n"
-            "Arhar: 8000\n"
-            "Moong: 8768\n"
-            "Urad: 7800\n"
-            "Cotton (Medium Staple): 7710\n"
-            "Cotton (Long Staple): 8110\n"
-            "Groundnut: 7263\n"
-            "Sunflower Seed: 7721\n"
-            "Soyabean Yellow: 5328\n"
-            "Sesamum: 9846\n"
-            "Nigerseed: 9537\n"
-            "Wheat: 2425\n"
-            "Barley: 1980\n"
-            "Gram: 5650\n"
-            "Masur (Lentil): 6700\n"
-            "Rapeseed & mustard: 5950\n"
-            "Safflower: 5940\n"
-            "Jute: 5650\n"
-            "Copra (milling): 11582\n"
-            "Copra (ball): 12100\n"
-            "--- End of Data ---"
-        )
+        # Same prompt and MSP table (config/msp_rates.json) as the /ws/voice agents
+        options.agent.think.prompt = MSP_PROMPT + MSPStore.get_instance().prompt_table()
         
         options.agent.speak.provider.type = "deepgram"
         options.agent.speak.provider.model = "aura-asteria-en"
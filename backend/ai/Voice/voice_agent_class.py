@@ -1,7 +1,7 @@
 import asyncio
-import threading
-import time
 import os
+from functools import lru_cache
+from urllib.parse import urlencode
 from typing import Callable, Optional
 from dotenv import load_dotenv
 
@@ -13,112 +13,131 @@ from deepgram import (
 )
 from deepgram.clients.agent.v1.websocket.options import SettingsOptions
 
+from ai.services.msp_store import MSPStore
+from ai.Voice.think_router import MSP_PROMPT, THINK_TOKEN, THINK_URL, think_locally
+from ai.Voice.voice_languages import default_language, get_profile
+
 # Load environment variables
 load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
 
 
+@lru_cache(maxsize=128)
+def build_settings(language: str, input_sample_rate: int, state: Optional[str], season: Optional[str],
+                   greeting: bool, msp_version) -> SettingsOptions:
+    """
+    Agent settings for one session configuration, built once and shared by
+    every agent started with it (serialized on connect, never modified).
+
+    Args:
+        language: Voice language code (config/voice_languages.json)
+        input_sample_rate: Sample rate of the linear16 audio the agent receives
+        state: Caller's state (lower case), or None for the whole MSP table
+        season: 'kharif', 'rabi' or None
+        greeting: Include the language's greeting
+        msp_version: MSPStore.version, so settings are rebuilt when new rates are loaded
+    """
+    profile = get_profile(language)
+    options = SettingsOptions()
+
+    # Audio settings
+    options.audio.input.encoding = "linear16"
+    options.audio.input.sample_rate = input_sample_rate
+    options.audio.output.encoding = "linear16"
+    options.audio.output.sample_rate = 24000
+    options.audio.output.container = "none"
+
+    # Agent language
+    options.agent.language = profile["language"]
+
+    # Provider configuration (speech providers per language)
+    for key, value in profile["listen"].items():
+        setattr(options.agent.listen.provider, key, value)
+    options.agent.think.provider.type = "open_ai"
+    options.agent.think.provider.model = "gpt-4o-mini"
+    for key, value in profile["speak"].items():
+        setattr(options.agent.speak.provider, key, value)
+    if profile.get("speak_endpoint"):
+        options.agent.speak.endpoint = profile["speak_endpoint"]
+
+    # Prompt with the MSP rates of the caller's state and season, answered in the session language
+    prompt = MSP_PROMPT + MSPStore.get_instance().prompt_table(state, season)
+    if profile.get("reply_instruction"):
+        prompt += "\n" + profile["reply_instruction"]
+    options.agent.think.prompt = prompt
+
+    # VOICE_THINK=local: answers come from our think endpoint (MSP lookup, cached scheme answers, LLM fallback)
+    if think_locally():
+        if THINK_URL and THINK_TOKEN:
+            separator = "&" if "?" in THINK_URL else "?"
+            options.agent.think.endpoint = {
+                "url": f"{THINK_URL}{separator}{urlencode({'language': language})}",
+                "headers": {"authorization": f"Bearer {THINK_TOKEN}"},
+            }
+        else:
+            print("⚠️ VOICE_THINK=local needs VOICE_THINK_URL and VOICE_THINK_TOKEN; using Deepgram's LLM")
+
+    # Greeting message
+    if greeting:
+        options.agent.greeting = profile["greeting"]
+
+    return options
+
+
 class VoiceAgent:
     """
     Voice Agent class for handling real-time voice interactions using Deepgram.
     Designed to work with WebSocket connections for frontend integration.
+
+    Keep-alives are not sent by the agent itself: the caller (VoiceSessionScheduler
+    for /ws/voice) calls send_keep_alive() while no audio is flowing.
     """
     
-    def __init__(self, response_callback: Callable = None):
+    def __init__(self, response_callback: Callable = None, input_sample_rate: int = 48000,
+                 state: Optional[str] = None, season: Optional[str] = None, language: Optional[str] = None,
+                 greeting: bool = True):
         """
         Initialize the Voice Agent.
+
+        Args:
+            response_callback: Coroutine function called with (role, content)
+            input_sample_rate: Sample rate of the linear16 audio passed to send_audio
+            state: Caller's state; the prompt then lists only the MSPs of crops grown there
+            season: 'kharif' or 'rabi' to list only that season's crops
+            language: Session language (config/voice_languages.json; default: the default voice language)
+            greeting: Speak the language's greeting on connect (False when it is played from the GreetingCache)
         """
         self.response_callback = response_callback
+        self.input_sample_rate = input_sample_rate
+        self.state = state.strip().lower() if state else None
+        self.season = season.lower() if season else None
+        self.language = language or default_language()
+        self.greeting = greeting
         self.api_key = os.getenv("DEEPGRAM_API_KEY")
         if not self.api_key:
             raise ValueError("DEEPGRAM_API_KEY environment variable is not set")
         
         config = DeepgramClientOptions(
-            options={"keepalive": "true", "timeout": 30.0, "verbose": False}
+            options={"keepalive": "false", "timeout": 30.0, "verbose": False}
         )
         self.deepgram = DeepgramClient(self.api_key, config)
         self.connection = None
         
         # State management
         self.running = False
-        self.audio_buffer = bytearray()
         self._main_loop = None
-        self._keep_alive_thread = None
         
     def _setup_connection(self):
         """Setup the Deepgram WebSocket connection."""
         self.connection = self.deepgram.agent.websocket.v("1")
-        
-        options = SettingsOptions()
-        
-        # Audio settings
-        options.audio.input.encoding = "linear16"
-        options.audio.input.sample_rate = 48000
-        options.audio.output.encoding = "linear16"
-        options.audio.output.sample_rate = 24000
-        options.audio.output.container = "none"
-        
-        # Agent language
-        options.agent.language = "en"
-        
-        # Provider configuration
-        options.agent.listen.provider.type = "deepgram"
-        options.agent.listen.provider.model = "nova-2"
-        options.agent.think.provider.type = "open_ai"
-        options.agent.think.provider.model = "gpt-4o-mini"
-        options.agent.speak.provider.type = "deepgram"
-        options.agent.speak.provider.model = "aura-asteria-en"
-        
-        # Prompt with embedded MSP Data
-        options.agent.think.prompt = (
-            "You are 'MSP Mitra,' an expert AI assistant from Krishi Jyoti. "
-            "Your sole purpose is to provide Minimum Support Price (MSP) information based on the data provided below. "
-            "You must only use the following data to answer questions. If a crop is not in this data, state that you do not have the information for that crop. "
-            "Response Style: Provide answers in plain text only. Do not use any special characters like asterisks or markdown formatting. State the MSP per quintal. "
-            "\n"
-            "--- MSP Data for 2025-26 ---\n"
-            "Paddy (Common): 2369\n"
-            "Paddy (Grade 'A'): 2389\n"
-            "Jowar (Hybrid): 3699\n"
-            "Jowar (Maldandi): 3749\n"
-            "Bajra: 2775\n"
-            "Ragi: 4886\n"
-            "Maize: 2400\n"
-            "Arhar: 8000\n"
-            "Moong: 8768\n"
-            "Urad: 7800\n"
-            "Cotton (Medium Staple): 7710\n"
-            "Cotton (Long Staple): 8110\n"
-            "Groundnut: 7263\n"
-            "Sunflower Seed: 7721\n"
-            "Soyabean Yellow: 5328\n"
-            "Sesamum: 9846\n"
-            "Nigerseed: 9537\n"
-            "Wheat: 2425\n"
-            "Barley: 1980\n"
-            "Gram: 5650\n"
-            "Masur (Lentil): 6700\n"
-            "Rapeseed & mustard: 5950\n"
-            "Safflower: 5940\n"
-            "Jute: 5650\n"
-            "Copra (milling): 11582\n"
-            "Copra (ball): 12100\n"
-            "--- End of Data ---"
-        )
-        
-        # Greeting message
-        options.agent.greeting = (
-            "Hello, I am MSP Mitra from Krishi Jyoti. "
-            "You can ask me for the current Minimum Support Price of any major crop."
-        )
-        
-        return options
+        return build_settings(self.language, self.input_sample_rate, self.state, self.season, self.greeting,
+                              MSPStore.get_instance().version)
     
     def _setup_event_handlers(self):
         """Setup all event handlers."""
         agent = self
         
         def on_audio_data(client, data, **kwargs):
-            agent.audio_buffer.extend(data)
+            # Chunks go straight to the callback (the WebSocket router decides what to buffer)
             if agent.response_callback and agent._main_loop:
                 asyncio.run_coroutine_threadsafe(
                     agent.response_callback("audio", data), 
@@ -131,7 +150,6 @@ class VoiceAgent:
                     agent.response_callback("audio_complete", ""), 
                     agent._main_loop
                 )
-            agent.audio_buffer = bytearray()
         
         def on_conversation_text(client, conversation_text, **kwargs):
             try:
@@ -163,7 +181,6 @@ class VoiceAgent:
                 )
         
         def on_user_started_speaking(client, user_started_speaking, **kwargs):
-            agent.audio_buffer.clear()
             if agent.response_callback and agent._main_loop:
                 asyncio.run_coroutine_threadsafe(
                     agent.response_callback("status", "listening"), 
@@ -171,7 +188,6 @@ class VoiceAgent:
                 )
         
         def on_agent_started_speaking(client, agent_started_speaking, **kwargs):
-            agent.audio_buffer = bytearray()
             if agent.response_callback and agent._main_loop:
                 asyncio.run_coroutine_threadsafe(
                     agent.response_callback("status", "speaking"), 
@@ -209,15 +225,11 @@ class VoiceAgent:
         self.connection.on(AgentWebSocketEvents.Error, on_error)
         self.connection.on(AgentWebSocketEvents.Unhandled, on_unhandled) # Register the new handler
     
-    def _keep_alive_worker(self):
-        while self.running:
-            try:
-                time.sleep(5)
-                if self.connection and self.running:
-                    self.connection.send(str(AgentKeepAlive()))
-            except Exception as e:
-                print(f"Keep-alive error: {e}")
-                break
+    def send_keep_alive(self) -> bool:
+        """Sends one KeepAlive message; returns True if it was sent."""
+        if self.connection and self.running:
+            return bool(self.connection.send(str(AgentKeepAlive())))
+        return False
     
     def start(self):
         if self.running:
@@ -232,10 +244,6 @@ class VoiceAgent:
                 return False
             
             self.running = True
-            
-            self._keep_alive_thread = threading.Thread(target=self._keep_alive_worker, daemon=True)
-            self._keep_alive_thread.start()
-            
             return True
             
         except Exception as e:
@@ -255,12 +263,14 @@ class VoiceAgent:
         except Exception as e:
             print(f"Error during voice agent cleanup: {e}")
     
-    def send_audio(self, audio_data: bytes):
+    def send_audio(self, audio_data: bytes) -> bool:
+        """Sends audio to Deepgram (blocking); returns False if it could not be sent."""
         if self.connection and self.running:
             try:
-                self.connection.send(audio_data)
+                return bool(self.connection.send(audio_data))
             except Exception as e:
                 print(f"Error sending audio: {e}")
+        return False
     
     def is_running(self) -> bool:
         return self.running
\ No newline at end of file
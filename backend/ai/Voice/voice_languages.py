@@ -0,0 +1,211 @@
+"""
+Voice Session Languages for Krishi Jyoti
+
+Each /ws/voice session picks its language with ?language= (a code, name or
+alias: ml, Malayalam, hi-IN, ...). The agent configuration of each language
+(config/voice_languages.json: speech-to-text and text-to-speech providers,
+reply instruction, greeting, phrasing of MSP answers) is loaded once:
+
+- resolve_language() maps what a client asked for to an offered language
+  (VOICE_LANGUAGES, minus languages whose provider credentials are not set)
+- GreetingCache keeps the greeting audio of each language once an agent has
+  spoken it. Agents started afterwards are configured without a greeting and
+  the cached audio is played to the session instead, so no session waits for
+  the greeting to be synthesized
+
+Usage:
+    from ai.Voice.voice_languages import resolve_language, GreetingCache
+
+    code = resolve_language("Malayalam")                  # "ml"; None if not offered
+    await GreetingCache.get_instance().play(code, on_response)
+"""
+
+import os
+import re
+import sys
+import json
+import logging
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Awaitable, Callable, ClassVar, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+# Add the ai directory to the path for services.* imports
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
+
+CONFIG_PATH = Path(__file__).resolve().parent.parent / "config" / "voice_languages.json"
+
+# Language settings (overridable from .env)
+ENABLED_LANGUAGES = [code.strip().lower() for code in os.getenv("VOICE_LANGUAGES", "").split(",") if code.strip()]
+DEFAULT_LANGUAGE = os.getenv("VOICE_DEFAULT_LANGUAGE", "").strip().lower()
+
+# Longest greeting kept per language (about 20 s at 24 kHz)
+MAX_GREETING_BYTES = 1_000_000
+
+_UNSET_VARIABLE = re.compile(r"\$\{\w+\}")
+
+logger = logging.getLogger(__name__)
+
+
+def _expand(value):
+    """${VAR} references in the strings of a config value, from the environment."""
+    if isinstance(value, str):
+        return os.path.expandvars(value)
+    if isinstance(value, dict):
+        return {key: _expand(item) for key, item in value.items()}
+    return value
+
+
+@lru_cache(maxsize=1)
+def _load() -> Tuple[Dict[str, Dict[str, Any]], str]:
+    config = json.loads(CONFIG_PATH.read_text(encoding="utf-8"))
+    return {code: _expand(profile) for code, profile in config["languages"].items()}, config.get("default", "en")
+
+
+@lru_cache(maxsize=1)
+def available_languages() -> List[str]:
+    """Codes offered on /ws/voice: VOICE_LANGUAGES (default: all configured) with provider credentials set."""
+    from services.upstreams import stubs_enabled
+
+    profiles, _ = _load()
+    codes = []
+    for code in ENABLED_LANGUAGES or list(profiles):
+        if code not in profiles:
+            logger.warning(f"VOICE_LANGUAGES lists '{code}', which has no profile in {CONFIG_PATH.name}")
+            continue
+        missing = _UNSET_VARIABLE.findall(json.dumps(profiles[code].get("speak_endpoint", {})))
+        if missing and not stubs_enabled():
+            logger.warning(f"Voice language '{code}' is not offered: {', '.join(missing)} not set")
+            continue
+        codes.append(code)
+    return codes
+
+
+def default_language() -> str:
+    """Language of sessions that do not ask for one (VOICE_DEFAULT_LANGUAGE, else the config default)."""
+    codes = available_languages()
+    _, default = _load()
+    for code in (DEFAULT_LANGUAGE, default):
+        if code in codes:
+            return code
+    return codes[0] if codes else default
+
+
+def get_profile(code: str) -> Dict[str, Any]:
+    """Configuration of one language (see config/voice_languages.json)."""
+    profiles, _ = _load()
+    return profiles[code]
+
+
+def resolve_language(requested: Optional[str]) -> Optional[str]:
+    """
+    Offered language matching a client's request.
+
+    Args:
+        requested: Code, name or alias ('ml', 'Malayalam', 'hi-IN'); None or empty for the default
+
+    Returns:
+        The language code, or None if the language is not offered
+    """
+    if not requested or not requested.strip():
+        return default_language()
+    wanted = requested.strip().lower().replace("_", "-")
+    codes = available_languages()
+    for code in codes:
+        profile = get_profile(code)
+        if wanted in (code, profile["name"].lower(), *profile.get("aliases", [])):
+            return code
+    # Regional variants of an offered language (ml-IN -> ml)
+    base = wanted.split("-")[0]
+    return base if base in codes else None
+
+
+class GreetingRecorder:
+    """
+    Agent callback that forwards every event to `target` and stores the
+    greeting (assistant text and audio up to the first audio_complete) in the
+    GreetingCache. Recording is abandoned if the caller speaks first or the
+    greeting exceeds MAX_GREETING_BYTES.
+    """
+
+    def __init__(self, cache: 'GreetingCache', language: str, target: Callable[[str, Any], Awaitable[None]]):
+        self.cache = cache
+        self.language = language
+        self.target = target
+        self.recording = True
+        self.text: Optional[str] = None
+        self.chunks: List[bytes] = []
+        self.audio_bytes = 0
+
+    async def __call__(self, role: str, content):
+        if self.recording:
+            if role == "assistant" and self.text is None:
+                self.text = content
+            elif role == "audio":
+                self.audio_bytes += len(content)
+                if self.audio_bytes > MAX_GREETING_BYTES:
+                    self.recording = False
+                else:
+                    self.chunks.append(bytes(content))
+            elif role == "audio_complete":
+                self.recording = False
+                if self.chunks:
+                    self.cache.put(self.language, self.text, self.chunks)
+            elif role in ("user", "error"):
+                self.recording = False
+        await self.target(role, content)
+
+
+class GreetingCache:
+    """Greeting text and audio chunks per language, shared by the sessions of this worker."""
+
+    _instance: ClassVar[Optional['GreetingCache']] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        self._greetings: Dict[str, Tuple[str, Tuple[bytes, ...]]] = {}
+        self._played = 0
+
+    @classmethod
+    def get_instance(cls) -> 'GreetingCache':
+        """Shared cache for this process."""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def has(self, language: str) -> bool:
+        return language in self._greetings
+
+    def put(self, language: str, text: Optional[str], chunks: List[bytes]):
+        if language not in self._greetings:
+            self._greetings[language] = (text or get_profile(language)["greeting"], tuple(chunks))
+            logger.info(f"Cached the {language} voice greeting ({sum(map(len, chunks))} bytes)")
+
+    def recorder(self, language: str, target: Callable[[str, Any], Awaitable[None]]) -> GreetingRecorder:
+        """Callback for an agent that speaks the greeting itself, storing it for later agents."""
+        return GreetingRecorder(self, language, target)
+
+    async def play(self, language: str, response_callback: Callable[[str, Any], Awaitable[None]]) -> bool:
+        """Replays the cached greeting to a session's callback; False if none is cached yet."""
+        greeting = self._greetings.get(language)
+        if greeting is None:
+            return False
+        text, chunks = greeting
+        await response_callback("assistant", text)
+        for chunk in chunks:
+            await response_callback("audio", chunk)
+        await response_callback("audio_complete", "")
+        self._played += 1
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        """Cached greeting bytes per language and greetings played from the cache."""
+        return {
+            "cached": {language: sum(map(len, chunks)) for language, (_, chunks) in self._greetings.items()},
+            "played": self._played,
+        }
@@ -3,7 +3,6 @@ import sys
 import logging
 from pathlib import Path
 from dotenv import load_dotenv
-from cerebras.cloud.sdk import Cerebras
 
 # Suppress verbose logging from external libraries
 logging.getLogger("httpx").setLevel(logging.WARNING)
@@ -14,6 +13,7 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 # Import the RAG service
 from .schemes_rag import create_rag_service
+from services.upstreams import create_chat_client, stubs_enabled
 
 # Load environment variables from parent directory
 load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
@@ -21,17 +21,15 @@ load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
 class SchemesChatBot:
     """Clean Government Schemes ChatBot using separated RAG service"""
     
-    def __init__(self):
-        """Initialize the Government Schemes ChatBot"""
-        self.client = Cerebras(
-            api_key=os.environ.get("CEREBRAS_API_KEY"),
-        )
+    def __init__(self, client=None):
+        """Initialize the Government Schemes ChatBot (client defaults to the configured upstream)"""
+        self.client = client or create_chat_client("CEREBRAS_API_KEY")
         self.conversation_history = []
         
         # Initialize RAG service
         print("🚀 Initializing RAG service...")
         try:
-            self.rag_service = create_rag_service("government_schemes_knowledge_base")
+            self.rag_service = create_rag_service("government_schemes_knowledge_base", client=self.client)
             print("✅ ChatBot ready with RAG capabilities")
         except Exception as e:
             print(f"⚠️ RAG service initialization failed: {str(e)[:50]}...")
@@ -153,14 +151,14 @@ Based on the above context and your knowledge, please answer the user's question
 def main():
     """Main function to run the chatbot"""
     try:
-        # Check for required API keys
-        if not os.environ.get("CEREBRAS_API_KEY"):
+        # Check for required API keys (not needed with stubbed upstreams)
+        if not stubs_enabled() and not os.environ.get("CEREBRAS_API_KEY"):
             print("❌ Error: CEREBRAS_API_KEY not found in environment variables")
             print("Please check your .env file")
             return
             
         # Check for RAG-related environment variables (optional but recommended)
-        if not os.environ.get("ZILLIZ_CLOUD_URI") or not os.environ.get("ZILLIZ_CLOUD_TOKEN"):
+        if not stubs_enabled() and (not os.environ.get("ZILLIZ_CLOUD_URI") or not os.environ.get("ZILLIZ_CLOUD_TOKEN")):
             print("⚠️ Warning: Zilliz Cloud credentials not found")
             print("RAG functionality will be limited to general knowledge")
             print("Add ZILLIZ_CLOUD_URI and ZILLIZ_CLOUD_TOKEN to .env for full functionality")
@@ -10,7 +10,6 @@ import sys
 import logging
 from pathlib import Path
 from dotenv import load_dotenv
-from cerebras.cloud.sdk import Cerebras
 
 # Suppress verbose logging from external libraries
 logging.getLogger("httpx").setLevel(logging.WARNING)
@@ -23,6 +22,7 @@ logging.getLogger("pymilvus").setLevel(logging.WARNING)
 sys.path.append(str(Path(__file__).parent.parent))
 
 from services.vector_service import get_fast_retriever
+from services.upstreams import create_chat_client
 
 # Load environment variables from parent directory
 load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
@@ -39,17 +39,28 @@ class SchemesRAGService:
     - Context retrieval and formatting
     """
     
-    def __init__(self, collection_name: str = "government_schemes_knowledge_base"):
-        """Initialize the RAG service"""
-        self.client = Cerebras(
-            api_key=os.environ.get("CEREBRAS_API_KEY"),
-        )
+    def __init__(self, collection_name: str = "government_schemes_knowledge_base",
+                 client=None, retriever=None, use_router: bool = True, expand_queries: bool = True):
+        """
+        Initialize the RAG service
+        
+        Args:
+            collection_name: Name of the vector database collection
+            client: Chat completions client (default: Cerebras client from CEREBRAS_API_KEY,
+                    or the shared stub client when upstreams are stubbed)
+            retriever: Retriever exposing search(query, top_k) (default: FastVectorRetriever)
+            use_router: Ask the LLM router whether a query needs RAG
+            expand_queries: Expand the query into several search queries with the LLM
+        """
+        self.client = client or create_chat_client("CEREBRAS_API_KEY")
         self.collection_name = collection_name
+        self.use_router = use_router
+        self.expand_queries = expand_queries
         
         # Initialize persistent fast retriever (zero-latency after first init)
         print("🚀 Initializing high-speed RAG service...")
         try:
-            self.retriever = get_fast_retriever(
+            self.retriever = retriever or get_fast_retriever(
                 collection_name=self.collection_name,
                 embedding_dim=3072,
                 similarity_top_k=3
@@ -166,35 +177,69 @@ Enhanced Queries:"""
             print(f"⚠️ Search error: {str(e)[:50]}...")
             return []
 
+    def retrieve_nodes(self, queries: list) -> list:
+        """Search every query and merge the results, dropping duplicate chunks"""
+        nodes = []
+        seen_content = set()  # Avoid duplicate content
+        
+        for query in queries:
+            results = self.direct_vector_search(query, top_k=3)
+            
+            for result in results:
+                # Simple deduplication based on first 100 characters
+                content_key = result.get_content()[:100]
+                if content_key not in seen_content:
+                    nodes.append(result)
+                    seen_content.add(content_key)
+        
+        return nodes
+
+    def format_context(self, nodes: list) -> str:
+        """Format retrieved nodes into a length-limited context string"""
+        all_contexts = [f"[Score: {result.score:.3f}] {result.get_content()}" for result in nodes]
+        
+        # Limit total context length
+        combined_context = "\n\n".join(all_contexts[:8])  # Max 8 chunks
+        
+        if len(combined_context) > 4000:  # Truncate if too long
+            combined_context = combined_context[:4000] + "..."
+            
+        return combined_context
+
     def retrieve_context(self, queries: list) -> str:
         """Retrieve relevant context using enhanced queries with direct search"""
         try:
-            all_contexts = []
-            seen_content = set()  # Avoid duplicate content
-            
-            for query in queries:
-                results = self.direct_vector_search(query, top_k=3)
-                
-                for result in results:
-                    content = result.get_content()
-                    # Simple deduplication based on first 100 characters
-                    content_key = content[:100]
-                    if content_key not in seen_content:
-                        all_contexts.append(f"[Score: {result.score:.3f}] {content}")
-                        seen_content.add(content_key)
-            
-            # Limit total context length
-            combined_context = "\n\n".join(all_contexts[:8])  # Max 8 chunks
-            
-            if len(combined_context) > 4000:  # Truncate if too long
-                combined_context = combined_context[:4000] + "..."
-                
-            return combined_context
+            return self.format_context(self.retrieve_nodes(queries))
             
         except Exception as e:
             # Silently handle errors
             return ""
 
+    def get_relevant_nodes(self, user_query: str) -> tuple[bool, list]:
+        """
+        Route the query and, if RAG is needed, search with the (enhanced) queries.
+        
+        Args:
+            user_query: User's question/query
+            
+        Returns:
+            Tuple of (needs_rag: bool, retrieved nodes in rank order)
+        """
+        # Step 1: Router decides if RAG is needed
+        print("🤔 Analyzing query...")
+        needs_rag = self.should_use_rag(user_query) if self.use_router else True
+        
+        if not needs_rag:
+            return False, []
+        
+        print("📚 Searching knowledge base...")
+        
+        # Step 2: Enhance query for better retrieval
+        enhanced_queries = self.enhance_query(user_query) if self.expand_queries else [user_query]
+        
+        # Step 3: Retrieve nodes using direct queries
+        return True, self.retrieve_nodes(enhanced_queries)
+
     def get_enhanced_context(self, user_query: str) -> tuple[bool, str]:
         """
         Main RAG pipeline: Route query and retrieve context if needed.
@@ -206,21 +251,13 @@ Enhanced Queries:"""
             Tuple of (needs_rag: bool, context: str)
         """
         try:
-            # Step 1: Router decides if RAG is needed
-            print("🤔 Analyzing query...")
-            needs_rag = self.should_use_rag(user_query)
+            needs_rag, nodes = self.get_relevant_nodes(user_query)
             
             if not needs_rag:
                 print("💬 Using general knowledge")
                 return False, ""
             
-            print("📚 Searching knowledge base...")
-            
-            # Step 2: Enhance query for better retrieval
-            enhanced_queries = self.enhance_query(user_query)
-            
-            # Step 3: Retrieve context using direct queries
-            context = self.retrieve_context(enhanced_queries)
+            context = self.format_context(nodes)
             
             if context:
                 print("✅ Found relevant information")
@@ -248,14 +285,15 @@ Enhanced Queries:"""
 
 
 # Factory function for easy initialization
-def create_rag_service(collection_name: str = "government_schemes_knowledge_base") -> SchemesRAGService:
+def create_rag_service(collection_name: str = "government_schemes_knowledge_base", **kwargs) -> SchemesRAGService:
     """
     Create and initialize a RAG service instance.
     
     Args:
         collection_name: Name of the vector database collection
+        **kwargs: Optional SchemesRAGService settings (client, retriever, use_router, expand_queries)
         
     Returns:
         Initialized SchemesRAGService instance
     """
-    return SchemesRAGService(collection_name=collection_name)
\ No newline at end of file
+    return SchemesRAGService(collection_name=collection_name, **kwargs)
\ No newline at end of file
@@ -0,0 +1,210 @@
+"""
+Pluggable Embedding Providers
+
+This module selects the embedding model used for both ingestion and query,
+so the RAG pipeline can run against OpenAI or fully offline on CPU.
+
+Providers:
+- openai: OpenAI text-embedding-3-large (default, matches the Zilliz collection)
+- local: sentence-transformers model on CPU (torch or ONNX backend), loaded once
+  per process and shared by every embedding instance
+- hashing: deterministic feature-hashing of word tokens, no model or network;
+  a lexical stand-in for benchmarks and offline tests
+- stub: hashing vectors served through the shared StubLLMClient embeddings
+  endpoint (simulated latency and call counting, see services.local_stubs)
+
+The provider is chosen with the EMBEDDING_PROVIDER environment variable.
+Vectors from different providers are not comparable: a collection must be
+queried with the same provider (and dimension) it was built with.
+
+Usage:
+    from services.embedding_providers import get_embed_model
+
+    Settings.embed_model = get_embed_model()          # provider from .env
+    embed_model = get_embed_model("local")            # explicit provider
+"""
+
+import os
+import re
+import math
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.bridge.pydantic import Field
+
+# Load environment variables
+load_dotenv()
+
+DEFAULT_PROVIDER = "openai"
+OPENAI_EMBEDDING_MODEL = "text-embedding-3-large"
+DEFAULT_LOCAL_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Loaded sentence-transformers models, keyed by (model_name, backend, device).
+# Shared by every LocalEmbedding in this process so the model is loaded once.
+_MODEL_CACHE: Dict[Tuple[str, str, str], Any] = {}
+_MODEL_LOCK = threading.Lock()
+
+
+def _load_local_model(model_name: str, backend: str, device: str) -> Any:
+    """Loads a sentence-transformers model once per process and caches it."""
+    key = (model_name, backend, device)
+    model = _MODEL_CACHE.get(key)
+    if model is not None:
+        return model
+
+    with _MODEL_LOCK:
+        if key not in _MODEL_CACHE:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError as e:
+                raise ImportError(
+                    "The 'local' embedding provider requires sentence-transformers. "
+                    "Install it with: pip install sentence-transformers"
+                ) from e
+
+            kwargs = {"device": device}
+            if backend != "torch":
+                kwargs["backend"] = backend
+            _MODEL_CACHE[key] = SentenceTransformer(model_name, **kwargs)
+
+    return _MODEL_CACHE[key]
+
+
+class LocalEmbedding(BaseEmbedding):
+    """
+    CPU embedding model backed by sentence-transformers.
+
+    Inputs are encoded in batches of `embed_batch_size`, and the underlying
+    model is shared process-wide, so creating many instances is cheap.
+    """
+
+    model_name: str = Field(default=DEFAULT_LOCAL_MODEL, description="sentence-transformers model name or path")
+    backend: str = Field(default="torch", description="Inference backend: 'torch' or 'onnx'")
+    device: str = Field(default="cpu", description="Device to run the model on")
+    normalize: bool = Field(default=True, description="L2-normalize embeddings (cosine similarity)")
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "LocalEmbedding"
+
+    @property
+    def dimension(self) -> int:
+        """Embedding dimension of the loaded model."""
+        return self._model().get_sentence_embedding_dimension()
+
+    def _model(self) -> Any:
+        return _load_local_model(self.model_name, self.backend, self.device)
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        embeddings = self._model().encode(
+            texts,
+            batch_size=self.embed_batch_size,
+            normalize_embeddings=self.normalize,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        return embeddings.tolist()
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._encode([query])[0]
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._get_query_embedding(query)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._encode([text])[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self._encode(texts)
+
+
+class HashingEmbedding(BaseEmbedding):
+    """
+    Deterministic bag-of-words embedding using the hashing trick.
+
+    Each lowercase word (and word bigram) is hashed to a signed bucket of a
+    fixed-size vector, which is then L2-normalized. It captures lexical overlap
+    only, but needs no model download or network access and always returns the
+    same vector for the same text.
+    """
+
+    dimensions: int = Field(default=1024, description="Size of the hashed vector")
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "HashingEmbedding"
+
+    @property
+    def dimension(self) -> int:
+        return self.dimensions
+
+    def _embed(self, text: str) -> List[float]:
+        words = re.findall(r"[a-z0-9]+", text.lower())
+        tokens = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+        vector = [0.0] * self.dimensions
+        for token in tokens:
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:7], "little") % self.dimensions
+            vector[bucket] += 1.0 if digest[7] & 1 else -1.0
+
+        norm = math.sqrt(sum(value * value for value in vector))
+        return [value / norm for value in vector] if norm else vector
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._embed(query)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._embed(query)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+def get_embed_model(provider: Optional[str] = None, dimensions: int = 3072) -> BaseEmbedding:
+    """
+    Create the embedding model for the configured provider.
+
+    Args:
+        provider: 'openai', 'local', 'hashing' or 'stub' (default: EMBEDDING_PROVIDER from .env, else 'openai')
+        dimensions: Output dimension for OpenAI, hashing and stub (ignored by local models)
+
+    Returns:
+        A LlamaIndex embedding model
+    """
+    provider = (provider or os.getenv("EMBEDDING_PROVIDER") or DEFAULT_PROVIDER).lower()
+
+    if provider == "openai":
+        from llama_index.embeddings.openai import OpenAIEmbedding
+
+        openai_api_key = os.getenv("OPENAI_API_KEY")
+        if not openai_api_key:
+            raise ValueError("OPENAI_API_KEY must be set in .env")
+
+        return OpenAIEmbedding(
+            model=OPENAI_EMBEDDING_MODEL,
+            dimensions=dimensions,
+            api_key=openai_api_key
+        )
+
+    if provider == "local":
+        return LocalEmbedding(
+            model_name=os.getenv("LOCAL_EMBEDDING_MODEL", DEFAULT_LOCAL_MODEL),
+            backend=os.getenv("LOCAL_EMBEDDING_BACKEND", "torch"),
+            device=os.getenv("LOCAL_EMBEDDING_DEVICE", "cpu"),
+            embed_batch_size=int(os.getenv("LOCAL_EMBEDDING_BATCH_SIZE", "32")),
+        )
+
+    if provider == "hashing":
+        return HashingEmbedding(dimensions=dimensions)
+
+    if provider == "stub":
+        from services.local_stubs import StubEmbedding
+        from services.upstreams import get_stub_llm_client
+
+        return StubEmbedding(client=get_stub_llm_client(), dimensions=dimensions)
+
+    raise ValueError(f"Unknown embedding provider '{provider}'. Use 'openai', 'local', 'hashing' or 'stub'.")
@@ -5,7 +5,14 @@ LlamaIndex components for parsing, indexing, and storage.
 """
 
 import os
+import sys
+import queue
+import hashlib
+import threading
+import uuid
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
 
 # LlamaIndex Core Imports
@@ -17,13 +24,245 @@ from llama_index.core import (
     load_index_from_storage,
 )
 from llama_index.core.node_parser import MarkdownNodeParser
+from llama_index.core.schema import (
+    Document,
+    TextNode,
+    MetadataMode,
+    NodeRelationship,
+    RelatedNodeInfo,
+)
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent))
 
-# LlamaIndex OpenAI Integration
-from llama_index.embeddings.openai import OpenAIEmbedding
+# Embedding model (OpenAI or local CPU model, chosen by EMBEDDING_PROVIDER)
+from services.embedding_providers import get_embed_model
 
 # Load environment variables from a .env file in the project root
 load_dotenv()
 
+# Namespace for deterministic node ids: re-ingesting an unchanged knowledge base
+# yields the same ids, so uploads overwrite nodes instead of duplicating them.
+NODE_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "krishi-jyoti/knowledge-base")
+
+# Texts sent to the embedding model per request (matches zilliz_config.json batch_size)
+EMBED_BATCH_SIZE = 100
+
+# Maximum number of parsed documents buffered between the parsing and embedding stages
+NODE_QUEUE_SIZE = 64
+
+# Marks the end of the parsing stage on the node queue
+_END_OF_STREAM = None
+
+# Seconds between checks for a stopped consumer while the node queue is full
+QUEUE_PUT_TIMEOUT_S = 0.5
+
+
+class _PipelineStopped(Exception):
+    """Raised in the parsing stage once the embedding stage has stopped consuming."""
+
+
+def _document_id(document: Document, base_dir: Optional[Path] = None) -> str:
+    """
+    Returns a stable id for a loaded document.
+
+    SimpleDirectoryReader assigns random ids, so the file path relative to
+    `base_dir` is used when available (files with the same name in different
+    folders stay distinct), then the file name, and the content hash otherwise.
+    """
+    file_path = document.metadata.get("file_path")
+    if file_path and base_dir is not None:
+        try:
+            return Path(file_path).resolve().relative_to(Path(base_dir).resolve()).as_posix()
+        except ValueError:
+            pass
+    file_name = document.metadata.get("file_name")
+    if file_name:
+        return file_name
+    return hashlib.sha256(document.text.encode("utf-8")).hexdigest()
+
+
+def _parse_document(doc_id: str, text: str, metadata: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Parses one markdown document into node payloads. Runs inside a worker process.
+
+    Plain dicts are returned instead of TextNode objects to keep the results
+    cheap to pickle back to the parent process.
+    """
+    parser = MarkdownNodeParser()
+    nodes = parser.get_nodes_from_documents([Document(text=text, metadata=metadata, id_=doc_id)])
+
+    payloads = []
+    for position, node in enumerate(nodes):
+        content = node.get_content()
+        content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        payloads.append({
+            "id_": str(uuid.uuid5(NODE_ID_NAMESPACE, f"{doc_id}:{position}:{content_hash}")),
+            "text": content,
+            "metadata": {**node.metadata, "content_hash": content_hash},
+        })
+    return payloads
+
+
+def _build_text_nodes(doc_id: str, payloads: List[Dict[str, Any]]) -> List[TextNode]:
+    """Rebuilds TextNode objects from worker payloads in the parent process."""
+    return [
+        TextNode(
+            id_=payload["id_"],
+            text=payload["text"],
+            metadata=payload["metadata"],
+            excluded_embed_metadata_keys=["content_hash"],
+            excluded_llm_metadata_keys=["content_hash"],
+            relationships={NodeRelationship.SOURCE: RelatedNodeInfo(node_id=doc_id)},
+        )
+        for payload in payloads
+    ]
+
+
+def parse_documents_parallel(documents: List[Document], node_queue: queue.Queue,
+                             max_workers: Optional[int] = None, stop: Optional[threading.Event] = None,
+                             base_dir: Optional[Path] = None) -> None:
+    """
+    Parsing stage: spreads documents across a process pool and pushes the
+    resulting nodes onto `node_queue`, one list of nodes per document.
+
+    At most two documents per worker are in flight, and `node_queue` is bounded,
+    so a slow embedding stage throttles parsing instead of buffering the whole
+    corpus in memory. Errors are forwarded through the queue so the consumer
+    can re-raise them, and the queue ends with `_END_OF_STREAM`. Once `stop`
+    is set (the consumer failed), parsing ends: pending documents are
+    cancelled and the worker processes shut down.
+
+    Args:
+        documents: Documents loaded by SimpleDirectoryReader.
+        node_queue: Bounded queue feeding the embedding stage.
+        max_workers: Number of worker processes (default: CPU count).
+        stop: Set by the consumer when it no longer reads the queue.
+        base_dir: Knowledge base directory that document ids are relative to.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    max_in_flight = max_workers * 2
+    stop = stop or threading.Event()
+
+    pending: Dict[Any, str] = {}  # future -> document id
+
+    def put(item):
+        # Bounded wait, so a consumer that stopped reading cannot block the producer forever
+        while True:
+            if stop.is_set():
+                raise _PipelineStopped()
+            try:
+                node_queue.put(item, timeout=QUEUE_PUT_TIMEOUT_S)
+                return
+            except queue.Full:
+                continue
+
+    def drain(futures):
+        for future in futures:
+            doc_id = pending.pop(future)
+            put(_build_text_nodes(doc_id, future.result()))
+
+    executor = ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        for document in documents:
+            if len(pending) >= max_in_flight:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                drain(done)
+
+            doc_id = _document_id(document, base_dir)
+            future = executor.submit(_parse_document, doc_id, document.text, dict(document.metadata))
+            pending[future] = doc_id
+
+        drain(wait(pending).done)
+        put(_END_OF_STREAM)
+    except _PipelineStopped:
+        pass
+    except Exception as e:
+        try:
+            put(e)
+            put(_END_OF_STREAM)
+        except _PipelineStopped:
+            pass
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def embed_nodes_from_queue(node_queue: queue.Queue, embed_model,
+                           batch_size: int = EMBED_BATCH_SIZE) -> List[TextNode]:
+    """
+    Embedding stage: consumes nodes from the parsing stage and embeds them in
+    fixed-size batches as they arrive.
+
+    Args:
+        node_queue: Queue filled by `parse_documents_parallel`.
+        embed_model: LlamaIndex embedding model.
+        batch_size: Number of texts per embedding request.
+
+    Returns:
+        All nodes with their `embedding` populated.
+    """
+    embedded: List[TextNode] = []
+    batch: List[TextNode] = []
+
+    def flush(nodes):
+        texts = [node.get_content(metadata_mode=MetadataMode.EMBED) for node in nodes]
+        for node, embedding in zip(nodes, embed_model.get_text_embedding_batch(texts)):
+            node.embedding = embedding
+        embedded.extend(nodes)
+
+    while True:
+        item = node_queue.get()
+        if item is _END_OF_STREAM:
+            break
+        if isinstance(item, Exception):
+            raise item
+
+        batch.extend(item)
+        while len(batch) >= batch_size:
+            flush(batch[:batch_size])
+            batch = batch[batch_size:]
+
+    if batch:
+        flush(batch)
+
+    return embedded
+
+
+def build_embedded_nodes(documents: List[Document], embed_model,
+                         max_workers: Optional[int] = None,
+                         queue_size: int = NODE_QUEUE_SIZE,
+                         base_dir: Optional[Path] = None) -> List[TextNode]:
+    """
+    Runs the two-stage ingestion pipeline: multi-process markdown parsing
+    feeding batched embedding through a bounded queue.
+
+    Args:
+        documents: Documents to ingest.
+        embed_model: LlamaIndex embedding model.
+        max_workers: Number of parsing processes (default: CPU count).
+        queue_size: Maximum number of parsed documents waiting to be embedded.
+        base_dir: Knowledge base directory that document ids are relative to.
+
+    Returns:
+        Nodes with stable ids, content hashes and embeddings.
+    """
+    node_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    producer = threading.Thread(
+        target=parse_documents_parallel,
+        args=(documents, node_queue, max_workers, stop, base_dir),
+        daemon=True
+    )
+    producer.start()
+
+    try:
+        return embed_nodes_from_queue(node_queue, embed_model)
+    finally:
+        # On an embedding error the producer stops parsing and shuts its process pool down
+        stop.set()
+        producer.join()
+
+
 def create_or_load_index(knowledge_base_dir: Path, index_persist_dir: Path) -> VectorStoreIndex:
     """
     Creates a new vector index from a knowledge base or loads an existing one.
@@ -44,10 +283,7 @@ def create_or_load_index(knowledge_base_dir: Path, index_persist_dir: Path) -> V
     """
     # Configure LlamaIndex global settings
     # This is a best practice to set up your components in one place.
-    Settings.embed_model = OpenAIEmbedding(
-        model="text-embedding-3-large",
-        api_key=os.getenv("OPENAI_API_KEY")
-    )
+    Settings.embed_model = get_embed_model()
     # The MarkdownNodeParser is the LlamaIndex equivalent of your custom
     # hierarchical chunking logic. It understands markdown structure.
     Settings.node_parser = MarkdownNodeParser()
@@ -72,13 +308,16 @@ def create_or_load_index(knowledge_base_dir: Path, index_persist_dir: Path) -> V
     ).load_data()
     print(f"   -> Found {len(documents)} document(s).")
 
-    # This one line handles the entire indexing process:
-    # - Parsing the document into nodes (chunks) using the MarkdownNodeParser.
-    # - Creating embeddings for each node using the OpenAIEmbedding model.
-    # - Storing the nodes and their embeddings in a vector store.
-    print("   🚀 Creating index and generating embeddings... (This may take a moment)")
-    index = VectorStoreIndex.from_documents(
-        documents,
+    # Parsing runs in a process pool and streams nodes to the embedding stage:
+    # - Each document is split into nodes by the MarkdownNodeParser in a worker process.
+    # - Nodes get stable ids and content hashes, then are embedded in batches.
+    # - The pre-embedded nodes are stored in a vector store (no second embedding pass).
+    print("   🚀 Parsing documents and generating embeddings... (This may take a moment)")
+    nodes = build_embedded_nodes(documents, Settings.embed_model, base_dir=knowledge_base_dir)
+    print(f"   -> Parsed and embedded {len(nodes)} node(s).")
+
+    index = VectorStoreIndex(
+        nodes=nodes,
         show_progress=True # Shows a progress bar
     )
     print("   -> Indexing complete.")
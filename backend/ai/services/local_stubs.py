@@ -0,0 +1,518 @@
+"""
+Local Stand-ins for External Services
+
+Deterministic, in-process fakes for the services the AI pipelines depend on,
+so the chatbot, crop and RAG paths can be run, profiled and load-tested
+without API keys or network access:
+
+- StubLLMClient: OpenAI-compatible client (chat.completions.create and
+  embeddings.create) standing in for Cerebras and OpenAI, with configurable
+  per-call latency and call counters
+- StubEmbedding: LlamaIndex embedding model served by StubLLMClient.embeddings
+- InMemoryMilvusClient: Milvus-like vector store (the MilvusClient subset used
+  by FastVectorRetriever) with brute-force cosine search
+- stub_openweathermap_response: OpenWeatherMap geocoding, current weather and
+  5-day forecast payloads, derived deterministically from the location
+- StubVoiceAgent: drop-in for the Deepgram VoiceAgent that answers each
+  utterance with a transcript, a reply and PCM audio chunks
+
+The fakes are normally obtained through services.upstreams, which returns them
+instead of the real clients when the "upstreams.mode" config is "stub".
+
+Usage:
+    from services.local_stubs import StubLLMClient, InMemoryMilvusClient
+
+    llm = StubLLMClient(chat_latency_ms=300)
+    rag = SchemesRAGService(client=llm)
+"""
+
+import re
+import json
+import math
+import time
+import asyncio
+import hashlib
+import itertools
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import numpy as np
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.bridge.pydantic import Field, PrivateAttr
+
+from services.embedding_providers import HashingEmbedding
+
+GREETING = re.compile(r"^\s*(hi|hello|hey|namaste|thanks|thank you)\b", re.IGNORECASE)
+LOCATION = re.compile(r"\b(?:in|at|for|near|around)\s+([A-Z][A-Za-z .'-]*?)\s*(?:[?.!,]|$)")
+
+# Model inputs returned for the crop bot's soil/weather prompts (dataset-typical values)
+STUB_MODEL_INPUTS = {"N": 90, "P": 42, "K": 43, "pH": 6.5, "temperature": 25.0, "humidity": 80.0, "rainfall": 200.0}
+
+
+def default_responder(messages: List[Dict[str, str]]) -> str:
+    """
+    Deterministic answers for the prompts used in this codebase.
+
+    Structured prompts (RAG router, query enhancer, crop intent, soil/weather
+    estimation, crop validation) get well-formed answers so the surrounding
+    code follows its normal path; anything else gets a short fixed reply.
+    """
+    prompt = messages[-1]["content"]
+
+    # SchemesRAGService.enhance_query
+    if "Enhanced Queries:" in prompt:
+        query = prompt.split("Original Query:", 1)[1].split("\n", 1)[0].strip()
+        return "\n".join(f"- {query} {aspect}" for aspect in ("benefits", "eligibility criteria", "application process"))
+
+    # SchemesRAGService.should_use_rag
+    if prompt.rstrip().endswith("Decision:"):
+        query = prompt.rsplit("Query:", 1)[1].rsplit("Decision:", 1)[0].strip()
+        return "SIMPLE" if GREETING.match(query) else "RAG_NEEDED"
+
+    # CropChatBot.classify_intent
+    if "Classify user intent" in prompt:
+        match = re.search(r"User message: '(.*)'", prompt, re.DOTALL)
+        message = match.group(1) if match else ""
+        if GREETING.match(message):
+            return json.dumps({"intent": "greeting", "location": None, "crop": None})
+        location = LOCATION.search(message)
+        if location:
+            return json.dumps({"intent": "new_crop_recommendation", "location": location.group(1), "crop": None})
+        return json.dumps({"intent": "general_query", "location": None, "crop": None})
+
+    # CropChatBot.llm_parse_weather_and_soil / llm_estimate_weather_and_soil
+    if '"N": v' in prompt:
+        return json.dumps(STUB_MODEL_INPUTS)
+
+    # CropChatBot.validate_recommendations
+    if "'Suitable' or 'Unsuitable'" in prompt:
+        suggested = re.search(r"suggested: \[(.*?)\]", prompt)
+        crops = re.findall(r"'([^']+)'", suggested.group(1)) if suggested else []
+        return json.dumps({crop: "Suitable" for crop in crops})
+
+    return f"This is a stub response to: {prompt.strip()[:120]}"
+
+
+class StubLLMClient:
+    """
+    In-process stand-in for the Cerebras and OpenAI SDK clients.
+
+    Chat completions are answered by `responder` and embeddings by feature
+    hashing, after a fixed simulated latency. Responses mimic the SDK objects
+    (`.choices[0].message.content`, `.data[i].embedding`). Thread-safe.
+    """
+
+    def __init__(self, chat_latency_ms: float = 0.0, embedding_latency_ms: float = 0.0,
+                 embedding_dim: int = 3072, responder: Optional[Callable] = None):
+        self.chat_latency_s = chat_latency_ms / 1000
+        self.embedding_latency_s = embedding_latency_ms / 1000
+        self.embedding_dim = embedding_dim
+        self.responder = responder or default_responder
+
+        self.chat_calls = 0
+        self.embedding_calls = 0
+        self._lock = threading.Lock()
+        self._hashers: Dict[int, HashingEmbedding] = {}
+
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_chat_completion))
+        self.embeddings = SimpleNamespace(create=self._create_embeddings)
+
+    def _create_chat_completion(self, messages: List[Dict[str, str]], model: str = "stub", **kwargs):
+        with self._lock:
+            self.chat_calls += 1
+            call_id = self.chat_calls
+        if self.chat_latency_s:
+            time.sleep(self.chat_latency_s)
+
+        content = self.responder(messages)
+        return SimpleNamespace(
+            id=f"stub-chat-{call_id}",
+            model=model,
+            choices=[SimpleNamespace(
+                index=0,
+                finish_reason="stop",
+                message=SimpleNamespace(role="assistant", content=content)
+            )],
+            usage=SimpleNamespace(
+                prompt_tokens=sum(len(m["content"].split()) for m in messages),
+                completion_tokens=len(content.split())
+            )
+        )
+
+    def _create_embeddings(self, input, model: str = "stub", dimensions: Optional[int] = None, **kwargs):
+        texts = [input] if isinstance(input, str) else list(input)
+        dimensions = dimensions or self.embedding_dim
+
+        with self._lock:
+            self.embedding_calls += 1
+            hasher = self._hashers.setdefault(dimensions, HashingEmbedding(dimensions=dimensions))
+        if self.embedding_latency_s:
+            time.sleep(self.embedding_latency_s)
+
+        return SimpleNamespace(
+            model=model,
+            data=[SimpleNamespace(index=i, object="embedding", embedding=hasher.get_text_embedding(text))
+                  for i, text in enumerate(texts)]
+        )
+
+    def reset_counters(self):
+        """Reset chat and embedding call counters."""
+        with self._lock:
+            self.chat_calls = 0
+            self.embedding_calls = 0
+
+
+class StubEmbedding(BaseEmbedding):
+    """LlamaIndex embedding model backed by StubLLMClient.embeddings.create."""
+
+    dimensions: int = Field(default=3072, description="Embedding dimension")
+    _client: Any = PrivateAttr()
+
+    def __init__(self, client: StubLLMClient, **kwargs):
+        super().__init__(**kwargs)
+        self._client = client
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "StubEmbedding"
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        response = self._client.embeddings.create(input=texts, dimensions=self.dimensions)
+        return [item.embedding for item in response.data]
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._embed([query])[0]
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._get_query_embedding(query)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._embed([text])[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts)
+
+
+class _StubCollection:
+    """Rows of one in-memory collection plus a lazily built normalized vector matrix."""
+
+    def __init__(self, dimension: int, vector_field: str):
+        self.dimension = dimension
+        self.vector_field = vector_field
+        self.rows: Dict[str, Dict[str, Any]] = {}
+        self._ids: Optional[List[str]] = None
+        self._matrix: Optional[np.ndarray] = None
+
+    def upsert(self, rows: List[Dict[str, Any]]) -> List[str]:
+        ids = []
+        for row in rows:
+            row_id = str(row["id"])
+            self.rows[row_id] = dict(row)
+            ids.append(row_id)
+        self._matrix = None
+        return ids
+
+    def matrix(self):
+        if self._matrix is None:
+            self._ids = list(self.rows)
+            matrix = np.array([self.rows[i][self.vector_field] for i in self._ids], dtype=np.float32)
+            matrix = matrix.reshape(len(self._ids), self.dimension)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            self._matrix = matrix / np.where(norms == 0, 1, norms)
+        return self._ids, self._matrix
+
+
+class InMemoryMilvusClient:
+    """
+    Milvus-like vector store kept in process memory.
+
+    Implements the MilvusClient methods used in this codebase with the same
+    argument names and result shapes. Search is exact cosine similarity
+    (`distance` is the similarity, as with Milvus' COSINE metric).
+    """
+
+    def __init__(self, search_latency_ms: float = 0.0):
+        self.search_latency_s = search_latency_ms / 1000
+        self.search_calls = 0
+        self._collections: Dict[str, _StubCollection] = {}
+        self._lock = threading.Lock()
+
+    def has_collection(self, collection_name: str, **kwargs) -> bool:
+        return collection_name in self._collections
+
+    def list_collections(self, **kwargs) -> List[str]:
+        return list(self._collections)
+
+    def create_collection(self, collection_name: str, dimension: int,
+                          vector_field_name: str = "embedding", **kwargs) -> None:
+        with self._lock:
+            self._collections.setdefault(collection_name, _StubCollection(dimension, vector_field_name))
+
+    def drop_collection(self, collection_name: str, **kwargs) -> None:
+        with self._lock:
+            self._collections.pop(collection_name, None)
+
+    def load_collection(self, collection_name: str, **kwargs) -> None:
+        self._get(collection_name)
+
+    def insert(self, collection_name: str, data: List[Dict[str, Any]], **kwargs) -> Dict[str, Any]:
+        with self._lock:
+            ids = self._get(collection_name).upsert(data)
+        return {"insert_count": len(ids), "ids": ids}
+
+    upsert = insert
+
+    def search(self, collection_name: str, data: List[List[float]], limit: int = 10,
+               output_fields: Optional[List[str]] = None, **kwargs) -> List[List[Dict[str, Any]]]:
+        with self._lock:
+            self.search_calls += 1
+            collection = self._get(collection_name)
+            ids, matrix = collection.matrix()
+            rows = collection.rows
+        if self.search_latency_s:
+            time.sleep(self.search_latency_s)
+
+        queries = np.asarray(data, dtype=np.float32).reshape(-1, collection.dimension)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        scores = (queries / np.where(norms == 0, 1, norms)) @ matrix.T
+
+        results = []
+        for query_scores in scores:
+            top = np.argsort(-query_scores)[:limit]
+            results.append([
+                {
+                    "id": ids[i],
+                    "distance": float(query_scores[i]),
+                    "entity": {field: rows[ids[i]].get(field) for field in (output_fields or [])}
+                }
+                for i in top
+            ])
+        return results
+
+    def get_collection_stats(self, collection_name: str, **kwargs) -> Dict[str, Any]:
+        return {"row_count": len(self._get(collection_name).rows)}
+
+    def flush(self, collection_name: str, **kwargs) -> None:
+        self._get(collection_name)
+
+    def close(self) -> None:
+        pass
+
+    def _get(self, collection_name: str) -> _StubCollection:
+        if collection_name not in self._collections:
+            raise ValueError(f"Collection '{collection_name}' does not exist")
+        return self._collections[collection_name]
+
+
+def seed_collection_from_markdown(client: InMemoryMilvusClient, collection_name: str,
+                                  kb_dir: Path, embed_model) -> int:
+    """
+    Fill a stub collection from a markdown knowledge base using the regular
+    ingestion pipeline (same chunking and node ids as production).
+
+    Returns:
+        Number of rows inserted
+    """
+    from llama_index.core import SimpleDirectoryReader
+    from services.embedding_service import build_embedded_nodes
+
+    documents = SimpleDirectoryReader(input_dir=str(kb_dir), required_exts=[".md"]).load_data()
+    nodes = build_embedded_nodes(documents, embed_model, max_workers=1, base_dir=kb_dir)
+
+    client.create_collection(collection_name, dimension=len(nodes[0].embedding))
+    client.insert(collection_name, [
+        {"id": node.node_id, "embedding": node.embedding, "text": node.get_content(), "metadata": node.metadata}
+        for node in nodes
+    ])
+    return len(nodes)
+
+
+def _location_seed(name: str) -> float:
+    """Stable value in [0, 1) derived from a location name."""
+    digest = hashlib.blake2b(name.strip().lower().encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") / 2 ** 64
+
+
+def stub_openweathermap_response(url: str, params: Dict[str, Any]) -> Union[Dict, List]:
+    """
+    OpenWeatherMap-shaped payload for a geocoding, current weather or forecast URL.
+
+    Coordinates and weather are derived from the queried name (or lat/lon), so
+    the same location always gets the same plausible Indian weather. Unknown
+    endpoints return an empty dict.
+    """
+    query = params.get("q") or f"{params.get('lat')},{params.get('lon')}"
+    name = str(query).split(",")[0].strip().title()
+    seed = _location_seed(name)
+
+    if "lat" in params and "lon" in params:
+        lat, lon = float(params["lat"]), float(params["lon"])
+    else:
+        lat, lon = round(8.0 + seed * 26.0, 4), round(69.0 + seed * 27.0, 4)
+
+    if url.endswith("/direct"):
+        return [{"name": name, "lat": lat, "lon": lon, "country": "IN", "state": ""}]
+
+    now = int(time.time())
+    temperature = round(18.0 + seed * 16.0, 2)
+    humidity = int(40 + seed * 50)
+    city = {"name": name, "country": "IN", "coord": {"lat": lat, "lon": lon}}
+
+    def reading(dt: int, offset: float) -> Dict[str, Any]:
+        temp = round(temperature + offset, 2)
+        return {
+            "dt": dt,
+            "main": {"temp": temp, "feels_like": temp, "temp_min": temp - 1, "temp_max": temp + 1,
+                     "humidity": humidity, "pressure": 1008},
+            "weather": [{"id": 802, "main": "Clouds", "description": "scattered clouds", "icon": "03d"}],
+            "wind": {"speed": round(1.5 + seed * 4, 2), "deg": int(seed * 360)},
+            "clouds": {"all": int(seed * 100)},
+            "visibility": 10000,
+            "rain": {"3h": round(seed * 2, 2)} if humidity > 70 else {},
+        }
+
+    if url.endswith("/weather"):
+        current = reading(now, 0.0)
+        current.update({
+            "name": name,
+            "coord": city["coord"],
+            "sys": {"country": "IN", "sunrise": now - 6 * 3600, "sunset": now + 6 * 3600},
+        })
+        return current
+
+    if url.endswith("/forecast"):
+        steps = [reading(now + i * 3 * 3600, round(3.0 * math.sin(i * math.pi / 4), 2)) for i in range(40)]
+        return {"cod": "200", "cnt": len(steps), "list": steps, "city": city}
+
+    return {}
+
+
+# Questions stub voice callers ask in turn when the think router answers them
+STUB_VOICE_QUESTIONS = (
+    "what is the MSP of wheat?",
+    "what is the support price of paddy this year?",
+    "how do I apply for the PM-KISAN scheme?",
+    "chana ka MSP kitna hai?",
+    "which crop should I sow after the rains?",
+)
+# Shared by all stub agents, so one-question sessions still cover every question
+_stub_question_turn = itertools.count()
+
+
+class StubVoiceAgent:
+    """
+    Stand-in for ai.Voice.voice_agent_class.VoiceAgent that needs no Deepgram
+    connection.
+
+    Uplink audio is counted; every `utterance_bytes` (default: one second at
+    `input_sample_rate`) it answers the way the
+    Deepgram agent does, through `response_callback` on `_main_loop`: a user
+    transcript, the assistant text, `reply_chunks` chunks of 24 kHz PCM
+    (`chunk_latency_ms` apart, like speech being synthesized), then
+    "audio_complete". send_audio blocks for `uplink_latency_ms`, like a send on
+    a slow upstream socket, and start for `connect_latency_ms`, like the
+    handshake and settings negotiation. With a `greeting`, the greeting text
+    and `reply_chunks` chunks of audio follow the ready status after
+    `greeting_latency_ms` (its synthesis).
+
+    With `think` (the voice think router's answer coroutine, VOICE_THINK=local)
+    the utterances of all stub agents cycle through STUB_VOICE_QUESTIONS and the reply text comes
+    from it instead of a fixed answer after `think_latency_ms`.
+    """
+
+    def __init__(self, response_callback: Callable = None, utterance_bytes: Optional[int] = None,
+                 reply_chunks: int = 10, chunk_bytes: int = 4800, think_latency_ms: float = 0.0,
+                 chunk_latency_ms: float = 0.0, uplink_latency_ms: float = 0.0,
+                 connect_latency_ms: float = 0.0, input_sample_rate: int = 48000,
+                 think: Optional[Callable] = None, greeting: Optional[str] = None,
+                 greeting_latency_ms: float = 0.0):
+        self.response_callback = response_callback
+        self.think = think
+        self.greeting = greeting
+        self.greeting_latency_s = greeting_latency_ms / 1000
+        self.input_sample_rate = input_sample_rate
+        self.utterance_bytes = utterance_bytes or input_sample_rate * 2
+        self.reply_chunks = reply_chunks
+        self.chunk_bytes = chunk_bytes
+        self.think_latency_s = think_latency_ms / 1000
+        self.chunk_latency_s = chunk_latency_ms / 1000
+        self.uplink_latency_s = uplink_latency_ms / 1000
+        self.connect_latency_s = connect_latency_ms / 1000
+
+        self.running = False
+        self._main_loop = None
+        self._received = 0
+        self.utterances = 0
+        self.keep_alives = 0
+
+    def start(self) -> bool:
+        if self.connect_latency_s:
+            time.sleep(self.connect_latency_s)
+        self.running = True
+        self._dispatch(self._connected())
+        return True
+
+    def stop(self):
+        self.running = False
+
+    def send_audio(self, audio_data: bytes) -> bool:
+        if not self.running:
+            return False
+        if self.uplink_latency_s:
+            time.sleep(self.uplink_latency_s)
+        self._received += len(audio_data)
+        if self._received >= self.utterance_bytes:
+            self._received = 0
+            self.utterances += 1
+            self._dispatch(self._reply(self.utterances))
+        return True
+
+    def send_keep_alive(self) -> bool:
+        if not self.running:
+            return False
+        self.keep_alives += 1
+        return True
+
+    def is_running(self) -> bool:
+        return self.running
+
+    def _dispatch(self, coroutine):
+        if self.response_callback and self._main_loop:
+            asyncio.run_coroutine_threadsafe(coroutine, self._main_loop)
+        else:
+            coroutine.close()
+
+    async def _emit(self, role: str, content):
+        await self.response_callback(role, content)
+
+    async def _connected(self):
+        await self._emit("status", "ready")
+        if self.greeting:
+            if self.greeting_latency_s:
+                await asyncio.sleep(self.greeting_latency_s)
+            await self._emit("assistant", self.greeting)
+            await self._speak()
+
+    async def _speak(self):
+        chunk = bytes(self.chunk_bytes)
+        for index in range(self.reply_chunks):
+            if index and self.chunk_latency_s:
+                await asyncio.sleep(self.chunk_latency_s)
+            await self._emit("audio", chunk)
+        await self._emit("audio_complete", "")
+
+    async def _reply(self, utterance: int):
+        await self._emit("status", "listening")
+        if self.think:
+            question = STUB_VOICE_QUESTIONS[next(_stub_question_turn) % len(STUB_VOICE_QUESTIONS)]
+            await self._emit("user", f"Stub utterance {utterance}: {question}")
+            answer, _ = await self.think([{"role": "user", "content": question}])
+        else:
+            await self._emit("user", f"Stub utterance {utterance}: what is the MSP of wheat?")
+            if self.think_latency_s:
+                await asyncio.sleep(self.think_latency_s)
+            answer = "The MSP of wheat is 2425 rupees per quintal."
+        await self._emit("assistant", answer)
+        await self._speak()
@@ -0,0 +1,233 @@
+"""
+MSP Data Store for Krishi Jyoti
+
+One source for the Minimum Support Prices served by /api/v1/schemes/msp and
+spoken by the voice agent (config/msp_rates.json, or MSP_DATA_PATH). The file
+is re-checked at most every `check_interval_s` seconds and reloaded when its
+modification time or size changes, so new rates are published by editing the
+file, without a redeploy.
+
+For the voice agent the table is cut down to the crops of the caller's state
+and season, so each session's think prompt carries only the rates it can be
+asked about (the whole table when neither is known).
+
+Usage:
+    from services.msp_store import MSPStore
+
+    store = MSPStore.get_instance()
+    rates = store.rates(crop="wheat", state="Punjab")
+    prompt_data = store.prompt_table(state="Kerala")
+    mentioned = store.find("what is the msp of chana and wheat")   # gram, wheat
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import Any, ClassVar, Dict, List, Optional
+
+DEFAULT_DATA_PATH = Path(__file__).resolve().parent.parent / "config" / "msp_rates.json"
+DEFAULT_CHECK_INTERVAL_S = 5.0
+
+SEASONS = ("kharif", "rabi")
+
+logger = logging.getLogger(__name__)
+
+
+class MSPStore:
+    """
+    Process-wide holder of the MSP table with hot reload.
+
+    A reload parses into new objects and swaps the reference, so concurrent
+    readers always see one complete table.
+    """
+
+    _instance: ClassVar[Optional['MSPStore']] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, data_path: Optional[Path] = None, check_interval_s: float = DEFAULT_CHECK_INTERVAL_S):
+        """
+        Args:
+            data_path: MSP table (default: MSP_DATA_PATH from .env, else config/msp_rates.json)
+            check_interval_s: Minimum seconds between file change checks
+        """
+        self.data_path = Path(data_path or os.getenv("MSP_DATA_PATH") or DEFAULT_DATA_PATH)
+        self.check_interval_s = check_interval_s
+
+        self._data: Dict[str, Any] = {"crops": []}
+        self._signature = None  # (mtime_ns, size) of the loaded file
+        self._loaded_at: Optional[datetime] = None
+        self._last_check = 0.0
+        self._checked = False
+        self._error: Optional[str] = None
+        self._reloads = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> 'MSPStore':
+        """Shared store for this process."""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def _refresh(self, force: bool = False):
+        """Reload the table if the file changed since the last load."""
+        now = time.monotonic()
+        if not force and self._checked and now - self._last_check < self.check_interval_s:
+            return
+
+        with self._lock:
+            if not force and self._checked and now - self._last_check < self.check_interval_s:
+                return
+            self._checked = True
+            self._last_check = now
+
+            try:
+                stat = self.data_path.stat()
+            except OSError:
+                self._set_error(f"MSP data not found at {self.data_path}")
+                return
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if signature == self._signature and not force:
+                return
+
+            try:
+                data = json.loads(self.data_path.read_text(encoding="utf-8"))
+                for crop in data["crops"]:
+                    crop["_names"] = {crop["name"].lower(), *(alias.lower() for alias in crop.get("aliases", []))}
+                    crop["_states"] = {state.lower() for state in crop.get("states", [])}
+                # Longest names first, so "green gram" is found as moong rather than gram. Lookarounds
+                # rather than \b: Devanagari and Malayalam words may end in a vowel sign, which is not \w
+                names = sorted({name for crop in data["crops"] for name in crop["_names"]}, key=len, reverse=True)
+                data["_pattern"] = re.compile(r"(?<!\w)(" + "|".join(map(re.escape, names)) + r")(?!\w)",
+                                              re.IGNORECASE)
+                data.setdefault("current_year", max(year for crop in data["crops"] for year in crop["msp"]))
+            except Exception as e:
+                # Keep serving the previous table; retry when the file changes again
+                self._signature = signature
+                self._set_error(f"Failed to load MSP data from {self.data_path}: {e}")
+                return
+
+            self._reloads += 1 if self._loaded_at is not None else 0
+            self._data = data
+            self._signature = signature
+            self._loaded_at = datetime.now()
+            self._error = None
+            logger.info(f"MSP data for {data['current_year']} loaded from {self.data_path}")
+
+    def _set_error(self, error: str):
+        if error != self._error:
+            logger.error(error)
+        self._error = error
+
+    @property
+    def current_year(self) -> Optional[str]:
+        self._refresh()
+        return self._data.get("current_year")
+
+    @property
+    def version(self):
+        """Changes whenever a new table is loaded (for caches derived from the table)."""
+        self._refresh()
+        return self._loaded_at
+
+    @property
+    def years(self) -> List[str]:
+        """Years with rates, oldest first."""
+        self._refresh()
+        return sorted({year for crop in self._data["crops"] for year in crop["msp"]})
+
+    def _select(self, crop: Optional[str] = None, state: Optional[str] = None,
+                season: Optional[str] = None) -> List[Dict[str, Any]]:
+        self._refresh()
+        crops = self._data["crops"]
+        if crop:
+            crop = crop.strip().lower()
+            crops = [c for c in crops if any(crop in name for name in c["_names"])]
+        if state:
+            crops = [c for c in crops if state.strip().lower() in c["_states"]]
+        if season:
+            # Crops procured year-round (copra) belong to either season
+            crops = [c for c in crops if c["season"] in (season.lower(), "annual")]
+        return crops
+
+    def rates(self, year: Optional[str] = None, crop: Optional[str] = None, state: Optional[str] = None,
+              season: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        MSP entries for one year.
+
+        Args:
+            year: Marketing season such as '2025-26' (default: the current year)
+            crop: Crop name or alias, matched as a substring ('rice' finds paddy)
+            state: Keep crops mainly grown in this state
+            season: 'kharif' or 'rabi'
+
+        Returns:
+            One dict per crop variety with crop_name, variety, season, msp_rate,
+            unit and increase_from_previous (None without the previous year's rate)
+        """
+        year = year or self.current_year
+        previous = None
+        if year in self.years and self.years.index(year) > 0:
+            previous = self.years[self.years.index(year) - 1]
+
+        entries = []
+        for c in self._select(crop, state, season):
+            rate = c["msp"].get(year)
+            if rate is None:
+                continue
+            prior = c["msp"].get(previous)
+            entries.append({
+                "crop_name": c["name"],
+                "variety": c.get("variety"),
+                "season": c["season"],
+                "msp_rate": rate,
+                "unit": self._data.get("unit", "per quintal"),
+                "increase_from_previous": rate - prior if prior is not None else None,
+            })
+        return entries
+
+    def find(self, text: str, year: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Entries (as in rates()) of the crops named in free text, by name or
+        alias as whole words, in order of mention.
+        """
+        self._refresh()
+        pattern = self._data.get("_pattern")
+        if pattern is None:
+            return []
+        mentioned = list(dict.fromkeys(match.lower() for match in pattern.findall(text)))
+        entries = self.rates(year=year)
+        by_name = {(c["name"], c.get("variety")): c["_names"] for c in self._data["crops"]}
+        return [e for name in mentioned for e in entries if name in by_name[(e["crop_name"], e["variety"])]]
+
+    def prompt_table(self, state: Optional[str] = None, season: Optional[str] = None) -> str:
+        """
+        Current rates as the voice agent's data section, one 'Crop (Variety): rate' line each.
+
+        Only crops of `state` and `season` are listed; if that leaves none (an
+        unknown state), the whole table is.
+        """
+        entries = self.rates(state=state, season=season) or self.rates()
+        lines = [f"{e['crop_name']} ({e['variety']}): {e['msp_rate']}" if e["variety"]
+                 else f"{e['crop_name']}: {e['msp_rate']}" for e in entries]
+        return "\n".join([f"--- MSP Data for {self.current_year} ---", *lines, "--- End of Data ---"])
+
+    def status(self) -> Dict[str, Any]:
+        """Health summary: 'ok', or 'degraded' when no table is loaded or the last load failed."""
+        self._refresh()
+        return {
+            "status": "ok" if self._data["crops"] and self._error is None else "degraded",
+            "data_path": str(self.data_path),
+            "current_year": self._data.get("current_year"),
+            "crops": len(self._data["crops"]),
+            "loaded_at": self._loaded_at.isoformat() if self._loaded_at else None,
+            "reloads": self._reloads,
+            "error": self._error,
+        }
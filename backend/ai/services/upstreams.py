@@ -0,0 +1,153 @@
+"""
+Upstream Client Factories
+
+Single place that decides whether the application talks to the real external
+services (Cerebras, OpenAI, Zilliz, OpenWeatherMap, Deepgram) or to the
+in-process stand-ins from services.local_stubs. The choice comes from the
+"upstreams" section of config/base_config.json, overridable with
+KRISHI_UPSTREAMS=live|stub.
+
+In stub mode every caller in the process shares one StubLLMClient and one
+InMemoryMilvusClient, so call counters cover the whole request path and the
+knowledge base is seeded only once.
+
+Usage:
+    from services.upstreams import create_chat_client
+
+    client = create_chat_client("CEREBRAS_API_KEY")
+"""
+
+import os
+import sys
+import asyncio
+import threading
+from pathlib import Path
+from typing import Optional
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.config_loader import get_upstream_config
+
+KB_DIR = Path(__file__).resolve().parent.parent / "implementations" / "Kb"
+
+_stub_llm_client = None
+_stub_milvus_client = None
+_lock = threading.Lock()
+
+
+def stubs_enabled() -> bool:
+    """True when the upstream mode is 'stub'."""
+    return get_upstream_config()["mode"] == "stub"
+
+
+def get_stub_llm_client():
+    """Process-wide StubLLMClient configured with the stub latencies."""
+    global _stub_llm_client
+    if _stub_llm_client is None:
+        with _lock:
+            if _stub_llm_client is None:
+                from services.local_stubs import StubLLMClient
+
+                latency = get_upstream_config()["stub_latency_ms"]
+                _stub_llm_client = StubLLMClient(
+                    chat_latency_ms=latency["chat"],
+                    embedding_latency_ms=latency["embedding"]
+                )
+    return _stub_llm_client
+
+
+def get_stub_milvus_client():
+    """Process-wide InMemoryMilvusClient configured with the stub search latency."""
+    global _stub_milvus_client
+    if _stub_milvus_client is None:
+        with _lock:
+            if _stub_milvus_client is None:
+                from services.local_stubs import InMemoryMilvusClient
+
+                latency = get_upstream_config()["stub_latency_ms"]
+                _stub_milvus_client = InMemoryMilvusClient(search_latency_ms=latency["vector_search"])
+    return _stub_milvus_client
+
+
+def create_chat_client(api_key_env: str = "CEREBRAS_API_KEY"):
+    """
+    Chat completions client for the configured upstream mode.
+
+    Args:
+        api_key_env: Environment variable holding the Cerebras API key
+
+    Returns:
+        Cerebras client, or the shared StubLLMClient in stub mode
+    """
+    if stubs_enabled():
+        return get_stub_llm_client()
+
+    from cerebras.cloud.sdk import Cerebras
+    return Cerebras(api_key=os.environ.get(api_key_env))
+
+
+def create_stub_voice_agent(response_callback=None, input_sample_rate: int = 48000, think=None,
+                            greeting: Optional[str] = None):
+    """
+    StubVoiceAgent standing in for the Deepgram VoiceAgent, configured with
+    the stub voice latencies.
+
+    Args:
+        response_callback: Coroutine function called with (role, content)
+        input_sample_rate: Sample rate of the linear16 audio passed to send_audio
+        think: Coroutine function answering chat messages with (text, route), or None for the fixed reply
+        greeting: Text spoken after connecting, or None for no greeting
+    """
+    from services.local_stubs import StubVoiceAgent
+
+    latency = get_upstream_config()["stub_latency_ms"]
+    return StubVoiceAgent(response_callback, think_latency_ms=latency["voice"],
+                          chunk_latency_ms=latency["voice_audio_chunk"], uplink_latency_ms=latency["voice_uplink"],
+                          connect_latency_ms=latency["voice_connect"], input_sample_rate=input_sample_rate,
+                          think=think, greeting=greeting, greeting_latency_ms=latency["voice_greeting"])
+
+
+async def fetch_weather_stub(url: str, params: dict):
+    """OpenWeatherMap payload from the stand-in, after the configured stub latency."""
+    from services.local_stubs import stub_openweathermap_response
+
+    latency_ms = get_upstream_config()["stub_latency_ms"]["weather"]
+    if latency_ms:
+        await asyncio.sleep(latency_ms / 1000)
+    return stub_openweathermap_response(url, params)
+
+
+def create_milvus_client(uri: str = None, token: str = None,
+                         collection_name: str = None, embedding_dim: int = 3072):
+    """
+    Milvus client for the configured upstream mode.
+
+    In stub mode the shared in-memory store is returned, and `collection_name`
+    is seeded from the markdown knowledge base on first use (when
+    "stub_seed_knowledge_base" is enabled), embedded the same way the stub
+    embedding model embeds queries.
+
+    Args:
+        uri: Zilliz Cloud URI
+        token: Zilliz Cloud token
+        collection_name: Collection that will be queried
+        embedding_dim: Dimension of the collection's embeddings
+
+    Returns:
+        MilvusClient, or the shared InMemoryMilvusClient in stub mode
+    """
+    if not stubs_enabled():
+        from pymilvus import MilvusClient
+        return MilvusClient(uri=uri, token=token)
+
+    client = get_stub_milvus_client()
+    if collection_name and get_upstream_config()["stub_seed_knowledge_base"]:
+        with _lock:
+            if not client.has_collection(collection_name):
+                from services.embedding_providers import HashingEmbedding
+                from services.local_stubs import seed_collection_from_markdown
+
+                seed_collection_from_markdown(client, collection_name, KB_DIR,
+                                              HashingEmbedding(dimensions=embedding_dim))
+    return client
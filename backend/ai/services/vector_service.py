@@ -27,12 +27,14 @@ from pathlib import Path
 from dotenv import load_dotenv
 from llama_index.core import VectorStoreIndex, Settings
 # from llama_index.vector_stores import MilvusVectorStore
-from llama_index.core.schema import NodeWithScore
-from llama_index.embeddings.openai import OpenAIEmbedding
+from llama_index.core.schema import NodeWithScore, TextNode
 from pymilvus import MilvusClient
 from pymilvus.exceptions import MilvusException
 from llama_index.vector_stores.milvus import MilvusVectorStore
 
+from services.embedding_providers import get_embed_model
+from services.upstreams import create_milvus_client, stubs_enabled
+
 # Suppress verbose logging for performance
 logging.getLogger("httpx").setLevel(logging.WARNING)
 logging.getLogger("openai").setLevel(logging.WARNING)
@@ -55,7 +57,8 @@ class FastVectorRetriever:
     _lock = threading.Lock()
     
     def __init__(self, collection_name: str, embedding_dim: int = 3072, 
-                 similarity_top_k: int = 3):
+                 similarity_top_k: int = 3, embedding_provider: Optional[str] = None,
+                 milvus_client=None):
         """
         Initialize the fast vector retriever with persistent connections.
         
@@ -63,20 +66,29 @@ class FastVectorRetriever:
             collection_name: Name of the Zilliz collection
             embedding_dim: Dimension of the embeddings (default: 3072)
             similarity_top_k: Number of similar documents to retrieve
+            embedding_provider: 'openai', 'local', 'hashing' or 'stub' (default: EMBEDDING_PROVIDER from .env)
+            milvus_client: Stand-in Milvus client to search directly (e.g. InMemoryMilvusClient)
         """
         self.collection_name = collection_name
         self.embedding_dim = embedding_dim
         self.similarity_top_k = similarity_top_k
+        self.embedding_provider = embedding_provider
+        
+        # Stand-in store (injected, or KRISHI_UPSTREAMS=stub): searched through the client
+        # directly instead of the LlamaIndex MilvusVectorStore
+        self._injected_client = milvus_client
+        self._stub_mode = milvus_client is not None or stubs_enabled()
         
         # Get environment variables
         self.zilliz_uri = os.getenv("ZILLIZ_CLOUD_URI")
         self.zilliz_token = os.getenv("ZILLIZ_CLOUD_TOKEN")
         
-        if not self.zilliz_uri or not self.zilliz_token:
+        if not self._stub_mode and (not self.zilliz_uri or not self.zilliz_token):
             raise ValueError("ZILLIZ_CLOUD_URI and ZILLIZ_CLOUD_TOKEN must be set in .env")
         
         # Persistent connections - initialized once
         self.milvus_client = None
+        self.embed_model = None
         self.vector_store = None
         self.index = None
         self.retriever = None
@@ -96,8 +108,10 @@ class FastVectorRetriever:
             if self._connected:
                 return True
                 
-            # Initialize Milvus Client once
-            self.milvus_client = MilvusClient(uri=self.zilliz_uri, token=self.zilliz_token)
+            # Initialize Milvus Client once (shared in-memory store in stub mode)
+            self.milvus_client = self._injected_client or create_milvus_client(
+                self.zilliz_uri, self.zilliz_token, self.collection_name, self.embedding_dim
+            )
             
             # Verify and load collection
             if not self.milvus_client.has_collection(self.collection_name):
@@ -105,17 +119,15 @@ class FastVectorRetriever:
             
             self.milvus_client.load_collection(self.collection_name)
             
-            # Configure embedding model once
-            openai_api_key = os.getenv("OPENAI_API_KEY")
-            if not openai_api_key:
-                raise ValueError("OPENAI_API_KEY must be set in .env")
+            # Pre-initialize embedding model for reuse (provider from EMBEDDING_PROVIDER)
+            provider = self.embedding_provider or ("stub" if self._stub_mode else None)
+            embed_model = get_embed_model(provider, dimensions=self.embedding_dim)
+            self.embed_model = embed_model
             
-            # Pre-initialize embedding model for reuse
-            embed_model = OpenAIEmbedding(
-                model="text-embedding-3-large",
-                dimensions=self.embedding_dim,
-                api_key=openai_api_key
-            )
+            if self._stub_mode:
+                self._connected = True
+                logger.info(f"FastVectorRetriever initialized for {self.collection_name} on a stand-in store")
+                return True
             
             Settings.embed_model = embed_model
             
@@ -128,7 +140,7 @@ class FastVectorRetriever:
             )
             
             # Load index once and keep in memory
-            self.index = VectorStoreIndex.from_vector_store(self.vector_store)
+            self.index = VectorStoreIndex.from_vector_store(self.vector_store, embed_model=embed_model)
             
             # Create persistent retriever
             self.retriever = self.index.as_retriever(similarity_top_k=self.similarity_top_k)
@@ -160,6 +172,9 @@ class FastVectorRetriever:
                 if not self._initialize_connections():
                     raise RuntimeError("Failed to establish connection to Zilliz Cloud")
             
+            if self._stub_mode:
+                return self._search_client(query, top_k or self.similarity_top_k)
+            
             # Use custom top_k if provided, otherwise use persistent retriever
             if top_k and top_k != self.similarity_top_k:
                 retriever = self.index.as_retriever(similarity_top_k=top_k)
@@ -179,6 +194,25 @@ class FastVectorRetriever:
                 return self.search(query, top_k)  # Retry once
             raise
     
+    def _search_client(self, query: str, top_k: int) -> List[NodeWithScore]:
+        """Embed the query and search the Milvus client directly (stand-in stores)."""
+        query_embedding = self.embed_model.get_query_embedding(query)
+        hits = self.milvus_client.search(
+            collection_name=self.collection_name,
+            data=[query_embedding],
+            limit=top_k,
+            output_fields=["text", "metadata"]
+        )[0]
+        
+        return [
+            NodeWithScore(
+                node=TextNode(id_=str(hit["id"]), text=hit["entity"].get("text") or "",
+                              metadata=hit["entity"].get("metadata") or {}),
+                score=hit["distance"]
+            )
+            for hit in hits
+        ]
+    
     def get_collection_stats(self) -> Dict[str, Any]:
         """Get collection statistics."""
         if not self._connected:
@@ -197,7 +231,8 @@ class FastVectorRetriever:
     
     @classmethod
     def get_instance(cls, collection_name: str, embedding_dim: int = 3072, 
-                    similarity_top_k: int = 3) -> 'FastVectorRetriever':
+                    similarity_top_k: int = 3,
+                    embedding_provider: Optional[str] = None) -> 'FastVectorRetriever':
         """
         Get singleton instance for the given collection (connection pooling).
         
@@ -205,16 +240,18 @@ class FastVectorRetriever:
             collection_name: Name of the Zilliz collection
             embedding_dim: Dimension of the embeddings
             similarity_top_k: Number of similar documents to retrieve
+            embedding_provider: 'openai', 'local', 'hashing' or 'stub' (default: EMBEDDING_PROVIDER from .env)
             
         Returns:
             Singleton FastVectorRetriever instance
         """
-        key = f"{collection_name}_{embedding_dim}_{similarity_top_k}"
+        key = f"{collection_name}_{embedding_dim}_{similarity_top_k}_{embedding_provider}"
         
         if key not in cls._instances:
             with cls._lock:
                 if key not in cls._instances:
-                    cls._instances[key] = cls(collection_name, embedding_dim, similarity_top_k)
+                    cls._instances[key] = cls(collection_name, embedding_dim, similarity_top_k,
+                                              embedding_provider)
         
         return cls._instances[key]
 
@@ -282,20 +319,11 @@ class VectorRetriever:
             logger.info(f"Collection '{self.collection_name}' loaded with {entity_count} entities")
             
             # Configure embedding model to match stored embeddings
-            openai_api_key = os.getenv("OPENAI_API_KEY")
-            if not openai_api_key:
-                raise ValueError("OPENAI_API_KEY must be set in .env")
-            
-            # Use text-embedding-3-large with 3072 dimensions to match stored embeddings
-            embed_model = OpenAIEmbedding(
-                model="text-embedding-3-large",
-                dimensions=self.embedding_dim,  # 3072 dimensions
-                api_key=openai_api_key
-            )
+            embed_model = get_embed_model(dimensions=self.embedding_dim)
             
             # Set global embedding model
             Settings.embed_model = embed_model
-            logger.info(f"Configured OpenAI embedding model: text-embedding-3-large with {self.embedding_dim} dimensions")
+            logger.info(f"Configured embedding model: {embed_model.class_name()} with {self.embedding_dim} dimensions")
             
             # Initialize Vector Store
             self.vector_store = MilvusVectorStore(
@@ -401,7 +429,8 @@ class VectorRetriever:
 
 
 def get_fast_retriever(collection_name: str, embedding_dim: int = 3072, 
-                      similarity_top_k: int = 3) -> FastVectorRetriever:
+                      similarity_top_k: int = 3,
+                      embedding_provider: Optional[str] = None) -> FastVectorRetriever:
     """
     Get ultra-fast vector retriever with persistent connections (RECOMMENDED).
     
@@ -412,11 +441,13 @@ def get_fast_retriever(collection_name: str, embedding_dim: int = 3072,
         collection_name: Name of the Zilliz collection
         embedding_dim: Dimension of the embeddings
         similarity_top_k: Number of similar documents to retrieve
+        embedding_provider: 'openai', 'local', 'hashing' or 'stub' (default: EMBEDDING_PROVIDER from .env)
         
     Returns:
         FastVectorRetriever instance with persistent connections
     """
-    return FastVectorRetriever.get_instance(collection_name, embedding_dim, similarity_top_k)
+    return FastVectorRetriever.get_instance(collection_name, embedding_dim, similarity_top_k,
+                                            embedding_provider)
 
 
 def create_vector_retriever(collection_name: str, embedding_dim: int = 3072, 
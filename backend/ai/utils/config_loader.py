@@ -1 +1,64 @@
 # Configuration management and loading utilities
+
+import os
+import json
+from pathlib import Path
+from typing import Any, Dict
+
+CONFIG_DIR = Path(__file__).resolve().parent.parent / "config"
+
+# Simulated latency of each stubbed upstream -> environment variable overriding it
+STUB_LATENCY_ENV = {
+    "chat": "STUB_CHAT_LATENCY_MS",
+    "embedding": "STUB_EMBEDDING_LATENCY_MS",
+    "vector_search": "STUB_VECTOR_SEARCH_LATENCY_MS",
+    "weather": "STUB_WEATHER_LATENCY_MS",
+    "voice": "STUB_VOICE_LATENCY_MS",
+    "voice_audio_chunk": "STUB_VOICE_AUDIO_CHUNK_LATENCY_MS",
+    "voice_uplink": "STUB_VOICE_UPLINK_LATENCY_MS",
+    "voice_connect": "STUB_VOICE_CONNECT_LATENCY_MS",
+    "voice_greeting": "STUB_VOICE_GREETING_LATENCY_MS",
+}
+
+
+def load_config(name: str = "base_config") -> Dict[str, Any]:
+    """
+    Load a JSON configuration file from backend/ai/config.
+
+    Args:
+        name: File name without the .json extension
+
+    Returns:
+        Parsed configuration (empty dict if the file is missing or empty)
+    """
+    path = CONFIG_DIR / f"{name}.json"
+    if not path.exists():
+        return {}
+
+    text = path.read_text(encoding="utf-8").strip()
+    return json.loads(text) if text else {}
+
+
+def get_upstream_config() -> Dict[str, Any]:
+    """
+    Settings for the external services (Cerebras, OpenAI, Zilliz, OpenWeatherMap, Deepgram).
+
+    Values come from the "upstreams" section of base_config.json and can be
+    overridden per process with environment variables:
+        KRISHI_UPSTREAMS=live|stub
+        STUB_CHAT_LATENCY_MS, STUB_EMBEDDING_LATENCY_MS, STUB_VECTOR_SEARCH_LATENCY_MS,
+        STUB_WEATHER_LATENCY_MS, STUB_VOICE_LATENCY_MS, STUB_VOICE_AUDIO_CHUNK_LATENCY_MS,
+        STUB_VOICE_UPLINK_LATENCY_MS, STUB_VOICE_CONNECT_LATENCY_MS
+    """
+    upstreams = load_config("base_config").get("upstreams", {})
+    latency = dict(upstreams.get("stub_latency_ms", {}))
+
+    for key, env_var in STUB_LATENCY_ENV.items():
+        if os.getenv(env_var):
+            latency[key] = float(os.getenv(env_var))
+
+    return {
+        "mode": os.getenv("KRISHI_UPSTREAMS", upstreams.get("mode", "live")).lower(),
+        "stub_latency_ms": {key: float(latency.get(key, 0)) for key in STUB_LATENCY_ENV},
+        "stub_seed_knowledge_base": upstreams.get("stub_seed_knowledge_base", True),
+    }
@@ -0,0 +1,174 @@
+"""
+Batch Crop Recommendation for Krishi Jyoti
+
+Recommends crops for many locations in one pass:
+1. Agricultural weather for every distinct location is fetched concurrently
+   on the shared async HTTP client (bounded by `max_concurrency`)
+2. Model inputs are resolved locally (district soil profiles, agro-climatic
+   zones, see crop_fast_path.py) and stacked into one feature matrix
+3. `predict_proba` runs once on the whole matrix; the per-row top-k is taken
+   with a vectorized argpartition, after masking crops unsuitable for the
+   location's zone
+
+Locations that cannot be resolved are reported individually and do not fail
+the batch. No LLM is called, so a batch costs one weather fetch per distinct
+location and a single model call.
+
+Usage:
+    from Wheather.crop_batch import recommend_for_locations
+
+    results = await recommend_for_locations(["Pune", "Thrissur"], model, top_k=3)
+"""
+
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from .wheatherapi import get_agricultural_weather_async, WeatherAPIError
+from .crop_fast_path import MODEL_FEATURES, AgroClimaticZones, resolve_location_features
+from .soil_profiles import SoilProfileStore
+
+DEFAULT_MAX_CONCURRENCY = 8
+
+logger = logging.getLogger(__name__)
+
+
+async def fetch_weather_concurrently(locations: List[str], max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                                     fetcher: Callable = get_agricultural_weather_async) -> Dict[str, Dict[str, Any]]:
+    """
+    Agricultural weather for each location, fetched concurrently on the shared HTTP client.
+
+    Returns:
+        location -> weather data, or {"error": message} when the fetch failed
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def fetch(location: str):
+        async with semaphore:
+            try:
+                return location, await fetcher(city=location)
+            except WeatherAPIError as e:
+                return location, {"error": str(e)}
+            except Exception as e:
+                logger.warning(f"Weather fetch failed for {location}: {e}")
+                return location, {"error": f"Weather fetch failed: {e}"}
+
+    return dict(await asyncio.gather(*(fetch(location) for location in locations)))
+
+
+def zone_masks(zones: List[Optional[Dict[str, Any]]], classes: List[str]) -> np.ndarray:
+    """
+    Boolean (locations x classes) matrix of zone-suitable crops. Rows without a
+    zone, or whose zone allows none of the model's classes, allow every class.
+    """
+    masks = np.ones((len(zones), len(classes)), dtype=bool)
+    cache: Dict[int, np.ndarray] = {}
+    for row, zone in enumerate(zones):
+        if zone is None:
+            continue
+        if zone["id"] not in cache:
+            suitable = set(zone["crops"])
+            cache[zone["id"]] = np.array([crop in suitable for crop in classes], dtype=bool)
+        if cache[zone["id"]].any():
+            masks[row] = cache[zone["id"]]
+    return masks
+
+
+def top_k_classes(probabilities: np.ndarray, masks: np.ndarray, k: int):
+    """
+    Per-row top-k class indices (best first) and their probabilities, among
+    the classes allowed by `masks`. Disallowed classes are returned with
+    probability -1 only when a row has fewer than k allowed classes.
+    """
+    k = min(k, probabilities.shape[1])
+    scores = np.where(masks, probabilities, -1.0)
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind="stable")
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+async def recommend_for_locations(locations: List[str], model, top_k: int = 3, filter_by_zone: bool = True,
+                                  max_concurrency: int = DEFAULT_MAX_CONCURRENCY) -> List[Dict[str, Any]]:
+    """
+    Crop recommendations for a list of locations.
+
+    Args:
+        locations: Place names (districts, towns or states); duplicates are fetched once
+        model: Fitted classifier with predict_proba and classes_
+        top_k: Number of crops per location
+        filter_by_zone: Only recommend crops suitable for the location's agro-climatic zone
+        max_concurrency: Maximum parallel weather fetches
+
+    Returns:
+        One result per input location, in input order, with status 'ok' or 'failed'
+    """
+    zones = AgroClimaticZones.get_instance()
+    soil_profiles = SoilProfileStore.get_instance()
+
+    names = [location.strip() for location in locations]
+    distinct = list(dict.fromkeys(name for name in names if name))
+    weather = await fetch_weather_concurrently(distinct, max_concurrency)
+
+    resolved: Dict[str, Dict[str, Any]] = {}
+    failures: Dict[str, str] = {}
+    for name in distinct:
+        local = resolve_location_features(name, weather[name], zones, soil_profiles)
+        if local is None:
+            reason = weather[name].get("error")
+            failures[name] = (f"Location not recognised and weather unavailable: {reason}" if reason
+                              else "No soil profile or agro-climatic zone known for this location")
+        else:
+            resolved[name] = local
+
+    # One model call for every resolved location
+    rows = list(resolved)
+    predictions: Dict[str, List[Dict[str, Any]]] = {}
+    if rows:
+        classes = [str(c) for c in model.classes_]
+        features = np.array([[resolved[name]["features"][f] for f in MODEL_FEATURES] for name in rows])
+        probabilities = model.predict_proba(features)
+
+        row_zones = [resolved[name]["zone"] if filter_by_zone else None for name in rows]
+        top, top_probabilities = top_k_classes(probabilities, zone_masks(row_zones, classes), top_k)
+        for i, name in enumerate(rows):
+            predictions[name] = [
+                {"crop": classes[j], "probability": round(float(p), 4)}
+                for j, p in zip(top[i], top_probabilities[i]) if p >= 0
+            ]
+
+    results = []
+    for original, name in zip(locations, names):
+        if name in resolved:
+            local = resolved[name]
+            warnings = []
+            if local["data_source"] == "Zone Normals":
+                warnings.append(f"Weather unavailable ({weather[name]['error']}); used zone climate normals")
+            results.append({
+                "location": original,
+                "status": "ok",
+                "recommendations": predictions[name],
+                "features": local["features"],
+                "data_source": local["data_source"],
+                "agro_climatic_zone": local["zone"]["name"] if local["zone"] else None,
+                "soil_district": local["soil_profile"]["district"] if local["soil_profile"] else None,
+                "soil_source": local["soil_profile"]["source"] if local["soil_profile"] else None,
+                "warnings": warnings,
+                "error": None,
+            })
+        else:
+            results.append({
+                "location": original,
+                "status": "failed",
+                "recommendations": [],
+                "features": None,
+                "data_source": None,
+                "agro_climatic_zone": None,
+                "soil_district": None,
+                "soil_source": None,
+                "warnings": [],
+                "error": failures.get(name, "Empty location"),
+            })
+    return results
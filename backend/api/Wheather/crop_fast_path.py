@@ -0,0 +1,253 @@
+"""
+Crop Recommendation Fast Path for Krishi Jyoti
+
+Local replacements for the small LLM calls in CropChatBot.get_response:
+- classify_intent_locally: rule-based intent and location extraction
+- weather_to_model_features: deterministic mapping of get_agricultural_weather
+  output (plus zone soil defaults) to the ML model's input features
+- AgroClimaticZones.filter_suitable: static crop-suitability check per
+  agro-climatic zone (agro_climatic_zones.json) instead of LLM validation
+- resolve_location_features: all model inputs for a location from the weather
+  data, the district soil profile store and the zone table
+
+Anything these helpers cannot resolve returns None, so the caller can fall
+back to the LLM for that step only.
+
+Usage:
+    from Wheather.crop_fast_path import AgroClimaticZones, classify_intent_locally
+
+    zones = AgroClimaticZones.get_instance()
+    intent = classify_intent_locally("What should I grow in Pune?", zones)
+    zone = zones.resolve(intent["location"])
+"""
+
+import re
+import json
+import math
+import threading
+from pathlib import Path
+from typing import Any, ClassVar, Dict, List, Optional
+
+from .soil_profiles import SoilProfileStore
+
+ZONES_PATH = Path(__file__).resolve().parent / "agro_climatic_zones.json"
+
+# Input columns of the crop recommendation model, in training order
+MODEL_FEATURES = ["N", "P", "K", "temperature", "humidity", "pH", "rainfall"]
+
+# Farther than this from every anchor, a location is not assigned a zone
+MAX_ZONE_DISTANCE_KM = 350.0
+
+GREETING = re.compile(r"^\s*(hi|hello|hey|namaste|namaskar|good (morning|afternoon|evening))\b[\s!.,]*$", re.IGNORECASE)
+RECOMMENDATION_WORDS = re.compile(
+    r"\b(grow|crops?|plant|sow|sowing|cultivat\w*|recommend\w*|suggest\w*|farm\w*|season|kharif|rabi)\b",
+    re.IGNORECASE
+)
+LOCATION_AFTER_PREPOSITION = re.compile(
+    r"\b(?:in|at|for|near|around|from)\s+([A-Z][A-Za-z.'-]*(?:\s+[A-Z][A-Za-z.'-]*)*)"
+)
+# Capitalized words after a preposition that are not places ("for Rabi", "in June")
+NOT_A_PLACE = re.compile(
+    r"(rabi|kharif|zaid|summer|winter|monsoon|spring|autumn|season|next|this|coming|"
+    r"january|february|march|april|may|june|july|august|september|october|november|december)",
+    re.IGNORECASE
+)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 6371.0 * 2 * math.asin(math.sqrt(a))
+
+
+class AgroClimaticZones:
+    """
+    Agro-climatic zone table with lookups by place name and by coordinates.
+    Loaded once per process and read-only afterwards.
+    """
+
+    _instance: ClassVar[Optional['AgroClimaticZones']] = None
+    _lock = threading.Lock()
+
+    def __init__(self, path: Path = ZONES_PATH):
+        self.zones: List[Dict[str, Any]] = json.loads(Path(path).read_text(encoding="utf-8"))["zones"]
+
+        # Lowercase place/state name -> (display name, zone)
+        self.places: Dict[str, tuple] = {}
+        self.anchors: List[tuple] = []  # (lat, lon, zone)
+        for zone in self.zones:
+            for state in zone["states"]:
+                self.places[state.lower()] = (state, zone)
+            for name, (lat, lon) in zone["anchors"].items():
+                self.places[name.lower()] = (name, zone)
+                self.anchors.append((lat, lon, zone))
+
+        # Longest names first so "Sri Ganganagar" wins over shorter overlaps
+        names = sorted(self.places, key=len, reverse=True)
+        self._place_pattern = re.compile(r"\b(" + "|".join(re.escape(n) for n in names) + r")\b", re.IGNORECASE)
+
+    @classmethod
+    def get_instance(cls) -> 'AgroClimaticZones':
+        """Shared zone table for this process."""
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def find_place(self, text: str) -> Optional[str]:
+        """Known place or state mentioned in free text (display name), if any."""
+        match = self._place_pattern.search(text)
+        return self.places[match.group(1).lower()][0] if match else None
+
+    def by_name(self, place: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not place:
+            return None
+        entry = self.places.get(place.strip().lower())
+        return entry[1] if entry else None
+
+    def by_coordinates(self, lat: float, lon: float) -> Optional[Dict[str, Any]]:
+        """Zone of the nearest anchor, if it is within MAX_ZONE_DISTANCE_KM."""
+        best_distance, best_zone = min(((haversine_km(lat, lon, a_lat, a_lon), zone)
+                                        for a_lat, a_lon, zone in self.anchors), key=lambda item: item[0])
+        return best_zone if best_distance <= MAX_ZONE_DISTANCE_KM else None
+
+    def resolve(self, place: Optional[str] = None, lat: float = None, lon: float = None) -> Optional[Dict[str, Any]]:
+        """Zone for a place name, else for coordinates."""
+        zone = self.by_name(place)
+        if zone is None and lat is not None and lon is not None:
+            zone = self.by_coordinates(lat, lon)
+        return zone
+
+    @staticmethod
+    def filter_suitable(zone: Dict[str, Any], ranked_crops: List[str], top_k: int = 3) -> List[str]:
+        """
+        Static validation: keep the model's ranked crops that suit the zone.
+
+        Args:
+            zone: Zone entry from the table
+            ranked_crops: Model classes ordered by predicted probability
+            top_k: Number of crops to return
+
+        Returns:
+            The first `top_k` zone-suitable crops in model order
+        """
+        suitable = set(zone["crops"])
+        return [crop for crop in ranked_crops if crop in suitable][:top_k]
+
+
+def location_after_preposition(message: str) -> Optional[str]:
+    """First capitalized name after a preposition that is not a season, month or recommendation word."""
+    def is_place_word(word):
+        word = word.strip(".'-")
+        return bool(word) and not NOT_A_PLACE.fullmatch(word) and not RECOMMENDATION_WORDS.fullmatch(word)
+
+    for match in LOCATION_AFTER_PREPOSITION.finditer(message):
+        words = match.group(1).split()
+        # "Rabi Season", "Kharif" or "June" alone are skipped; "Pune Kharif" keeps "Pune"
+        while words and not is_place_word(words[0]):
+            words.pop(0)
+        while words and not is_place_word(words[-1]):
+            words.pop()
+        if words:
+            return " ".join(words).strip(" .'-")
+    return None
+
+
+def classify_intent_locally(user_message: str, zones: AgroClimaticZones,
+                            known_crops: Optional[List[str]] = None,
+                            context_city: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Rule-based version of CropChatBot.classify_intent.
+
+    Returns:
+        {"intent", "location", "crop"} like the LLM router, or None when the
+        message asks for a recommendation but no location could be extracted
+        (the caller should then ask the LLM)
+    """
+    message = user_message.strip()
+    if GREETING.match(message):
+        return {"intent": "greeting", "location": None, "crop": None}
+
+    location = zones.find_place(message) or location_after_preposition(message)
+
+    crop = None
+    for name in known_crops or []:
+        if re.search(rf"\b{re.escape(name)}\b", message, re.IGNORECASE):
+            crop = name
+            break
+
+    if crop and context_city and not location:
+        return {"intent": "follow_up_recommendation", "location": None, "crop": crop}
+    if location and (RECOMMENDATION_WORDS.search(message) or zones.by_name(location)):
+        return {"intent": "new_crop_recommendation", "location": location, "crop": crop}
+    if RECOMMENDATION_WORDS.search(message):
+        return None
+    return {"intent": "general_query", "location": None, "crop": None}
+
+
+def weather_to_model_features(agri_weather: Dict[str, Any], soil: Dict[str, float]) -> Dict[str, float]:
+    """
+    Model inputs from get_agricultural_weather output, following the same
+    rules as the LLM parsing prompt: temperature and humidity from
+    'current_conditions', rainfall from 'weekly_outlook.total_precipitation',
+    and soil N, P, K, pH from `soil`.
+    """
+    current = agri_weather["current_conditions"]
+    return {
+        "N": float(soil["N"]),
+        "P": float(soil["P"]),
+        "K": float(soil["K"]),
+        "pH": float(soil["pH"]),
+        "temperature": float(current["temperature"]),
+        "humidity": float(current["humidity"]),
+        "rainfall": float(agri_weather["weekly_outlook"]["total_precipitation"]),
+    }
+
+
+def zone_normals_to_model_features(zone: Dict[str, Any]) -> Dict[str, float]:
+    """Model inputs from the zone's typical soil and climate (used when the weather API fails)."""
+    return {key: float(value) for key, value in {**zone["soil"], **zone["climate"]}.items()}
+
+
+def resolve_location_features(city: str, agri_weather: Dict[str, Any], zones: AgroClimaticZones,
+                              soil_profiles: SoilProfileStore) -> Optional[Dict[str, Any]]:
+    """
+    Model inputs for a location without any LLM call.
+
+    Soil comes from the district soil profile, else the zone's typical values;
+    weather from `agri_weather`, else (when it holds an "error") the zone's
+    climate normals. The zone is resolved from the place name, the weather
+    API's coordinates or the district's state, in that order (coordinates the
+    API returned for the place outrank a state inferred from the soil table).
+
+    Returns:
+        {"features", "zone", "soil_profile", "data_source"}, or None when the
+        location is unknown locally (no zone and no usable soil profile)
+    """
+    soil_profile = soil_profiles.lookup(city)
+    zone = zones.by_name(city)
+    if zone is None:
+        coordinates = agri_weather.get("location", {}).get("coordinates", {})
+        zone = zones.resolve(lat=coordinates.get("lat"), lon=coordinates.get("lon"))
+    if zone is None and soil_profile:
+        zone = zones.by_name(soil_profile["state"])
+
+    if soil_profile:
+        soil = SoilProfileStore.model_inputs(soil_profile)
+    elif zone:
+        soil = zone["soil"]
+    else:
+        return None
+
+    if "error" in agri_weather:
+        if zone is None:
+            return None
+        features = {**zone_normals_to_model_features(zone), **soil}
+        data_source = "Zone Normals"
+    else:
+        features = weather_to_model_features(agri_weather, soil)
+        data_source = "API"
+
+    return {"features": features, "zone": zone, "soil_profile": soil_profile, "data_source": data_source}
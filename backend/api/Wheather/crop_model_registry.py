@@ -0,0 +1,162 @@
+"""
+Crop Model Registry for Krishi Jyoti
+
+Loads the crop recommendation classifier once per process and shares it
+read-only across requests. The pickle file is re-checked at most every
+`check_interval_s` seconds and reloaded when its modification time or size
+changes, so a retrained model can be dropped in without restarting workers.
+
+A missing or unreadable model does not stop the process: the registry reports
+itself as "degraded" and `get()` returns None (or the last good model, if one
+was loaded before) until a valid file appears.
+
+Usage:
+    from Wheather.crop_model_registry import CropModelRegistry
+
+    registry = CropModelRegistry.get_instance()
+    model = registry.get()
+    if model is None:
+        print(registry.status())
+"""
+
+import os
+import time
+import pickle
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import Any, ClassVar, Dict, Optional
+
+DEFAULT_MODEL_PATH = Path(__file__).resolve().parent.parent.parent / "ml" / "models" / "crop_recommendation_model.pkl"
+DEFAULT_CHECK_INTERVAL_S = 5.0
+
+logger = logging.getLogger(__name__)
+
+
+class CropModelUnavailable(Exception):
+    """Raised when a crop recommendation is requested but no model is loaded"""
+    pass
+
+
+class CropModelRegistry:
+    """
+    Process-wide holder of the crop recommendation model with hot reload.
+
+    The model object is never mutated after loading; a reload builds a new
+    object and swaps the reference, so concurrent readers always see a
+    complete model.
+    """
+
+    _instance: ClassVar[Optional['CropModelRegistry']] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, model_path: Optional[Path] = None, check_interval_s: float = DEFAULT_CHECK_INTERVAL_S):
+        """
+        Args:
+            model_path: Pickled classifier (default: CROP_MODEL_PATH from .env, else ml/models)
+            check_interval_s: Minimum seconds between file change checks
+        """
+        self.model_path = Path(model_path or os.getenv("CROP_MODEL_PATH") or DEFAULT_MODEL_PATH)
+        self.check_interval_s = check_interval_s
+
+        self._model = None
+        self._signature = None  # (mtime_ns, size) of the loaded file
+        self._loaded_at: Optional[datetime] = None
+        self._last_check = 0.0
+        self._checked = False
+        self._error: Optional[str] = None
+        self._reloads = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> 'CropModelRegistry':
+        """Shared registry for this process."""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def _file_signature(self):
+        try:
+            stat = self.model_path.stat()
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _refresh(self, force: bool = False):
+        """Reload the model if the file changed since the last load."""
+        now = time.monotonic()
+        if not force and self._checked and now - self._last_check < self.check_interval_s:
+            return
+
+        with self._lock:
+            if not force and self._checked and now - self._last_check < self.check_interval_s:
+                return
+            self._checked = True
+            self._last_check = now
+
+            signature = self._file_signature()
+            if signature is None:
+                self._set_error(f"Model file not found at {self.model_path}")
+                return
+            if signature == self._signature and not force:
+                return
+
+            try:
+                with open(self.model_path, 'rb') as file:
+                    model = pickle.load(file)
+                if not hasattr(model, "predict_proba"):
+                    raise TypeError(f"{type(model).__name__} has no predict_proba")
+            except Exception as e:
+                # Keep serving the previous model (if any); retry when the file changes again
+                self._signature = signature
+                self._set_error(f"Failed to load model from {self.model_path}: {e}")
+                return
+
+            self._reloads += 1 if self._model is not None else 0
+            self._model = model
+            self._signature = signature
+            self._loaded_at = datetime.now()
+            self._error = None
+            logger.info(f"Crop recommendation model loaded from {self.model_path}")
+
+    def _set_error(self, error: str):
+        if error != self._error:
+            logger.error(error)
+        self._error = error
+
+    def get(self) -> Optional[Any]:
+        """Current model, or None when no model could be loaded."""
+        self._refresh()
+        return self._model
+
+    def require(self) -> Any:
+        """Current model; raises CropModelUnavailable when there is none."""
+        model = self.get()
+        if model is None:
+            raise CropModelUnavailable(self._error or "Crop recommendation model is not loaded")
+        return model
+
+    def reload(self) -> bool:
+        """Force a reload from disk. Returns True if a model is available afterwards."""
+        self._refresh(force=True)
+        return self._model is not None
+
+    @property
+    def is_available(self) -> bool:
+        return self.get() is not None
+
+    def status(self) -> Dict[str, Any]:
+        """Health summary: 'ok', or 'degraded' when no model is loaded or the last load failed."""
+        model = self.get()
+        return {
+            "status": "ok" if model is not None and self._error is None else "degraded",
+            "model_loaded": model is not None,
+            "model_path": str(self.model_path),
+            "loaded_at": self._loaded_at.isoformat() if self._loaded_at else None,
+            "reloads": self._reloads,
+            "classes": [str(c) for c in getattr(model, "classes_", [])],
+            "error": self._error,
+        }
@@ -3,7 +3,7 @@ import sys
 import logging
 from pathlib import Path
 import json
-import pickle
+import threading
 import numpy as np
 import re
 from datetime import datetime
@@ -12,18 +12,42 @@ from datetime import datetime
 project_root = Path(__file__).resolve().parent.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
+ai_root = project_root.parent / "ai"
+if str(ai_root) not in sys.path:
+    sys.path.append(str(ai_root))
 
 from dotenv import load_dotenv
-from cerebras.cloud.sdk import Cerebras
+from services.upstreams import create_chat_client
 
 # Ensure this points to your most capable weather function
-from .wheatherapi import get_agricultural_weather
+from .wheatherapi import get_agricultural_weather, WeatherAPIError
+from .crop_model_registry import CropModelRegistry, CropModelUnavailable
+from .crop_fast_path import (
+    MODEL_FEATURES,
+    AgroClimaticZones,
+    classify_intent_locally,
+    resolve_location_features,
+)
+from .soil_profiles import SoilProfileStore
 
 # --- Configuration ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logging.getLogger("httpx").setLevel(logging.WARNING)
 load_dotenv(project_root / '.env')
 
+_llm_client = None
+_llm_client_lock = threading.Lock()
+
+
+def get_shared_llm_client():
+    """Chat client shared by every CropChatBot in this process (created on first use)."""
+    global _llm_client
+    if _llm_client is None:
+        with _llm_client_lock:
+            if _llm_client is None:
+                _llm_client = create_chat_client("CEREBRAS_API_KEY_2")
+    return _llm_client
+
 
 class CropChatBot:
     """
@@ -33,20 +57,23 @@ class CropChatBot:
     This version does not use hardcoded average values.
     """
 
-    def __init__(self):
-        """Initializes the chatbot, loads the ML model, and sets up state."""
+    def __init__(self, llm_client=None, model_registry=None, fast_path=True):
+        """
+        Initializes the chatbot and sets up state. The ML model is shared
+        through the process-wide CropModelRegistry rather than loaded here.
+        `llm_client` defaults to the shared client for the configured upstream
+        (Cerebras, or the stub client). With `fast_path`, intent routing,
+        feature extraction and validation run locally (see crop_fast_path.py)
+        and the LLM is only used for the final report, or for a step the local
+        rules cannot resolve. Soil N, P, K and pH come from the district soil
+        profile store, else the zone's typical values.
+        """
         print("Initializing Krishi Mitra...")
-        self.llm_client = Cerebras(api_key=os.environ.get("CEREBRAS_API_KEY_2"))
-
-        # Corrected file path for the ML model
-        model_path = project_root.parent /"ml" / "models" / "crop_recommendation_model.pkl"
-        try:
-            with open(model_path, 'rb') as file:
-                self.model = pickle.load(file)
-            print("✅ Crop recommendation model loaded successfully!")
-        except FileNotFoundError:
-            print(f"🚨 FATAL ERROR: Model file not found at {model_path}.")
-            exit()
+        self.llm_client = llm_client or get_shared_llm_client()
+        self.model_registry = model_registry or CropModelRegistry.get_instance()
+        self.fast_path = fast_path
+        self.zones = AgroClimaticZones.get_instance() if fast_path else None
+        self.soil_profiles = SoilProfileStore.get_instance() if fast_path else None
 
         self.conversation_state = {}
         self.system_prompt = (
@@ -165,19 +192,33 @@ class CropChatBot:
 
     def get_model_input(self, model_input_dict):
         """Prepares the NumPy array for the ML model."""
-        feature_order = ["N", "P", "K", "temperature", "humidity", "pH", "rainfall"]
-        ordered_values = [model_input_dict[feature] for feature in feature_order]
+        ordered_values = [model_input_dict[feature] for feature in MODEL_FEATURES]
         return np.array([ordered_values])
 
+    def route_intent(self, user_message):
+        """Local intent/location extraction, falling back to the LLM router when it is inconclusive."""
+        if self.fast_path:
+            model = self.model_registry.get()
+            classified_data = classify_intent_locally(
+                user_message, self.zones,
+                known_crops=[str(c) for c in getattr(model, "classes_", [])],
+                context_city=self.conversation_state.get('city')
+            )
+            if classified_data is not None:
+                return classified_data
+        return self.classify_intent(user_message)
+
     def get_response(self, user_message):
         """Main response generator with integrated API fallback and validation."""
-        classified_data = self.classify_intent(user_message)
+        classified_data = self.route_intent(user_message)
         intent = classified_data.get("intent")
 
         if intent == "greeting":
             return "Hello! How can I help you with your farm planning today?"
 
         elif intent == "new_crop_recommendation":
+            # Raises CropModelUnavailable (endpoint degraded) before doing any other work
+            model = self.model_registry.require()
             try:
                 city = classified_data.get("location")
                 if not city or city.lower() == 'unknown':
@@ -186,11 +227,26 @@ class CropChatBot:
                 logging.info(f"Executing new recommendation for: {city}")
                 
                 # Step 1: Try to get real data from the Weather API
-                agri_weather = get_agricultural_weather(city=city)
-                details = {}
-                model_input_data = None
-                
-                if "error" in agri_weather:
+                try:
+                    agri_weather = get_agricultural_weather(city=city)
+                except WeatherAPIError as e:
+                    agri_weather = {"error": str(e)}
+
+                # Local model inputs: district soil profile, agro-climatic zone and weather
+                local = None
+                if self.fast_path:
+                    local = resolve_location_features(city, agri_weather, self.zones, self.soil_profiles)
+                zone = local["zone"] if local else None
+                soil_profile = local["soil_profile"] if local else None
+
+                if local:
+                    model_input_data = local["features"]
+                    if local["data_source"] == "Zone Normals":
+                        logging.warning(f"Weather API failed for {city}. Using {zone['name']} zone normals.")
+                    details = {"city": city, "data_source": local["data_source"], **model_input_data}
+                    if "error" not in agri_weather:
+                        details.update(agri_weather)
+                elif "error" in agri_weather:
                     logging.warning(f"Weather API failed for {city}. Using LLM estimation as fallback.")
                     model_input_data = self.llm_estimate_weather_and_soil(city)
                     details = {"city": city, "data_source": "LLM Estimation", **(model_input_data or {})}
@@ -198,18 +254,28 @@ class CropChatBot:
                     logging.info(f"Weather API successful for {city}.")
                     model_input_data = self.llm_parse_weather_and_soil(city, agri_weather)
                     details = {"city": city, "data_source": "API", **(model_input_data or {}), **agri_weather}
+                if zone:
+                    details["agro_climatic_zone"] = zone["name"]
+                if soil_profile:
+                    label = ("Indicative regional soil estimates" if soil_profile["indicative"]
+                             else "Soil Health Card averages")
+                    details["soil_source"] = (f"{label} for "
+                                              f"{soil_profile['district'] or 'the state'}, {soil_profile['state']}")
 
                 if model_input_data is None:
                     return "I'm sorry, I'm having trouble gathering the necessary data for your location. Please try again later."
                 
                 # Step 2: Get Top 3 Predictions from ML Model
                 model_input_arr = self.get_model_input(model_input_data)
-                probabilities = self.model.predict_proba(model_input_arr)[0]
-                crop_probs = sorted(zip(self.model.classes_, probabilities), key=lambda x: x[1], reverse=True)
+                probabilities = model.predict_proba(model_input_arr)[0]
+                crop_probs = sorted(zip(model.classes_, probabilities), key=lambda x: x[1], reverse=True)
                 ml_top_3_crops = [crop for crop, prob in crop_probs[:3]]
 
-                # Step 3: Validate the Recommendations
-                suitable_crops = self.validate_recommendations(city, ml_top_3_crops)
+                # Step 3: Validate the Recommendations (static zone table, else the LLM)
+                if zone:
+                    suitable_crops = AgroClimaticZones.filter_suitable(zone, [crop for crop, prob in crop_probs])
+                else:
+                    suitable_crops = self.validate_recommendations(city, ml_top_3_crops)
 
                 if not suitable_crops:
                     logging.warning(f"ML recommendations {ml_top_3_crops} rejected for {city}. Using LLM as final fallback.")
@@ -245,6 +311,8 @@ class CropChatBot:
                 print("\n🤖 Assistant: ", end="", flush=True)
                 response = self.get_response(user_input)
                 print(response)
+            except CropModelUnavailable as e:
+                print(f"🚨 Crop recommendations are unavailable: {e}")
             except (KeyboardInterrupt, EOFError):
                 print("\n\n👋 Goodbye!")
                 break
@@ -0,0 +1,480 @@
+"""
+District Weather Advisory Precomputation for Krishi Jyoti
+
+Weather-driven advice (irrigation need, pest/disease risk, frost, weekly
+outlook) for every district we serve is refreshed in the background on a
+fixed cadence instead of per request:
+
+1. Current weather and forecast of every due district (gazetteer seed; no
+   advisory yet or one older than the interval) are fetched through
+   WeatherService with bounded concurrency, within a per-minute and per-day
+   upstream call budget (districts with the oldest advisories go first when
+   the budget is short). After failures the next run backs off, and after
+   the daily budget ran out it waits for the reset
+2. All fetched districts are scored in one vectorized pass (forecast_engine)
+3. The advisories replace the in-memory snapshot in one swap and are saved to
+   SQLite, so a restarted worker serves the last snapshot immediately
+4. New alerts (frost, high pest/disease risk, high irrigation need) can be
+   inserted into the `notifications` table in a single bulk insert
+
+Only one worker per host refreshes: the scheduler that takes the file lock
+next to the SQLite snapshot. The others reload the snapshot every
+ADVISORY_FOLLOWER_POLL_S and take over refreshing if that worker exits.
+
+User-facing endpoints only resolve the place name and read a dict.
+
+Usage:
+    from Wheather.district_advisories import DistrictAdvisoryScheduler
+
+    scheduler = DistrictAdvisoryScheduler.get_instance()
+    scheduler.start()                       # inside a running event loop
+    advisory = scheduler.store.lookup("Thrissur")
+"""
+
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import logging
+import threading
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, ClassVar, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, every scheduler refreshes
+    fcntl = None
+
+from .wheatherapi import WeatherService, get_weather_service
+from .forecast_engine import score_locations
+from .gazetteer import Gazetteer
+
+# Scheduler settings (overridable from .env)
+REFRESH_INTERVAL_S = float(os.getenv("ADVISORY_REFRESH_INTERVAL_S", "10800"))
+MAX_CONCURRENCY = int(os.getenv("ADVISORY_MAX_CONCURRENCY", "4"))
+CALLS_PER_MINUTE = int(os.getenv("ADVISORY_CALLS_PER_MINUTE", "50"))
+DAILY_CALL_BUDGET = int(os.getenv("ADVISORY_DAILY_CALL_BUDGET", "20000"))
+FOLLOWER_POLL_S = float(os.getenv("ADVISORY_FOLLOWER_POLL_S", "300"))
+# Wait after a refresh with failed districts; doubles on each such refresh, up to the refresh interval
+RETRY_MIN_S = float(os.getenv("ADVISORY_RETRY_MIN_S", "60"))
+DEFAULT_SNAPSHOT_PATH = Path(__file__).resolve().parent / "district_advisories.sqlite3"
+
+# Upstream calls per district refresh (current weather + forecast); cached
+# responses cost nothing, so this is an upper bound
+CALLS_PER_DISTRICT = 2
+
+logger = logging.getLogger(__name__)
+
+
+def _enabled(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() not in ("0", "off", "false", "no")
+
+
+def district_key(name: str) -> str:
+    return name.strip().lower()
+
+
+class CallBudget:
+    """
+    Upstream call budget: a per-minute token bucket plus a daily cap (UTC day).
+    """
+
+    def __init__(self, calls_per_minute: int = CALLS_PER_MINUTE, calls_per_day: int = DAILY_CALL_BUDGET):
+        self.calls_per_minute = calls_per_minute
+        self.calls_per_day = calls_per_day
+        self._tokens = float(calls_per_minute)
+        self._refilled_at = time.monotonic()
+        self._day = datetime.now(timezone.utc).date()
+        self._used_today = 0
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.calls_per_minute,
+                           self._tokens + (now - self._refilled_at) * self.calls_per_minute / 60)
+        self._refilled_at = now
+        today = datetime.now(timezone.utc).date()
+        if today != self._day:
+            self._day, self._used_today = today, 0
+
+    @property
+    def remaining_today(self) -> int:
+        return max(0, self.calls_per_day - self._used_today)
+
+    def seconds_until_reset(self) -> float:
+        """Seconds until the daily cap resets (next UTC midnight)."""
+        now = datetime.now(timezone.utc)
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+        return (midnight - now).total_seconds()
+
+    async def acquire(self, calls: int) -> bool:
+        """
+        Wait until `calls` fit in the per-minute rate.
+
+        Returns:
+            False (without waiting) when the daily budget cannot cover them
+        """
+        async with self._lock:
+            self._refill()
+            if self._used_today + calls > self.calls_per_day:
+                return False
+            while self._tokens < calls:
+                await asyncio.sleep((calls - self._tokens) * 60 / self.calls_per_minute)
+                self._refill()
+            self._tokens -= calls
+            self._used_today += calls
+            return True
+
+    def status(self) -> Dict[str, Any]:
+        return {"calls_per_minute": self.calls_per_minute, "calls_per_day": self.calls_per_day,
+                "used_today": self._used_today, "remaining_today": self.remaining_today}
+
+
+class AdvisoryStore:
+    """
+    Current advisory per district: an in-memory dict replaced as a whole on
+    each refresh, backed by a SQLite snapshot.
+    """
+
+    def __init__(self, snapshot_path: Optional[Path] = None, gazetteer: Optional[Gazetteer] = None):
+        """
+        Args:
+            snapshot_path: SQLite file (default: ADVISORY_SNAPSHOT_PATH from .env,
+                else next to this module); ":memory:" keeps nothing on disk
+            gazetteer: Resolves user-typed place names to district names
+        """
+        self.snapshot_path = str(snapshot_path or os.getenv("ADVISORY_SNAPSHOT_PATH") or DEFAULT_SNAPSHOT_PATH)
+        self.gazetteer = gazetteer or Gazetteer.get_instance()
+        self._advisories: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.snapshot_path)
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS district_advisories ("
+            "district_key TEXT PRIMARY KEY, payload TEXT NOT NULL, updated_at TEXT NOT NULL)"
+        )
+        return connection
+
+    def load(self) -> int:
+        """Load the last saved snapshot into memory. Returns the number of districts."""
+        if self.snapshot_path == ":memory:":
+            return 0
+        try:
+            with closing(self._connect()) as connection:
+                rows = connection.execute("SELECT district_key, payload FROM district_advisories").fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not load advisory snapshot from {self.snapshot_path}: {e}")
+            return 0
+        self._advisories = {key: json.loads(payload) for key, payload in rows}
+        return len(self._advisories)
+
+    def update(self, advisories: Dict[str, Dict[str, Any]]):
+        """Merge refreshed advisories into the snapshot (one swap) and save them."""
+        with self._lock:
+            self._advisories = {**self._advisories, **advisories}
+        if self.snapshot_path == ":memory:" or not advisories:
+            return
+        try:
+            with closing(self._connect()) as connection, connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO district_advisories (district_key, payload, updated_at) VALUES (?, ?, ?)",
+                    [(key, json.dumps(advisory), advisory["updated_at"]) for key, advisory in advisories.items()]
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Could not save advisory snapshot to {self.snapshot_path}: {e}")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._advisories.get(key)
+
+    def lookup(self, place: str) -> Optional[Dict[str, Any]]:
+        """
+        Advisory for a district, alias or native-script name; None for any
+        other name (partial names are not matched) or if not precomputed.
+        """
+        advisory = self._advisories.get(district_key(place))
+        if advisory is None:
+            resolved = self.gazetteer.lookup(place)
+            advisory = self._advisories.get(district_key(resolved["name"])) if resolved else None
+        return advisory
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        """District, state, update time and alert count of every advisory."""
+        return [
+            {"district": a["district"], "state": a["state"], "updated_at": a["updated_at"], "alerts": len(a["alerts"])}
+            for a in self._advisories.values()
+        ]
+
+    def __len__(self) -> int:
+        return len(self._advisories)
+
+
+def advisory_alerts(advisory: Dict[str, Any]) -> List[Dict[str, str]]:
+    """Notification-worthy alerts of an advisory, as notifications table rows (without ids)."""
+    district = advisory["district"]
+    conditions = advisory["farming_conditions"]
+    alerts = []
+    if conditions["frost_risk"]["has_risk"]:
+        days = ", ".join(f"{d['date']} ({d['min_temp']:.1f}°C)" for d in conditions["frost_risk"]["risk_days"])
+        alerts.append({"title": f"Frost warning for {district}",
+                       "message": f"Frost risk expected on {days}. Protect nurseries and irrigate lightly in the evening.",
+                       "notification_type": "alert"})
+    if conditions["pest_risk"] == "High":
+        alerts.append({"title": f"High pest risk in {district}",
+                       "message": "Warm, humid conditions favour pests. Scout fields and set traps before spraying.",
+                       "notification_type": "warning"})
+    if conditions["disease_risk"] == "High":
+        alerts.append({"title": f"High disease risk in {district}",
+                       "message": "High humidity with rain favours fungal disease. Avoid overhead irrigation and check crops for spots or rot.",
+                       "notification_type": "warning"})
+    if conditions["irrigation_needed"]["level"] == "High":
+        alerts.append({"title": f"Irrigation needed in {district}",
+                       "message": "Little rain is expected over the next 3 days. Plan irrigation for early morning or evening.",
+                       "notification_type": "info"})
+    return alerts
+
+
+def supabase_notification_sink(rows: List[Dict[str, Any]]):
+    """Insert notification rows into the `notifications` table in one request."""
+    from database.connection import db
+
+    db.get_client(admin=True).table("notifications").insert(rows).execute()
+
+
+class DistrictAdvisoryScheduler:
+    """
+    Background task that refreshes every district's advisory on a fixed cadence.
+    """
+
+    _instance: ClassVar[Optional['DistrictAdvisoryScheduler']] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, districts: Optional[List[Dict[str, Any]]] = None, store: Optional[AdvisoryStore] = None,
+                 service: Optional[WeatherService] = None, budget: Optional[CallBudget] = None,
+                 interval_s: float = REFRESH_INTERVAL_S, max_concurrency: int = MAX_CONCURRENCY,
+                 notification_sink: Optional[Callable[[List[Dict[str, Any]]], None]] = None):
+        """
+        Args:
+            districts: {"name", "state", "lat", "lon"} per district (default: the gazetteer seed)
+            store: Where advisories are kept (default: SQLite-backed AdvisoryStore)
+            service: WeatherService to fetch with (default: the shared one, created on first refresh)
+            budget: Upstream call budget
+            interval_s: Seconds between refreshes
+            max_concurrency: Maximum districts fetched in parallel
+            notification_sink: Called with new alert rows after each refresh
+                (default: the notifications table when ADVISORY_NOTIFICATIONS=on)
+        """
+        self.districts = districts or [p for p in Gazetteer.get_instance().places if p["source"] == "seed"]
+        self.store = store if store is not None else AdvisoryStore()
+        self._service = service
+        self.budget = budget or CallBudget()
+        self.interval_s = interval_s
+        self.max_concurrency = max_concurrency
+        if notification_sink is None and _enabled("ADVISORY_NOTIFICATIONS", "off"):
+            notification_sink = supabase_notification_sink
+        self.notification_sink = notification_sink
+
+        self._task: Optional[asyncio.Task] = None
+        self._runner_lock = None
+        self._retries = 0
+        self._next_refresh_in_s: Optional[float] = None
+        self._last_run: Dict[str, Any] = {}
+        self._refreshing = False
+
+    @classmethod
+    def get_instance(cls) -> 'DistrictAdvisoryScheduler':
+        """Shared scheduler for this process."""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    @property
+    def service(self) -> WeatherService:
+        return self._service or get_weather_service()
+
+    def start(self):
+        """Load the saved snapshot and start refreshing on the running event loop."""
+        if self._task is not None and not self._task.done():
+            return
+        loaded = self.store.load()
+        logger.info(f"Loaded {loaded} district advisories from {self.store.snapshot_path}")
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._runner_lock is not None:
+            # Closing the file releases the lock for another worker
+            self._runner_lock.close()
+            self._runner_lock = None
+
+    def _acquire_runner_lock(self) -> bool:
+        """Take the refresh lock next to the snapshot; False while another worker holds it."""
+        if self._runner_lock is not None or fcntl is None or self.store.snapshot_path == ":memory:":
+            return True
+        lock_file = open(f"{self.store.snapshot_path}.lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._runner_lock = lock_file
+        return True
+
+    def _age_s(self, district: Dict[str, Any], now: datetime) -> float:
+        """Age of a district's advisory in seconds (infinite when it has none)."""
+        advisory = self.store.get(district_key(district["name"]))
+        if advisory is None:
+            return float("inf")
+        return (now - datetime.fromisoformat(advisory["updated_at"])).total_seconds()
+
+    def _seconds_until_due(self) -> float:
+        """0 when any district has no advisory or one older than the interval."""
+        if not self.districts:
+            return self.interval_s
+        now = datetime.now(timezone.utc)
+        oldest_age = max(self._age_s(district, now) for district in self.districts)
+        return max(0.0, self.interval_s - oldest_age)
+
+    def _next_delay(self, run: Optional[Dict[str, Any]]) -> float:
+        """
+        Seconds until the next refresh. After a run with failed districts (or
+        one that raised) the wait backs off from RETRY_MIN_S, so a district that
+        keeps failing is not retried back to back; after districts were skipped
+        for the daily budget, it lasts until the budget resets.
+        """
+        delay = self._seconds_until_due()
+        if run is None or run.get("failed") or run.get("skipped_quota"):
+            self._retries += 1
+            delay = max(delay, min(self.interval_s, RETRY_MIN_S * 2 ** (self._retries - 1)))
+            if run and run.get("skipped_quota"):
+                delay = max(delay, self.budget.seconds_until_reset())
+        else:
+            self._retries = 0
+        return delay
+
+    async def _run(self):
+        while not self._acquire_runner_lock():
+            # Another worker refreshes and pushes notifications; serve its saved snapshot
+            await asyncio.sleep(FOLLOWER_POLL_S)
+            await asyncio.to_thread(self.store.load)
+        logger.info("This worker refreshes the district advisories")
+        self._next_refresh_in_s = self._seconds_until_due()
+        while True:
+            await asyncio.sleep(self._next_refresh_in_s)
+            run = None
+            try:
+                run = await self.refresh()
+            except Exception as e:
+                logger.error(f"District advisory refresh failed: {e}")
+            self._next_refresh_in_s = self._next_delay(run)
+
+    def _due_districts(self) -> List[Dict[str, Any]]:
+        """Districts without an advisory or with one older than the interval, oldest first."""
+        now = datetime.now(timezone.utc)
+        ages = [(self._age_s(district, now), district) for district in self.districts]
+        return [district for age, district in sorted(ages, key=lambda item: -item[0]) if age >= self.interval_s]
+
+    async def refresh(self) -> Dict[str, Any]:
+        """
+        Refresh every district that is due (no advisory yet, or one older than
+        the interval) once, within the call budget.
+
+        Returns:
+            Run summary: refreshed / failed / skipped_quota counts, duration, alerts pushed
+        """
+        if self._refreshing:
+            return self._last_run
+        self._refreshing = True
+        started = time.monotonic()
+        try:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            skipped = 0
+
+            async def fetch(district):
+                nonlocal skipped
+                if not await self.budget.acquire(CALLS_PER_DISTRICT):
+                    skipped += 1
+                    return district, None
+                async with semaphore:
+                    try:
+                        return district, await self.service.get_weather_snapshot(lat=district["lat"], lon=district["lon"])
+                    except Exception as e:
+                        logger.warning(f"Advisory fetch failed for {district['name']}: {e}")
+                    return district, None
+
+            fetched = await asyncio.gather(*(fetch(d) for d in self._due_districts()))
+            ok = [(district, snapshot) for district, snapshot in fetched if snapshot is not None]
+
+            advisories: Dict[str, Dict[str, Any]] = {}
+            if ok:
+                # One vectorized scoring pass for every fetched district
+                assessments = score_locations([s["current"] for _, s in ok], [s["forecast_data"] for _, s in ok])
+                updated_at = datetime.now(timezone.utc).isoformat()
+                for (district, snapshot), assessment in zip(ok, assessments):
+                    advisory = self.service.build_agricultural_weather(snapshot, assessment)
+                    advisory.update({"district": district["name"], "state": district["state"], "updated_at": updated_at})
+                    advisory["alerts"] = advisory_alerts(advisory)
+                    advisories[district_key(district["name"])] = advisory
+
+            new_alerts = self._new_alerts(advisories)
+            await asyncio.to_thread(self.store.update, advisories)
+            pushed = await self._push_notifications(new_alerts)
+
+            self._last_run = {
+                "finished_at": datetime.now(timezone.utc).isoformat(),
+                "duration_s": round(time.monotonic() - started, 2),
+                "refreshed": len(advisories),
+                "failed": len(fetched) - len(ok) - skipped,
+                "skipped_quota": skipped,
+                "notifications_pushed": pushed,
+            }
+            logger.info(f"District advisories refreshed: {self._last_run}")
+            return self._last_run
+        finally:
+            self._refreshing = False
+
+    def _new_alerts(self, advisories: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Alerts not already active for the same district in the previous snapshot."""
+        rows = []
+        for key, advisory in advisories.items():
+            previous = self.store.get(key)
+            active = {a["title"] for a in previous["alerts"]} if previous else set()
+            rows.extend({**alert, "farmer_phone": None} for alert in advisory["alerts"]
+                        if alert["title"] not in active)
+        return rows
+
+    async def _push_notifications(self, rows: List[Dict[str, Any]]) -> int:
+        if not rows or self.notification_sink is None:
+            return 0
+        try:
+            await asyncio.to_thread(self.notification_sink, rows)
+            return len(rows)
+        except Exception as e:
+            logger.warning(f"Could not push {len(rows)} advisory notifications: {e}")
+            return 0
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "runner": self._runner_lock is not None,
+            "next_refresh_in_s": self._next_refresh_in_s,
+            "refreshing": self._refreshing,
+            "districts": len(self.districts),
+            "advisories": len(self.store),
+            "interval_s": self.interval_s,
+            "max_concurrency": self.max_concurrency,
+            "notifications": self.notification_sink is not None,
+            "budget": self.budget.status(),
+            "last_run": self._last_run,
+        }
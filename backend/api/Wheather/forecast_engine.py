@@ -0,0 +1,259 @@
+"""
+Vectorized Agro-weather Risk Engine for Krishi Jyoti
+
+Turns OpenWeatherMap 5 day / 3 hour forecasts into columnar NumPy arrays once
+and derives every agricultural indicator from them in whole-array passes:
+
+1. Each forecast's 3-hourly steps are placed on a (locations x days x 8) grid
+   by local calendar day and 3-hour slot
+2. Daily min/max/mean temperature, mean humidity and total precipitation are
+   reductions over the slot axis
+3. Frost risk, optimal activity days, the weekly outlook, irrigation need and
+   pest/disease risk are boolean/array expressions over those daily arrays
+   (plus the current conditions of each location)
+
+The thresholds are the ones WeatherService has always used. One location is
+just a batch of one, so district-wide advisories score hundreds of
+locations with the same handful of array operations.
+
+Usage:
+    from Wheather.forecast_engine import ForecastBatch, score_locations
+
+    batch = ForecastBatch([raw_forecast_a, raw_forecast_b], days=5)
+    batch.daily_forecasts(0)          # formatted days of the first location
+    score_locations(currents, [raw_forecast_a, raw_forecast_b])
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+STEP_S = 3 * 3600
+STEPS_PER_DAY = 8
+DAY_S = 24 * 3600
+
+# Days looked at for irrigation need and optimal activity times
+SHORT_HORIZON_DAYS = 3
+
+
+def _local_offset_s(timestamp: int) -> int:
+    """UTC offset of the server's local time at `timestamp` (forecast days follow local dates)."""
+    return int(datetime.fromtimestamp(timestamp).astimezone().utcoffset().total_seconds())
+
+
+def _step_precipitation(item: Dict) -> float:
+    return item.get('rain', {}).get('3h', 0) + item.get('snow', {}).get('3h', 0)
+
+
+class ForecastBatch:
+    """
+    Daily forecast arrays for one or more locations.
+
+    Attributes (all shaped locations x days; days without data are NaN / False):
+        day_valid, temp_min, temp_max, temp_avg, humidity_avg, precipitation_total
+    """
+
+    def __init__(self, forecasts: List[Dict], days: int = 5):
+        """
+        Args:
+            forecasts: Raw OpenWeatherMap /forecast payloads, one per location
+            days: Number of days of 3-hourly steps to use from each payload
+        """
+        self.items = [forecast['list'][:days * STEPS_PER_DAY] for forecast in forecasts]
+        locations = len(self.items)
+        max_steps = max((len(items) for items in self.items), default=0)
+
+        # The only per-item Python pass: JSON -> (locations x steps x [dt, temp, humidity, precipitation])
+        raw = np.full((locations, max_steps, 4), np.nan)
+        for row, items in enumerate(self.items):
+            if items:
+                raw[row, :len(items)] = [
+                    (item['dt'], item['main']['temp'], item['main']['humidity'], _step_precipitation(item))
+                    for item in items
+                ]
+        present = ~np.isnan(raw[..., 0])
+
+        offsets = np.array([_local_offset_s(items[0]['dt']) if items else 0 for items in self.items],
+                           dtype=np.int64)[:, None]
+        local_time = np.where(present, raw[..., 0], 0).astype(np.int64) + offsets
+        day_number = local_time // DAY_S
+        self.first_day = day_number[:, 0] if max_steps else np.zeros(locations, dtype=np.int64)
+        day_index = np.where(present, day_number - self.first_day[:, None], 0)
+        slot = (local_time % DAY_S) // STEP_S
+
+        n_days = int(day_index.max()) + 1 if present.any() else 0
+        grid_shape = (locations, n_days, STEPS_PER_DAY)
+        rows = np.broadcast_to(np.arange(locations)[:, None], present.shape)
+        cells = (rows[present], day_index[present], slot[present])
+
+        def to_grid(values: np.ndarray) -> np.ndarray:
+            grid = np.full(grid_shape, np.nan)
+            grid[cells] = values[present]
+            return grid
+
+        temperature = to_grid(raw[..., 1])
+        humidity = to_grid(raw[..., 2])
+        precipitation = to_grid(raw[..., 3])
+
+        # Index of each day's first step (max_steps where a slot is empty)
+        steps = np.full(grid_shape, max_steps)
+        steps[cells] = np.broadcast_to(np.arange(max_steps), present.shape)[present]
+        self.first_step = steps.min(axis=2)
+
+        counts = (~np.isnan(temperature)).sum(axis=2)
+        self.day_valid = counts > 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.temp_min = np.fmin.reduce(temperature, axis=2)
+            self.temp_max = np.fmax.reduce(temperature, axis=2)
+            self.temp_avg = np.nansum(temperature, axis=2) / counts
+            self.humidity_avg = np.nansum(humidity, axis=2) / counts
+        self.precipitation_total = np.where(self.day_valid, np.nansum(precipitation, axis=2), np.nan)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def _date(self, row: int, day: int) -> str:
+        return str(np.datetime64(int(self.first_day[row] + day), 'D'))
+
+    def _valid_days(self, row: int) -> np.ndarray:
+        return np.flatnonzero(self.day_valid[row])
+
+    def daily_forecasts(self, row: int) -> List[Dict[str, Any]]:
+        """Daily summaries of one location, in the WeatherService forecast format."""
+        return [
+            {
+                'date': self._date(row, day),
+                'temperature': {
+                    'min': float(self.temp_min[row, day]),
+                    'max': float(self.temp_max[row, day]),
+                    'avg': float(self.temp_avg[row, day])
+                },
+                'humidity_avg': float(self.humidity_avg[row, day]),
+                'precipitation_total': float(self.precipitation_total[row, day]),
+                'weather': self.items[row][self.first_step[row, day]]['weather'][0]  # First condition of the day
+            }
+            for day in self._valid_days(row)
+        ]
+
+    def frost_risk(self) -> List[Dict[str, Any]]:
+        """Days with a minimum of 2°C or below ('High' at 0°C or below), per location."""
+        at_risk = self.day_valid & (self.temp_min <= 2)
+        results = []
+        for row in range(len(self)):
+            risk_days = [
+                {
+                    'date': self._date(row, day),
+                    'min_temp': float(self.temp_min[row, day]),
+                    'risk_level': 'High' if self.temp_min[row, day] <= 0 else 'Medium'
+                }
+                for day in np.flatnonzero(at_risk[row])
+            ]
+            results.append({'has_risk': bool(risk_days), 'risk_days': risk_days})
+        return results
+
+    def optimal_activity_days(self, horizon_days: int = SHORT_HORIZON_DAYS) -> List[List[str]]:
+        """Dates in the first `horizon_days` with moderate temperatures and no rain, per location."""
+        window = slice(0, horizon_days)
+        with np.errstate(invalid='ignore'):
+            optimal = (self.day_valid[:, window]
+                       & (self.temp_max[:, window] >= 15) & (self.temp_max[:, window] <= 28)
+                       & (self.temp_min[:, window] > 5) & (self.precipitation_total[:, window] < 1))
+        return [[self._date(row, day) for day in np.flatnonzero(optimal[row])] for row in range(len(self))]
+
+    def short_horizon_precipitation(self, horizon_days: int = SHORT_HORIZON_DAYS) -> np.ndarray:
+        """Total precipitation over the first `horizon_days` days, per location."""
+        return np.nansum(self.precipitation_total[:, :horizon_days], axis=1)
+
+    def weekly_outlook(self) -> List[Dict[str, Any]]:
+        """Mean daily temperature/humidity, total precipitation and planting/harvest suitability, per location."""
+        n_days = self.day_valid.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            avg_temp = np.nansum(self.temp_avg, axis=1) / n_days
+            avg_humidity = np.nansum(self.humidity_avg, axis=1) / n_days
+        total_precipitation = np.nansum(self.precipitation_total, axis=1)
+
+        suitable_for_planting = (avg_temp >= 15) & (avg_temp <= 30) & (total_precipitation > 5)
+        suitable_for_harvesting = (total_precipitation < 10) & (avg_humidity < 80)
+        return [
+            {
+                'average_temperature': round(float(avg_temp[row]), 1),
+                'total_precipitation': round(float(total_precipitation[row]), 1),
+                'average_humidity': round(float(avg_humidity[row]), 1),
+                'suitable_for_planting': bool(suitable_for_planting[row]),
+                'suitable_for_harvesting': bool(suitable_for_harvesting[row])
+            }
+            for row in range(len(self))
+        ]
+
+
+def assess_farming_conditions(currents: List[Dict], batch: ForecastBatch) -> List[Dict[str, Any]]:
+    """
+    Irrigation need, pest/disease/frost risk and optimal activity days for
+    every location of a batch.
+
+    Args:
+        currents: Formatted current weather per location (WeatherService format)
+        batch: Forecasts of the same locations, in the same order
+
+    Returns:
+        One 'farming_conditions' dict per location
+    """
+    temperature = np.array([current['temperature'] for current in currents], dtype=float)
+    humidity = np.array([current['humidity'] for current in currents], dtype=float)
+    recent_precipitation = np.array([current.get('precipitation', 0) for current in currents], dtype=float)
+    forecast_precipitation = batch.short_horizon_precipitation()
+
+    irrigation_score = (2 * (recent_precipitation < 2)      # Less than 2mm in last hour
+                        + 3 * (forecast_precipitation < 5)  # Less than 5mm expected in next 3 days
+                        + 2 * (humidity < 40)               # Low humidity
+                        + 2 * (temperature > 30))           # High temperature
+    irrigation_level = np.select([irrigation_score >= 6, irrigation_score >= 4], ['High', 'Medium'], 'Low')
+
+    # High temperature and humidity favor pests; high humidity and rain favor disease
+    pest_risk = np.select([(temperature > 25) & (humidity > 70), (temperature > 20) & (humidity > 60)],
+                          ['High', 'Medium'], 'Low')
+    disease_risk = np.select([(humidity > 80) & (recent_precipitation > 1), humidity > 70],
+                             ['High', 'Medium'], 'Low')
+
+    frost = batch.frost_risk()
+    optimal_days = batch.optimal_activity_days()
+    return [
+        {
+            'irrigation_needed': {
+                'level': str(irrigation_level[row]),
+                'score': int(irrigation_score[row]),
+                'factors': {
+                    'recent_precipitation': currents[row].get('precipitation', 0),
+                    'forecast_precipitation': float(forecast_precipitation[row]),
+                    'humidity': currents[row]['humidity'],
+                    'temperature': currents[row]['temperature']
+                }
+            },
+            'pest_risk': str(pest_risk[row]),
+            'disease_risk': str(disease_risk[row]),
+            'optimal_activity_time': optimal_days[row],
+            'frost_risk': frost[row]
+        }
+        for row in range(len(currents))
+    ]
+
+
+def score_locations(currents: List[Dict], forecasts: List[Dict], days: int = 5,
+                    batch: Optional[ForecastBatch] = None) -> List[Dict[str, Any]]:
+    """
+    Farming conditions and weekly outlook for many locations in one batch.
+
+    Args:
+        currents: Formatted current weather per location
+        forecasts: Raw /forecast payloads of the same locations
+        days: Forecast days to use
+        batch: Already built ForecastBatch of `forecasts` (skips rebuilding it)
+
+    Returns:
+        {'farming_conditions', 'weekly_outlook'} per location, in input order
+    """
+    batch = batch or ForecastBatch(forecasts, days)
+    conditions = assess_farming_conditions(currents, batch)
+    outlooks = batch.weekly_outlook()
+    return [{'farming_conditions': c, 'weekly_outlook': o} for c, o in zip(conditions, outlooks)]
@@ -0,0 +1,241 @@
+"""
+Offline Gazetteer for Krishi Jyoti
+
+Resolves the district and town names our users type to coordinates without
+calling the OpenWeatherMap geo API. The seed index (gazetteer.csv) holds the
+headquarters of every district we serve with English aliases and Hindi and
+Malayalam spellings; places the geo API resolves later are written back to
+gazetteer_learned.csv and indexed on the fly.
+
+Every name is indexed under a phonetic key that folds common romanization
+variants of Indian names (Trichur/Thrissur style aspirates, aa/ee/oo, w/v,
+c/k, doubled letters) and, for native scripts, Unicode variants (Malayalam
+chillu letters, Devanagari nukta). lookup() accepts exact key hits only: a
+prefix or close spelling of a known district is often another real place
+(Patan is not Pathanamthitta), so those names go to the geo API. Prefix and
+fuzzy matches over the sorted key list are offered as suggestions by
+complete(); all of it is in-memory and the fuzzy results are cached.
+
+Usage:
+    from Wheather.gazetteer import Gazetteer
+
+    gazetteer = Gazetteer.get_instance()
+    place = gazetteer.lookup("തൃശ്ശൂർ")      # -> Thrissur, Kerala
+    gazetteer.lookup("Patan")                # -> None (not a district we index)
+    gazetteer.complete("kozhi")              # -> [Kozhikode ...]
+"""
+
+import os
+import re
+import csv
+import bisect
+import difflib
+import logging
+import threading
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, ClassVar, Dict, List, Optional
+
+from .soil_profiles import normalize_place
+
+SEED_PATH = Path(__file__).resolve().parent / "gazetteer.csv"
+DEFAULT_LEARNED_PATH = Path(__file__).resolve().parent / "gazetteer_learned.csv"
+COLUMNS = ["name", "state", "lat", "lon", "aliases", "native_names"]
+
+# Minimum difflib similarity between phonetic keys for a fuzzy match
+FUZZY_CUTOFF = 0.85
+
+# Romanization variants folded together, applied in order
+LATIN_FOLDS = [
+    (re.compile(r"ph"), "f"),
+    (re.compile(r"chh?"), "C"),
+    (re.compile(r"c"), "k"),
+    (re.compile(r"C"), "c"),
+    (re.compile(r"([kgtdpbjs])h"), r"\1"),
+    (re.compile(r"ee|ii"), "i"),
+    (re.compile(r"oo|uu"), "u"),
+    (re.compile(r"w"), "v"),
+    (re.compile(r"q"), "k"),
+    (re.compile(r"z"), "j"),
+    (re.compile(r"y$"), "i"),
+    (re.compile(r"(.)\1+"), r"\1"),
+]
+
+# Malayalam chillu letters and their explicit virama spellings
+CHILLU = str.maketrans({"ൺ": "ണ്", "ൻ": "ന്", "ർ": "ര്", "ൽ": "ല്", "ൾ": "ള്", "ൿ": "ക്"})
+DEVANAGARI_NUKTA = "़"
+DEVANAGARI_CHANDRABINDU = ("ँ", "ं")
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=16384)
+def phonetic_key(name: str) -> str:
+    """
+    Index key for a place name: romanization variants folded for Latin
+    script, Unicode variants folded for Devanagari and Malayalam.
+    """
+    if not name:
+        return ""
+    if all(ord(ch) < 128 for ch in name):
+        key = normalize_place(name).replace(" ", "")
+        for pattern, replacement in LATIN_FOLDS:
+            key = pattern.sub(replacement, key)
+        return key
+
+    name = unicodedata.normalize("NFC", name).translate(CHILLU)
+    name = name.replace(DEVANAGARI_NUKTA, "").replace(*DEVANAGARI_CHANDRABINDU)
+    # Keep letters and combining marks only (drops spaces, punctuation and ZWJ/ZWNJ)
+    return "".join(ch for ch in name if unicodedata.category(ch)[0] in ("L", "M")).lower()
+
+
+class Gazetteer:
+    """
+    In-memory place index (seed file plus learned places), keyed by phonetic key.
+    """
+
+    _instance: ClassVar[Optional['Gazetteer']] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, seed_path: Path = SEED_PATH, learned_path: Optional[Path] = None):
+        """
+        Args:
+            seed_path: Curated gazetteer CSV shipped with the code
+            learned_path: Where geo API results are written back
+                (default: GAZETTEER_LEARNED_PATH from .env, else next to the seed file)
+        """
+        self.learned_path = Path(learned_path or os.getenv("GAZETTEER_LEARNED_PATH") or DEFAULT_LEARNED_PATH)
+        self.places: List[Dict[str, Any]] = []
+        self._by_key: Dict[str, Dict[str, Any]] = {}
+        self._keys: List[str] = []
+        self._lock = threading.Lock()
+
+        for path, source in ((seed_path, "seed"), (self.learned_path, "learned")):
+            if Path(path).exists():
+                with open(path, newline="", encoding="utf-8") as file:
+                    for row in csv.DictReader(file):
+                        self._index(self._place_from_row(row, source))
+        self._fuzzy = lru_cache(maxsize=4096)(self._fuzzy_match)
+
+    @classmethod
+    def get_instance(cls) -> 'Gazetteer':
+        """Shared gazetteer for this process."""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    @staticmethod
+    def _place_from_row(row: Dict[str, str], source: str) -> Dict[str, Any]:
+        return {
+            "name": row["name"],
+            "state": row["state"],
+            "lat": float(row["lat"]),
+            "lon": float(row["lon"]),
+            "names": [row["name"]] + [n for n in row["aliases"].split("|") if n]
+                     + [n for n in row["native_names"].split("|") if n],
+            "source": source,
+        }
+
+    def _index(self, place: Dict[str, Any]):
+        self.places.append(place)
+        for name in place["names"]:
+            key = phonetic_key(name)
+            if key and key not in self._by_key:
+                self._by_key[key] = place
+                bisect.insort(self._keys, key)
+
+    def _fuzzy_match(self, key: str) -> Optional[str]:
+        matches = difflib.get_close_matches(key, self._keys, n=1, cutoff=FUZZY_CUTOFF)
+        return matches[0] if matches else None
+
+    @staticmethod
+    def _result(place: Dict[str, Any], match: str) -> Dict[str, Any]:
+        return {"name": place["name"], "state": place["state"], "lat": place["lat"], "lon": place["lon"],
+                "source": place["source"], "match": match}
+
+    def lookup(self, name: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Coordinates for a place name in English, Hindi or Malayalam.
+
+        Only a name, alias or native spelling of an indexed place matches (up
+        to the phonetic folds); partial and misspelled names return None.
+
+        Args:
+            name: Place as typed by the user
+
+        Returns:
+            {"name", "state", "lat", "lon", "source", "match": "exact"}, or
+            None when the place is not indexed
+        """
+        key = phonetic_key(name or "")
+        place = self._by_key.get(key) if key else None
+        return self._result(place, "exact") if place is not None else None
+
+    def _prefix_places(self, key: str, limit: int) -> List[Dict[str, Any]]:
+        """Distinct places with a name key starting with `key`, in key order."""
+        places: Dict[int, Dict[str, Any]] = {}
+        index = bisect.bisect_left(self._keys, key)
+        while index < len(self._keys) and len(places) < limit:
+            candidate = self._keys[index]
+            if not candidate.startswith(key):
+                break
+            place = self._by_key[candidate]
+            places.setdefault(id(place), place)
+            index += 1
+        return list(places.values())
+
+    def complete(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Suggestions for autocomplete: places whose name (in any script or
+        spelling) starts with `prefix`, else the closest spelling of a known
+        name. Never use these to resolve a place.
+        """
+        key = phonetic_key(prefix)
+        if not key:
+            return []
+        places = self._prefix_places(key, limit)
+        if places:
+            return [self._result(place, "prefix") for place in places]
+        match = self._fuzzy(key)
+        return [self._result(self._by_key[match], "fuzzy")] if match else []
+
+    def learn(self, query: str, place: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Add a place resolved by the geo API to the index and the learned file.
+
+        Args:
+            query: Name the user typed (indexed as an alias)
+            place: get_coordinates result ({"name", "lat", "lon", "state", ...})
+
+        Returns:
+            The indexed gazetteer entry
+        """
+        row = {
+            "name": place["name"],
+            "state": place.get("state", ""),
+            "lat": f"{float(place['lat']):.4f}",
+            "lon": f"{float(place['lon']):.4f}",
+            "aliases": query.strip() if phonetic_key(query) != phonetic_key(place["name"]) else "",
+            "native_names": "",
+        }
+        entry = self._place_from_row(row, "learned")
+
+        with self._lock:
+            known = self.lookup(query)
+            if known:
+                return known
+            self._index(entry)
+            self._fuzzy.cache_clear()
+            try:
+                is_new = not self.learned_path.exists()
+                with open(self.learned_path, "a", newline="", encoding="utf-8") as file:
+                    writer = csv.DictWriter(file, fieldnames=COLUMNS)
+                    if is_new:
+                        writer.writeheader()
+                    writer.writerow(row)
+            except OSError as e:
+                logger.warning(f"Could not persist learned place {place['name']}: {e}")
+        return self._result(entry, "exact")
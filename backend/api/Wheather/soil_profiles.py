@@ -0,0 +1,225 @@
+"""
+District Soil Profile Store for Krishi Jyoti
+
+In-memory index of district-level soil nutrients (N, P, K and pH), loaded
+once from two sources:
+
+1. Soil Health Card data (SOIL_HEALTH_CARD_PATH): a CSV export of the SHC
+   portal, one row per soil sample (or per district), averaged per district
+2. district_soil_profiles.csv: hand-written indicative regional estimates,
+   used only for districts the SHC export does not cover
+
+Every profile carries its "source" ('soil_health_card' or 'indicative') and
+an "indicative" flag, so callers can tell measured averages from estimates.
+Values are on the crop model's training scales (N/P/K in kg/ha), so a profile
+can be fed to the model directly.
+
+Lookups accept a district, one of its aliases (old names, headquarters towns)
+or a state, as plain dict lookups. Close spellings are not resolved: a district
+missing from the table is often a real place whose name is close to one in
+another state (Rampur is not Raipur), so suggest() offers them instead, for
+the user to confirm.
+
+Usage:
+    from Wheather.soil_profiles import SoilProfileStore
+
+    store = SoilProfileStore.get_instance()
+    profile = store.lookup("Trichur")   # -> Thrissur, Kerala
+    store.lookup("Rampur")              # -> None (not in either source)
+    store.suggest("Trichr")             # -> [Thrissur, Kerala]
+    if profile:
+        print(profile["N"], profile["pH"], profile["source"])
+"""
+
+import os
+import re
+import csv
+import difflib
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, ClassVar, Dict, List, Optional
+
+PROFILES_PATH = Path(__file__).resolve().parent / "district_soil_profiles.csv"
+NUTRIENTS = ("N", "P", "K", "pH")
+
+# Soil Health Card export (overridable from .env; unset: indicative estimates only)
+SOIL_HEALTH_CARD_PATH = os.getenv("SOIL_HEALTH_CARD_PATH", "")
+
+# Accepted SHC export headers per field (compared lowercased, without units in brackets)
+SHC_COLUMNS = {
+    "state": ("state", "state name"),
+    "district": ("district", "district name"),
+    "N": ("n", "nitrogen", "available nitrogen"),
+    "P": ("p", "phosphorus", "phosphorous", "available phosphorus"),
+    "K": ("k", "potassium", "available potassium"),
+    "pH": ("ph", "soil ph"),
+}
+
+SOURCE_SHC = "soil_health_card"
+SOURCE_INDICATIVE = "indicative"
+
+# Minimum difflib similarity for a suggested district
+FUZZY_CUTOFF = 0.82
+
+
+def normalize_place(name: str) -> str:
+    """Lowercase, drop punctuation and the word 'district', collapse whitespace."""
+    name = re.sub(r"[^a-z ]", " ", name.lower())
+    name = re.sub(r"\b(district|dist|zila|jilla)\b", " ", name)
+    return " ".join(name.split())
+
+
+def load_soil_health_card(path: Path) -> List[Dict[str, Any]]:
+    """
+    District averages of a Soil Health Card CSV export.
+
+    Rows may be single samples or district summaries; rows with a missing or
+    non-numeric nutrient are skipped.
+
+    Returns:
+        {"district", "state", "N", "P", "K", "pH", "samples", "source", "indicative"} per district
+    """
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        reader = csv.DictReader(file)
+        headers = {re.sub(r"\s*[(\[].*$", "", h).strip().lower(): h for h in reader.fieldnames or []}
+        columns = {}
+        for field, names in SHC_COLUMNS.items():
+            column = next((headers[name] for name in names if name in headers), None)
+            if column is None:
+                raise ValueError(f"Soil Health Card export {path} has no {field} column")
+            columns[field] = column
+
+        sums: Dict[tuple, Dict[str, Any]] = {}
+        for row in reader:
+            try:
+                values = {key: float(row[columns[key]]) for key in NUTRIENTS}
+            except (TypeError, ValueError):
+                continue
+            district, state = row[columns["district"]].strip().title(), row[columns["state"]].strip().title()
+            if not district:
+                continue
+            entry = sums.setdefault((normalize_place(state), normalize_place(district)),
+                                    {"district": district, "state": state, "samples": 0,
+                                     **{key: 0.0 for key in NUTRIENTS}})
+            entry["samples"] += 1
+            for key in NUTRIENTS:
+                entry[key] += values[key]
+
+    return [
+        {**entry, **{key: round(entry[key] / entry["samples"], 2) for key in NUTRIENTS},
+         "source": SOURCE_SHC, "indicative": False}
+        for entry in sums.values()
+    ]
+
+
+class SoilProfileStore:
+    """
+    District soil profiles indexed by normalized district name, alias and state.
+    Loaded once per process and read-only afterwards.
+    """
+
+    _instance: ClassVar[Optional['SoilProfileStore']] = None
+    _lock = threading.Lock()
+
+    def __init__(self, path: Path = PROFILES_PATH, shc_path: Optional[Path] = None):
+        """
+        Args:
+            path: Indicative estimates CSV shipped with the code
+            shc_path: Soil Health Card export (default: SOIL_HEALTH_CARD_PATH from .env, if set)
+        """
+        self.profiles: List[Dict[str, Any]] = []
+        self._by_name: Dict[str, Dict[str, Any]] = {}
+        self._by_state: Dict[str, Dict[str, Any]] = {}
+
+        shc_path = shc_path or SOIL_HEALTH_CARD_PATH
+        measured = {}
+        if shc_path:
+            measured = {(normalize_place(p["state"]), normalize_place(p["district"])): p
+                        for p in load_soil_health_card(Path(shc_path))}
+            self.profiles.extend(measured.values())
+            for profile in measured.values():
+                self._by_name.setdefault(normalize_place(profile["district"]), profile)
+
+        with open(path, newline="", encoding="utf-8") as file:
+            for row in csv.DictReader(file):
+                # Measured averages replace the estimate; the aliases still apply
+                profile = measured.get((normalize_place(row["state"]), normalize_place(row["district"])))
+                if profile is None:
+                    profile = {
+                        "district": row["district"],
+                        "state": row["state"],
+                        **{key: float(row[key]) for key in NUTRIENTS},
+                        "source": SOURCE_INDICATIVE,
+                        "indicative": True,
+                    }
+                    self.profiles.append(profile)
+                names = [row["district"]] + [a for a in row["aliases"].split("|") if a]
+                for name in names:
+                    self._by_name.setdefault(normalize_place(name), profile)
+
+        # State averages, for when only the state is known (indicative if any district is)
+        states: Dict[str, List[Dict[str, Any]]] = {}
+        for profile in self.profiles:
+            states.setdefault(normalize_place(profile["state"]), []).append(profile)
+        for state, members in states.items():
+            indicative = any(p["indicative"] for p in members)
+            self._by_state[state] = {
+                "district": None,
+                "state": members[-1]["state"],
+                **{key: round(sum(p[key] for p in members) / len(members), 2) for key in NUTRIENTS},
+                "source": SOURCE_INDICATIVE if indicative else SOURCE_SHC,
+                "indicative": indicative,
+            }
+
+        self._names = list(self._by_name)
+        self._fuzzy = lru_cache(maxsize=4096)(self._fuzzy_match)
+
+    @classmethod
+    def get_instance(cls) -> 'SoilProfileStore':
+        """Shared store for this process."""
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def _fuzzy_match(self, key: str, limit: int) -> tuple:
+        return tuple(difflib.get_close_matches(key, self._names, n=limit, cutoff=FUZZY_CUTOFF))
+
+    def lookup(self, place: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Soil profile for a district, alias or state.
+
+        Args:
+            place: Place name as typed by the user or returned by the geocoder
+
+        Returns:
+            {"district", "state", "N", "P", "K", "pH", "source", "indicative", "match"}
+            where match is 'exact' or 'state', or None for places not in the table
+        """
+        if not place:
+            return None
+        key = normalize_place(place)
+        if not key:
+            return None
+
+        if key in self._by_name:
+            return {**self._by_name[key], "match": "exact"}
+        if key in self._by_state:
+            return {**self._by_state[key], "match": "state"}
+        return None
+
+    def suggest(self, place: Optional[str], limit: int = 3) -> List[Dict[str, Any]]:
+        """Districts spelled like `place` ("Did you mean ...?"); never use these to resolve a place."""
+        key = normalize_place(place or "")
+        if not key:
+            return []
+        # A district matched through several aliases is suggested once
+        profiles = {id(self._by_name[name]): self._by_name[name] for name in self._fuzzy(key, limit)}
+        return [{**profile, "match": "fuzzy"} for profile in profiles.values()]
+
+    @staticmethod
+    def model_inputs(profile: Dict[str, Any]) -> Dict[str, float]:
+        """N, P, K and pH of a profile, keyed like the crop model's features."""
+        return {key: profile[key] for key in NUTRIENTS}
@@ -0,0 +1,219 @@
+"""
+Geo-bucketed Weather Cache for Krishi Jyoti
+
+Caches OpenWeatherMap responses per grid cell instead of per request, so
+farmers in the same village (or neighbouring ones) share one upstream call.
+Coordinates are snapped to a `grid_deg` grid (0.1° ≈ 11 km by default) and
+every kind of data has its own freshness:
+
+- current:  ~10 minutes (OpenWeatherMap refreshes current data about that often)
+- forecast: ~3 hours (the 5 day / 3 hour forecast is re-run every 3 hours)
+- geocode:  ~30 days (place names do not move)
+
+An entry older than its TTL but still inside its stale window is served
+immediately while a background task fetches a fresh copy (stale-while-
+revalidate). Concurrent misses for the same entry share a single upstream
+call (request coalescing).
+
+Usage:
+    from Wheather.weather_cache import WeatherCache
+
+    cache = WeatherCache.get_instance()
+    cell = cache.cell(18.52, 73.85)
+    data = await cache.get_or_fetch("current", cell, lambda: fetch_current(*cache.cell_center(cell)))
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, ClassVar, Dict, Hashable, Optional, Tuple
+
+# Freshness per kind of data (overridable from .env)
+DEFAULT_TTL_S = {
+    "current": float(os.getenv("WEATHER_CACHE_CURRENT_TTL_S", "600")),
+    "forecast": float(os.getenv("WEATHER_CACHE_FORECAST_TTL_S", "10800")),
+    "geocode": float(os.getenv("WEATHER_CACHE_GEOCODE_TTL_S", "2592000")),
+}
+# How long past its TTL an entry may still be served while it is refreshed
+DEFAULT_STALE_S = {
+    "current": float(os.getenv("WEATHER_CACHE_CURRENT_STALE_S", "1800")),
+    "forecast": float(os.getenv("WEATHER_CACHE_FORECAST_STALE_S", "10800")),
+    "geocode": float(os.getenv("WEATHER_CACHE_GEOCODE_STALE_S", "2592000")),
+}
+DEFAULT_GRID_DEG = float(os.getenv("WEATHER_CACHE_GRID_DEG", "0.1"))
+DEFAULT_MAX_ENTRIES = int(os.getenv("WEATHER_CACHE_MAX_ENTRIES", "20000"))
+
+logger = logging.getLogger(__name__)
+
+
+def cache_enabled() -> bool:
+    """Whether WeatherService should use the cache (WEATHER_CACHE=off disables it)."""
+    return os.getenv("WEATHER_CACHE", "on").strip().lower() not in ("0", "off", "false", "no")
+
+
+class WeatherCache:
+    """
+    In-process TTL cache for weather and geocoding data with per-entry
+    single-flight fetches and stale-while-revalidate.
+
+    Entries are shared by every event loop in the process (the API loop and
+    the background loop behind the sync helpers); in-flight fetches are
+    tracked per loop, since an asyncio task can only be awaited on its own loop.
+    """
+
+    _instance: ClassVar[Optional['WeatherCache']] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, grid_deg: float = DEFAULT_GRID_DEG, ttl_s: Optional[Dict[str, float]] = None,
+                 stale_s: Optional[Dict[str, float]] = None, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Args:
+            grid_deg: Cell size in degrees for coordinate bucketing
+            ttl_s: Seconds an entry is fresh, per kind ('current', 'forecast', 'geocode')
+            stale_s: Seconds past the TTL an entry may be served while it is refreshed
+            max_entries: Least recently used entries are dropped beyond this
+        """
+        self.grid_deg = grid_deg
+        self.ttl_s = {**DEFAULT_TTL_S, **(ttl_s or {})}
+        self.stale_s = {**DEFAULT_STALE_S, **(stale_s or {})}
+        self.max_entries = max_entries
+
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[Any, float]]" = OrderedDict()
+        self._inflight: Dict[Tuple[asyncio.AbstractEventLoop, str, Hashable], asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0,
+                       "upstream_calls": 0, "refresh_errors": 0}
+
+    @classmethod
+    def get_instance(cls) -> 'WeatherCache':
+        """Shared cache for this process."""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        """Grid cell containing a coordinate."""
+        return (round(float(lat) / self.grid_deg), round(float(lon) / self.grid_deg))
+
+    def cell_center(self, cell: Tuple[int, int]) -> Tuple[float, float]:
+        """Coordinate at the centre of a grid cell (what gets requested upstream)."""
+        return (round(cell[0] * self.grid_deg, 4), round(cell[1] * self.grid_deg, 4))
+
+    def _lookup(self, kind: str, key: Hashable) -> Tuple[Any, Optional[float]]:
+        """(value, age in seconds), or (None, None) when absent or past its stale window."""
+        with self._lock:
+            entry = self._entries.get((kind, key))
+            if entry is None:
+                return None, None
+            value, stored_at = entry
+            age = time.monotonic() - stored_at
+            if age >= self.ttl_s[kind] + self.stale_s[kind]:
+                del self._entries[(kind, key)]
+                return None, None
+            self._entries.move_to_end((kind, key))
+            return value, age
+
+    def _store(self, kind: str, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[(kind, key)] = (value, time.monotonic())
+            self._entries.move_to_end((kind, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _start_fetch(self, kind: str, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Tuple[asyncio.Task, bool]:
+        """Task fetching (kind, key) on the running loop; joins the one in flight if there is one."""
+        loop = asyncio.get_running_loop()
+        flight = (loop, kind, key)
+        task = self._inflight.get(flight)
+        if task is not None:
+            return task, False
+
+        async def run():
+            try:
+                value = await fetch()
+                self._store(kind, key, value)
+                return value
+            finally:
+                self._inflight.pop(flight, None)
+
+        self._count("upstream_calls")
+        task = loop.create_task(run())
+        self._inflight[flight] = task
+        return task, True
+
+    def _refresh_in_background(self, kind: str, key: Hashable, fetch: Callable[[], Awaitable[Any]]):
+        task, started = self._start_fetch(kind, key, fetch)
+        if started:
+            task.add_done_callback(lambda t: self._log_refresh_error(kind, key, t))
+
+    def _log_refresh_error(self, kind: str, key: Hashable, task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            self._count("refresh_errors")
+            logger.warning(f"Background refresh of {kind} {key} failed: {task.exception()}")
+
+    async def get_or_fetch(self, kind: str, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Cached value for (kind, key), calling `fetch` only when needed.
+
+        Args:
+            kind: 'current', 'forecast' or 'geocode' (selects the TTL)
+            key: Grid cell for weather data, normalized place name for geocoding
+            fetch: Coroutine factory producing a fresh value
+
+        Returns:
+            A fresh value, or a stale one while a refresh runs in the background.
+            Upstream errors on a miss propagate to every waiting caller and
+            nothing is cached.
+        """
+        value, age = self._lookup(kind, key)
+        if age is not None:
+            if age < self.ttl_s[kind]:
+                self._count("hits")
+            else:
+                self._count("stale_hits")
+                self._refresh_in_background(kind, key, fetch)
+            return value
+
+        task, started = self._start_fetch(kind, key, fetch)
+        self._count("misses" if started else "coalesced")
+        # Shield so one cancelled caller does not cancel the fetch for the others
+        return await asyncio.shield(task)
+
+    def peek(self, kind: str, key: Hashable) -> Any:
+        """Cached value for (kind, key) if there is one (stale included), without fetching."""
+        value, _ = self._lookup(kind, key)
+        return value
+
+    def put(self, kind: str, key: Hashable, value: Any):
+        """Store a value obtained outside get_or_fetch (e.g. coordinates read from a weather response)."""
+        self._store(kind, key, value)
+
+    def invalidate(self, kind: Optional[str] = None):
+        """Drop every entry, or every entry of one kind."""
+        with self._lock:
+            if kind is None:
+                self._entries.clear()
+            else:
+                for entry_key in [k for k in self._entries if k[0] == kind]:
+                    del self._entries[entry_key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["stale_hits"] + self._stats["misses"] + self._stats["coalesced"]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "hit_ratio": round((lookups - self._stats["misses"]) / lookups, 3) if lookups else None,
+                "grid_deg": self.grid_deg,
+                "ttl_s": dict(self.ttl_s),
+            }
@@ -1,18 +1,125 @@
 """
 Weather API Service for Krishi Jyoti
 Provides weather data using OpenWeatherMap API for agricultural purposes
+
+WeatherService is asynchronous: every request goes through one shared
+httpx.AsyncClient per event loop (keep-alive pooling, HTTP/2 when the h2
+package is installed, a per-host connection cap and explicit timeouts), so
+async routes never block the event loop on weather calls. The module-level
+helpers (get_weather, get_agricultural_weather, ...) stay synchronous for CLI
+scripts and sync code; they run on a background event loop that keeps its own
+pooled client between calls.
+
+get_agricultural_weather builds on get_weather_snapshot: the city is geocoded
+once, then current weather and forecast are fetched in parallel and every
+agricultural metric is derived from that single snapshot. Daily aggregates
+and risk indicators come from the vectorized forecast engine
+(forecast_engine.py), which also scores many locations in one batch.
+
+Responses are cached per lat/lon grid cell with separate TTLs for current
+weather, forecasts and geocoding (see weather_cache.py); WEATHER_CACHE=off
+turns the cache off.
 """
 
 import os
-import requests
+import sys
+import asyncio
+import threading
+import weakref
+import importlib.util
+import httpx
 import json
+from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from dotenv import load_dotenv
 
+ai_root = Path(__file__).resolve().parent.parent.parent / "ai"
+if str(ai_root) not in sys.path:
+    sys.path.append(str(ai_root))
+
+from services.upstreams import stubs_enabled, fetch_weather_stub
+from .weather_cache import WeatherCache, cache_enabled
+from .gazetteer import Gazetteer
+from .forecast_engine import ForecastBatch, assess_farming_conditions
+
 # Load environment variables
 load_dotenv()
 
+# HTTP client settings (overridable from .env)
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+MAX_CONNECTIONS_PER_HOST = int(os.getenv("WEATHER_MAX_CONNECTIONS_PER_HOST", "20"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("WEATHER_MAX_KEEPALIVE_CONNECTIONS", "10"))
+KEEPALIVE_EXPIRY_S = float(os.getenv("WEATHER_KEEPALIVE_EXPIRY_S", "30"))
+REQUEST_TIMEOUT = httpx.Timeout(
+    float(os.getenv("WEATHER_TIMEOUT_S", "10")),
+    connect=float(os.getenv("WEATHER_CONNECT_TIMEOUT_S", "3")),
+    pool=float(os.getenv("WEATHER_POOL_TIMEOUT_S", "5")),
+)
+
+# One pooled client (and per-host semaphores) per event loop: httpx connections
+# belong to the loop that opened them
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_host_limits: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared AsyncClient for the running event loop (created on first use)."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=REQUEST_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS_PER_HOST,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY_S,
+            ),
+        )
+        _clients[loop] = client
+    return client
+
+
+def _host_semaphore(host: str) -> asyncio.Semaphore:
+    limits = _host_limits.setdefault(asyncio.get_running_loop(), {})
+    if host not in limits:
+        limits[host] = asyncio.Semaphore(MAX_CONNECTIONS_PER_HOST)
+    return limits[host]
+
+
+async def close_http_client():
+    """Close the shared client of the running event loop (call on app shutdown)."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+class _BackgroundLoop:
+    """Event loop on a daemon thread that runs WeatherService coroutines for synchronous callers."""
+
+    def __init__(self):
+        self._loop = None
+        self._lock = threading.Lock()
+
+    def run(self, coroutine):
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    threading.Thread(target=loop.run_forever, name="weather-loop", daemon=True).start()
+                    self._loop = loop
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+
+_background_loop = _BackgroundLoop()
+
+
+def run_sync(coroutine):
+    """Run a WeatherService coroutine from synchronous code and return its result."""
+    return _background_loop.run(coroutine)
+
+
 class WeatherAPIError(Exception):
     """Custom exception for Weather API errors"""
     pass
@@ -23,40 +130,66 @@ class WeatherService:
     Provides current weather, forecasts, and agricultural-specific weather data
     """
     
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None, cache: Optional[WeatherCache] = None,
+                 gazetteer: Optional[Gazetteer] = None):
+        """
+        Args:
+            client: AsyncClient to use instead of the shared one for the running loop
+            cache: Weather cache to use (default: the shared one, unless WEATHER_CACHE=off)
+            gazetteer: Offline place index consulted before the geo API (default: the shared one)
+        """
+        self.use_stub = stubs_enabled()
         self.api_key = os.getenv('weather_api_key')
-        if not self.api_key:
+        if not self.api_key and not self.use_stub:
             raise WeatherAPIError("Weather API key not found in environment variables")
         
-        self.base_url = "http://api.openweathermap.org/data/2.5"
-        self.geo_url = "http://api.openweathermap.org/geo/1.0"
+        self.client = client
+        self.cache = cache if cache is not None else (WeatherCache.get_instance() if cache_enabled() else None)
+        self.gazetteer = gazetteer or Gazetteer.get_instance()
+        self.base_url = "https://api.openweathermap.org/data/2.5"
+        self.geo_url = "https://api.openweathermap.org/geo/1.0"
         
-    def _make_request(self, url: str, params: Dict) -> Dict:
+    async def _make_request(self, url: str, params: Dict) -> Dict:
         """
         Make HTTP request to OpenWeatherMap API with error handling
+        (answered by the local stand-in when upstreams are stubbed)
         """
+        if self.use_stub:
+            return await fetch_weather_stub(url, params)
+
+        client = self.client or get_http_client()
         try:
-            response = requests.get(url, params=params, timeout=10)
+            async with _host_semaphore(httpx.URL(url).host):
+                response = await client.get(url, params=params)
             response.raise_for_status()
             return response.json()
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             raise WeatherAPIError("Request timed out")
-        except requests.exceptions.HTTPError as e:
-            if response.status_code == 401:
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 401:
                 raise WeatherAPIError("Invalid API key")
-            elif response.status_code == 404:
+            elif e.response.status_code == 404:
                 raise WeatherAPIError("Location not found")
             else:
                 raise WeatherAPIError(f"HTTP Error: {e}")
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             raise WeatherAPIError(f"Request failed: {e}")
         except json.JSONDecodeError:
             raise WeatherAPIError("Invalid response format")
 
-    def get_coordinates(self, city: str, country_code: Optional[str] = None) -> Dict:
+    async def get_coordinates(self, city: str, country_code: Optional[str] = None) -> Dict:
         """
         Get latitude and longitude coordinates for a city
+
+        Indian places whose name or alias is in the offline gazetteer are
+        resolved there; any other name (including partial or misspelled ones)
+        goes to the geo API, and its result is written back to the gazetteer.
         """
+        if not country_code or country_code.upper() == "IN":
+            place = self._gazetteer_place(city)
+            if place:
+                return place
+
         query = city
         if country_code:
             query += f",{country_code}"
@@ -68,12 +201,35 @@ class WeatherService:
         }
         
         url = f"{self.geo_url}/direct"
-        data = self._make_request(url, params)
+        if self.cache is None:
+            data = await self._make_request(url, params)
+        else:
+            data = await self.cache.get_or_fetch('geocode', query.strip().lower(),
+                                                 lambda: self._make_request(url, params))
         
         if not data:
             raise WeatherAPIError(f"No coordinates found for {city}")
             
-        location = data[0]
+        coordinates = self._geocode_place(data[0])
+        # Stand-in coordinates are synthetic, so only real answers are learned
+        if coordinates['country'] == 'IN' and not self.use_stub:
+            self.gazetteer.learn(city, coordinates)
+        return coordinates
+
+    def _gazetteer_place(self, city: str) -> Optional[Dict]:
+        place = self.gazetteer.lookup(city)
+        if not place:
+            return None
+        return {
+            'lat': place['lat'],
+            'lon': place['lon'],
+            'name': place['name'],
+            'country': 'IN',
+            'state': place['state']
+        }
+
+    @staticmethod
+    def _geocode_place(location: Dict) -> Dict:
         return {
             'lat': location['lat'],
             'lon': location['lon'],
@@ -82,7 +238,15 @@ class WeatherService:
             'state': location.get('state', '')
         }
 
-    def get_current_weather(self, city: str = None, lat: float = None, lon: float = None) -> Dict:
+    def _known_place(self, city: str) -> Optional[Dict]:
+        """Coordinates of a city from the gazetteer or the geocode cache (no upstream call), else None"""
+        place = self._gazetteer_place(city)
+        if place is None and self.cache is not None:
+            data = self.cache.peek('geocode', city.strip().lower())
+            place = self._geocode_place(data[0]) if data else None
+        return place
+
+    async def get_current_weather(self, city: str = None, lat: float = None, lon: float = None) -> Dict:
         """
         Get current weather data for a location
         """
@@ -91,20 +255,12 @@ class WeatherService:
             'units': 'metric'
         }
         
-        if city:
-            params['q'] = city
-        elif lat is not None and lon is not None:
-            params['lat'] = lat
-            params['lon'] = lon
-        else:
-            raise WeatherAPIError("Either city name or coordinates (lat, lon) must be provided")
-        
         url = f"{self.base_url}/weather"
-        data = self._make_request(url, params)
+        data, place = await self._fetch_for_location('current', url, params, city, lat, lon)
         
-        return self._format_current_weather(data)
+        return self._with_place_name(self._format_current_weather(data), place)
 
-    def get_weather_forecast(self, city: str = None, lat: float = None, lon: float = None, days: int = 5) -> Dict:
+    async def get_weather_forecast(self, city: str = None, lat: float = None, lon: float = None, days: int = 5) -> Dict:
         """
         Get weather forecast for up to 5 days
         """
@@ -113,25 +269,170 @@ class WeatherService:
             'units': 'metric'
         }
         
-        if city:
-            params['q'] = city
-        elif lat is not None and lon is not None:
-            params['lat'] = lat
-            params['lon'] = lon
-        else:
-            raise WeatherAPIError("Either city name or coordinates (lat, lon) must be provided")
-        
         url = f"{self.base_url}/forecast"
-        data = self._make_request(url, params)
+        data, place = await self._fetch_for_location('forecast', url, params, city, lat, lon)
         
-        return self._format_forecast_data(data, days)
+        return self._with_place_name(self._format_forecast_data(data, days), place)
+
+    async def _fetch_for_location(self, kind: str, url: str, params: Dict, city: Optional[str],
+                                  lat: Optional[float], lon: Optional[float]):
+        """
+        Raw API data for a city or coordinates, through the geo-bucketed cache
+
+        With the cache on, a city is geocoded (cached) and the data is requested
+        for the centre of its grid cell, so nearby locations share one entry.
+
+        Returns:
+            (data, geocoded place or None)
+        """
+        if city is None and (lat is None or lon is None):
+            raise WeatherAPIError("Either city name or coordinates (lat, lon) must be provided")
+
+        if self.cache is None:
+            if city:
+                params['q'] = city
+            else:
+                params['lat'] = lat
+                params['lon'] = lon
+            return await self._make_request(url, params), None
+
+        place = None
+        if city:
+            place = await self.get_coordinates(city)
+            lat, lon = place['lat'], place['lon']
+        cell = self.cache.cell(lat, lon)
+        cell_lat, cell_lon = self.cache.cell_center(cell)
+        data = await self.cache.get_or_fetch(kind, cell,
+                                             lambda: self._make_request(url, {**params, 'lat': cell_lat, 'lon': cell_lon}))
+        return data, place
+
+    @staticmethod
+    def _with_place_name(formatted: Dict, place: Optional[Dict]) -> Dict:
+        """Report the place the user asked for, not the nearest weather station"""
+        if place:
+            formatted['location']['name'] = place['name']
+        return formatted
+
+    async def get_weather_snapshot(self, city: str = None, lat: float = None, lon: float = None, days: int = 5) -> Dict:
+        """
+        Current weather and forecast for one location in a single round
+
+        A city known to the gazetteer or the geocode cache is resolved to
+        coordinates locally, then current weather and forecast are requested
+        in parallel for the same coordinates, so both halves describe the same
+        place. Any other city is requested by name (q=) from both endpoints,
+        without a separate geocoding call (see _weather_snapshot_by_name).
+
+        Returns:
+            {'current', 'forecast', 'coordinates': {'lat', 'lon'},
+             'forecast_data': raw /forecast payload,
+             'forecast_batch': ForecastBatch of the raw forecast}
+        """
+        place = None
+        if lat is None or lon is None:
+            if not city:
+                raise WeatherAPIError("Either city name or coordinates (lat, lon) must be provided")
+            place = self._known_place(city)
+            if place is None:
+                return await self._weather_snapshot_by_name(city, days)
+            lat, lon = place['lat'], place['lon']
+
+        forecast_params = {
+            'appid': self.api_key,
+            'units': 'metric'
+        }
+        current, (forecast_data, _) = await asyncio.gather(
+            self.get_current_weather(lat=lat, lon=lon),
+            self._fetch_for_location('forecast', f"{self.base_url}/forecast", forecast_params, None, lat, lon)
+        )
+
+        # The 3-hourly list is converted to arrays once; the formatted forecast
+        # and every agricultural metric are read from the same batch
+        batch = ForecastBatch([forecast_data], days)
+        forecast = self._format_forecast_data(forecast_data, days, batch)
+
+        self._with_place_name(current, place)
+        self._with_place_name(forecast, place)
 
-    def get_agricultural_weather(self, city: str = None, lat: float = None, lon: float = None) -> Dict:
+        return {'current': current, 'forecast': forecast, 'coordinates': {'lat': lat, 'lon': lon},
+                'forecast_data': forecast_data, 'forecast_batch': batch}
+
+    async def _weather_snapshot_by_name(self, city: str, days: int) -> Dict:
+        """
+        get_weather_snapshot for a city unknown locally: two requests by name
+        instead of geocode + two
+
+        Concurrent requests for the same name share one pair of upstream calls
+        (single-flight cache keyed by the normalized name). The coordinates in
+        the reply are learned like a geocoding result, so the next request for
+        the city takes the grid-cell path.
+        """
+        params = {
+            'q': city,
+            'appid': self.api_key,
+            'units': 'metric'
+        }
+
+        async def fetch():
+            return await asyncio.gather(
+                self._make_request(f"{self.base_url}/weather", dict(params)),
+                self._make_request(f"{self.base_url}/forecast", dict(params))
+            )
+
+        name_key = city.strip().lower()
+        if self.cache is None:
+            current_data, forecast_data = await fetch()
+        else:
+            current_data, forecast_data = await self.cache.get_or_fetch('current', ('name', name_key), fetch)
+
+        coordinates = self._geocode_place({
+            'lat': current_data['coord']['lat'],
+            'lon': current_data['coord']['lon'],
+            'name': current_data['name'],
+            'country': current_data['sys']['country']
+        })
+        lat, lon = coordinates['lat'], coordinates['lon']
+        if self.cache is not None:
+            self.cache.put('geocode', name_key, [coordinates])
+            cell = self.cache.cell(lat, lon)
+            self.cache.put('current', cell, current_data)
+            self.cache.put('forecast', cell, forecast_data)
+        # Stand-in coordinates are synthetic, so only real answers are learned
+        if coordinates['country'] == 'IN' and not self.use_stub:
+            self.gazetteer.learn(city, coordinates)
+
+        batch = ForecastBatch([forecast_data], days)
+        return {'current': self._format_current_weather(current_data),
+                'forecast': self._format_forecast_data(forecast_data, days, batch),
+                'coordinates': {'lat': lat, 'lon': lon},
+                'forecast_data': forecast_data, 'forecast_batch': batch}
+
+    async def get_agricultural_weather(self, city: str = None, lat: float = None, lon: float = None) -> Dict:
         """
         Get weather data specifically useful for agriculture
+        (all metrics are computed from one get_weather_snapshot)
+        """
+        snapshot = await self.get_weather_snapshot(city=city, lat=lat, lon=lon, days=5)
+        return self.build_agricultural_weather(snapshot)
+
+    def build_agricultural_weather(self, snapshot: Dict, assessment: Optional[Dict] = None) -> Dict:
         """
-        current = self.get_current_weather(city=city, lat=lat, lon=lon)
-        forecast = self.get_weather_forecast(city=city, lat=lat, lon=lon, days=5)
+        Agricultural metrics from a current + forecast snapshot
+
+        Args:
+            snapshot: get_weather_snapshot result
+            assessment: {'farming_conditions', 'weekly_outlook'} already scored
+                in a batch (forecast_engine.score_locations); computed from the
+                snapshot when omitted
+        """
+        current = snapshot['current']
+        coordinates = snapshot['coordinates']
+        if assessment is None:
+            batch = snapshot['forecast_batch']
+            assessment = {
+                'farming_conditions': assess_farming_conditions([current], batch)[0],
+                'weekly_outlook': batch.weekly_outlook()[0]
+            }
         
         # Calculate agricultural metrics
         agri_data = {
@@ -141,17 +442,11 @@ class WeatherService:
                 'humidity': current['humidity'],
                 'precipitation': current.get('precipitation', 0),
                 'wind_speed': current['wind_speed'],
-                'uv_index': self._get_uv_index(lat, lon) if lat and lon else None,
+                'uv_index': self._get_uv_index(coordinates['lat'], coordinates['lon']),
                 'soil_temperature_estimate': self._estimate_soil_temperature(current['temperature'])
             },
-            'farming_conditions': {
-                'irrigation_needed': self._assess_irrigation_need(current, forecast),
-                'pest_risk': self._assess_pest_risk(current, forecast),
-                'disease_risk': self._assess_disease_risk(current, forecast),
-                'optimal_activity_time': self._get_optimal_activity_time(forecast),
-                'frost_risk': self._assess_frost_risk(forecast)
-            },
-            'weekly_outlook': self._get_weekly_agricultural_outlook(forecast)
+            'farming_conditions': assessment['farming_conditions'],
+            'weekly_outlook': assessment['weekly_outlook']
         }
         
         return agri_data
@@ -188,29 +483,10 @@ class WeatherService:
             'sunset': datetime.fromtimestamp(data['sys']['sunset']).isoformat()
         }
 
-    def _format_forecast_data(self, data: Dict, days: int) -> Dict:
-        """Format forecast data"""
-        forecasts = []
-        current_date = None
-        daily_data = {}
-        
-        for item in data['list'][:days * 8]:  # 8 forecasts per day (3-hour intervals)
-            forecast_date = datetime.fromtimestamp(item['dt']).date()
-            
-            if current_date != forecast_date:
-                if current_date is not None:
-                    forecasts.append(self._aggregate_daily_forecast(daily_data, current_date))
-                current_date = forecast_date
-                daily_data = {'temps': [], 'humidity': [], 'precipitation': 0, 'weather': []}
-            
-            daily_data['temps'].append(item['main']['temp'])
-            daily_data['humidity'].append(item['main']['humidity'])
-            daily_data['precipitation'] += item.get('rain', {}).get('3h', 0) + item.get('snow', {}).get('3h', 0)
-            daily_data['weather'].append(item['weather'][0])
-        
-        # Add the last day
-        if daily_data['temps']:
-            forecasts.append(self._aggregate_daily_forecast(daily_data, current_date))
+    def _format_forecast_data(self, data: Dict, days: int, batch: Optional[ForecastBatch] = None) -> Dict:
+        """Format forecast data (daily aggregates come from the vectorized forecast engine)"""
+        batch = batch or ForecastBatch([data], days)
+        forecasts = batch.daily_forecasts(0)
         
         return {
             'location': {
@@ -225,20 +501,6 @@ class WeatherService:
             'forecasts': forecasts
         }
 
-    def _aggregate_daily_forecast(self, daily_data: Dict, date) -> Dict:
-        """Aggregate 3-hour forecasts into daily forecast"""
-        return {
-            'date': date.isoformat(),
-            'temperature': {
-                'min': min(daily_data['temps']),
-                'max': max(daily_data['temps']),
-                'avg': sum(daily_data['temps']) / len(daily_data['temps'])
-            },
-            'humidity_avg': sum(daily_data['humidity']) / len(daily_data['humidity']),
-            'precipitation_total': daily_data['precipitation'],
-            'weather': daily_data['weather'][0]  # Take the first weather condition
-        }
-
     def _get_uv_index(self, lat: float, lon: float) -> Optional[float]:
         """Get UV index for coordinates (requires separate API call)"""
         try:
@@ -258,140 +520,51 @@ class WeatherService:
         # Simple estimation: soil temp is usually 2-3°C lower than air temp
         return air_temp - 2.5
 
-    def _assess_irrigation_need(self, current: Dict, forecast: Dict) -> Dict:
-        """Assess irrigation needs based on weather conditions"""
-        recent_precipitation = current.get('precipitation', 0)
-        forecast_precipitation = sum(day['precipitation_total'] for day in forecast['forecasts'][:3])
-        
-        humidity = current['humidity']
-        temp = current['temperature']
-        
-        # Simple irrigation assessment logic
-        irrigation_score = 0
-        
-        if recent_precipitation < 2:  # Less than 2mm in last hour
-            irrigation_score += 2
-        
-        if forecast_precipitation < 5:  # Less than 5mm expected in next 3 days
-            irrigation_score += 3
-            
-        if humidity < 40:  # Low humidity
-            irrigation_score += 2
-            
-        if temp > 30:  # High temperature
-            irrigation_score += 2
-        
-        if irrigation_score >= 6:
-            need_level = "High"
-        elif irrigation_score >= 4:
-            need_level = "Medium"
-        else:
-            need_level = "Low"
-        
-        return {
-            'level': need_level,
-            'score': irrigation_score,
-            'factors': {
-                'recent_precipitation': recent_precipitation,
-                'forecast_precipitation': forecast_precipitation,
-                'humidity': humidity,
-                'temperature': temp
-            }
-        }
+_shared_service: Optional[WeatherService] = None
+_shared_service_lock = threading.Lock()
 
-    def _assess_pest_risk(self, current: Dict, forecast: Dict) -> str:
-        """Assess pest risk based on weather conditions"""
-        temp = current['temperature']
-        humidity = current['humidity']
-        
-        # High temperature and humidity favor pest activity
-        if temp > 25 and humidity > 70:
-            return "High"
-        elif temp > 20 and humidity > 60:
-            return "Medium"
-        else:
-            return "Low"
+def get_weather_service() -> WeatherService:
+    """WeatherService shared by the module-level helpers (created on first use)"""
+    global _shared_service
+    if _shared_service is None:
+        with _shared_service_lock:
+            if _shared_service is None:
+                _shared_service = WeatherService()
+    return _shared_service
 
-    def _assess_disease_risk(self, current: Dict, forecast: Dict) -> str:
-        """Assess plant disease risk based on weather conditions"""
-        humidity = current['humidity']
-        precipitation = current.get('precipitation', 0)
-        
-        # High humidity and recent precipitation increase disease risk
-        if humidity > 80 and precipitation > 1:
-            return "High"
-        elif humidity > 70:
-            return "Medium"
-        else:
-            return "Low"
+# Convenience functions for easy usage (async, for FastAPI routes)
+async def get_weather_async(city: str = None, lat: float = None, lon: float = None) -> Dict:
+    """Get current weather for a location"""
+    return await get_weather_service().get_current_weather(city=city, lat=lat, lon=lon)
 
-    def _get_optimal_activity_time(self, forecast: Dict) -> List[str]:
-        """Get optimal times for farming activities"""
-        optimal_days = []
-        
-        for day_forecast in forecast['forecasts'][:3]:
-            temp_max = day_forecast['temperature']['max']
-            temp_min = day_forecast['temperature']['min']
-            precipitation = day_forecast['precipitation_total']
-            
-            # Optimal conditions: moderate temperature, no precipitation
-            if 15 <= temp_max <= 28 and temp_min > 5 and precipitation < 1:
-                optimal_days.append(day_forecast['date'])
-        
-        return optimal_days
+async def get_forecast_async(city: str = None, lat: float = None, lon: float = None, days: int = 5) -> Dict:
+    """Get weather forecast for a location"""
+    return await get_weather_service().get_weather_forecast(city=city, lat=lat, lon=lon, days=days)
 
-    def _assess_frost_risk(self, forecast: Dict) -> Dict:
-        """Assess frost risk in the coming days"""
-        frost_risk_days = []
-        
-        for day_forecast in forecast['forecasts']:
-            temp_min = day_forecast['temperature']['min']
-            if temp_min <= 2:  # Frost risk when temperature drops to 2°C or below
-                frost_risk_days.append({
-                    'date': day_forecast['date'],
-                    'min_temp': temp_min,
-                    'risk_level': 'High' if temp_min <= 0 else 'Medium'
-                })
-        
-        return {
-            'has_risk': len(frost_risk_days) > 0,
-            'risk_days': frost_risk_days
-        }
+async def get_agricultural_weather_async(city: str = None, lat: float = None, lon: float = None) -> Dict:
+    """Get agricultural weather data for a location"""
+    return await get_weather_service().get_agricultural_weather(city=city, lat=lat, lon=lon)
 
-    def _get_weekly_agricultural_outlook(self, forecast: Dict) -> Dict:
-        """Get weekly outlook for agricultural planning"""
-        total_precipitation = sum(day['precipitation_total'] for day in forecast['forecasts'])
-        avg_temp = sum(day['temperature']['avg'] for day in forecast['forecasts']) / len(forecast['forecasts'])
-        avg_humidity = sum(day['humidity_avg'] for day in forecast['forecasts']) / len(forecast['forecasts'])
-        
-        return {
-            'average_temperature': round(avg_temp, 1),
-            'total_precipitation': round(total_precipitation, 1),
-            'average_humidity': round(avg_humidity, 1),
-            'suitable_for_planting': 15 <= avg_temp <= 30 and total_precipitation > 5,
-            'suitable_for_harvesting': total_precipitation < 10 and avg_humidity < 80
-        }
+async def find_coordinates_async(city: str, country_code: str = None) -> Dict:
+    """Find coordinates for a city"""
+    return await get_weather_service().get_coordinates(city, country_code)
 
-# Convenience functions for easy usage
+# Synchronous wrappers (CLI scripts and sync code)
 def get_weather(city: str = None, lat: float = None, lon: float = None) -> Dict:
     """Get current weather for a location"""
-    service = WeatherService()
-    return service.get_current_weather(city=city, lat=lat, lon=lon)
+    return run_sync(get_weather_async(city=city, lat=lat, lon=lon))
 
 def get_forecast(city: str = None, lat: float = None, lon: float = None, days: int = 5) -> Dict:
     """Get weather forecast for a location"""
-    service = WeatherService()
-    return service.get_weather_forecast(city=city, lat=lat, lon=lon, days=days)
+    return run_sync(get_forecast_async(city=city, lat=lat, lon=lon, days=days))
 
 def get_agricultural_weather(city: str = None, lat: float = None, lon: float = None) -> Dict:
     """Get agricultural weather data for a location"""
-    service = WeatherService()
-    return service.get_agricultural_weather(city=city, lat=lat, lon=lon)
+    return run_sync(get_agricultural_weather_async(city=city, lat=lat, lon=lon))
 
 def find_coordinates(city: str, country_code: str = None) -> Dict:
     """Find coordinates for a city"""
-    service = WeatherService()
-    return service.get_coordinates(city, country_code)
+    return run_sync(find_coordinates_async(city, country_code))
 
 if __name__ == "__main__":
     # Example usage
@@ -0,0 +1,520 @@
+"""
+Krishi Jyoti API Load Test
+
+Drives mixed traffic against the FastAPI app and reports how it behaves under
+concurrency:
+- /api/v1/schemes/query      (SchemesChatBot -> RAG -> LLM)
+- /api/v1/crop/recommendation (CropChatBot -> weather -> ML model -> LLM)
+- /ws/voice                  (voice session: stream PCM, wait for the reply audio)
+
+By default the app is served in-process by uvicorn on a background thread with
+all upstreams stubbed (KRISHI_UPSTREAMS=stub: Cerebras, OpenAI, Zilliz,
+OpenWeatherMap and Deepgram are replaced by ai/services/local_stubs.py), so a
+run needs no keys or network and measures only our own code. Use
+STUB_*_LATENCY_MS to simulate realistic upstream latencies.
+
+Reported per scenario: requests, errors, throughput and p50/p95/p99 latency.
+In-process runs also report event-loop lag of the server loop and process RSS,
+with the memory cost of each open voice connection (RSS slope over open
+connections). Client and server share the process, so RSS includes the load
+generator itself.
+
+Usage:
+    python load_test.py                                   # mixed profile, 20 users, 30 s
+    python load_test.py --profile voice --users 100 --duration 60
+    python load_test.py --profile voice --voice-playback stream
+    python load_test.py --profile voice --voice-stt-rate 16000
+    python load_test.py --profile voice --voice-silence-s 2       # VAD savings on pauses
+    python load_test.py --profile voice --voice-language ml       # Malayalam sessions
+    STUB_CHAT_LATENCY_MS=400 python load_test.py --profile schemes
+    python load_test.py --target http://127.0.0.1:8000 --server-pid 12345
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+API_DIR = Path(__file__).resolve().parent
+AI_DIR = API_DIR.parent / "ai"
+SCHEMES_QUESTIONS_PATH = AI_DIR / "Test" / "schemes_benchmark_questions.json"
+
+# Traffic profiles: scenario -> share of requests
+PROFILES = {
+    "mixed": {"schemes_query": 0.5, "crop_recommendation": 0.3, "voice_session": 0.2},
+    "schemes": {"schemes_query": 1.0},
+    "crop": {"crop_recommendation": 1.0},
+    "voice": {"voice_session": 1.0},
+}
+
+CROP_QUERIES = [
+    "What crop should I grow in Pune?",
+    "Which crops are best for my farm in Ludhiana?",
+    "Suggest a crop to plant in Thrissur.",
+    "What should I sow this season in Nashik?",
+    "Recommend crops for a farmer near Coimbatore.",
+    "Which crop is suitable in Indore?",
+]
+
+# Uplink audio format expected by the voice agent
+VOICE_SAMPLE_RATES = (48000, 16000)
+VOICE_SAMPLE_WIDTH = 2
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    return round(float(np.percentile(values, q)), 2) if values else None
+
+
+def read_rss_mb(pid: Optional[int] = None) -> Optional[float]:
+    """Resident set size of a process in MB (Linux /proc), or None if unavailable."""
+    try:
+        with open(f"/proc/{pid or 'self'}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+class ScenarioStats:
+    """Latencies and errors collected for one scenario."""
+
+    def __init__(self):
+        self.latencies_ms: List[float] = []
+        self.errors = 0
+        self.error_samples: List[str] = []
+
+    def record(self, latency_ms: float):
+        self.latencies_ms.append(latency_ms)
+
+    def record_error(self, error: Exception):
+        self.errors += 1
+        if len(self.error_samples) < 5:
+            self.error_samples.append(f"{type(error).__name__}: {error}"[:200])
+
+    def summary(self, duration_s: float) -> Dict:
+        return {
+            "requests": len(self.latencies_ms),
+            "errors": self.errors,
+            "throughput_rps": round(len(self.latencies_ms) / duration_s, 2),
+            "latency_ms": {
+                "p50": percentile(self.latencies_ms, 50),
+                "p95": percentile(self.latencies_ms, 95),
+                "p99": percentile(self.latencies_ms, 99),
+                "max": round(max(self.latencies_ms), 2) if self.latencies_ms else None,
+            },
+            "error_samples": self.error_samples,
+        }
+
+
+class ServerMonitor:
+    """
+    Samples event-loop lag (how late a periodic sleep wakes up) on the server
+    loop, together with process RSS, the number of open voice connections and
+    (in-process) the thread count.
+    """
+
+    def __init__(self, interval_s: float = 0.05, pid: Optional[int] = None):
+        self.interval_s = interval_s
+        self.pid = pid
+        self.open_connections = 0
+        self.lag_ms: List[float] = []
+        self.samples: List[tuple] = []  # (open_connections, rss_mb)
+        self.peak_threads = 0
+        self._stopped = False
+
+    async def run_loop_probe(self):
+        loop = asyncio.get_running_loop()
+        while not self._stopped:
+            start = loop.time()
+            await asyncio.sleep(self.interval_s)
+            self.lag_ms.append(max(0.0, (loop.time() - start - self.interval_s) * 1000))
+
+    async def run_memory_probe(self):
+        while not self._stopped:
+            rss = read_rss_mb(self.pid)
+            if rss is not None:
+                self.samples.append((self.open_connections, rss))
+            if self.pid is None:
+                self.peak_threads = max(self.peak_threads, threading.active_count())
+            await asyncio.sleep(self.interval_s)
+
+    def stop(self):
+        self._stopped = True
+
+    def summary(self, baseline_rss_mb: Optional[float]) -> Dict:
+        report = {
+            "event_loop_lag_ms": {
+                "p50": percentile(self.lag_ms, 50),
+                "p99": percentile(self.lag_ms, 99),
+                "max": round(max(self.lag_ms), 2) if self.lag_ms else None,
+            } if self.lag_ms else None,
+            "memory": None,
+            "peak_threads": self.peak_threads or None,
+        }
+        if self.samples:
+            connections = np.array([c for c, _ in self.samples], dtype=np.float64)
+            rss = np.array([r for _, r in self.samples], dtype=np.float64)
+            per_connection_kb = None
+            if np.ptp(connections) > 0:
+                per_connection_kb = round(float(np.polyfit(connections, rss, 1)[0]) * 1024, 1)
+            report["memory"] = {
+                "baseline_rss_mb": round(baseline_rss_mb, 1) if baseline_rss_mb else None,
+                "peak_rss_mb": round(float(rss.max()), 1),
+                "peak_open_voice_connections": int(connections.max()),
+                "rss_per_voice_connection_kb": per_connection_kb,
+            }
+        return report
+
+
+class InProcessServer:
+    """Runs the FastAPI app under uvicorn on a background thread with its own event loop."""
+
+    def __init__(self, app, monitor: ServerMonitor):
+        import uvicorn
+
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self.monitor = monitor
+        self.server = uvicorn.Server(uvicorn.Config(
+            app, host="127.0.0.1", port=self.port, log_level="warning",
+            ws_max_size=16 * 1024 * 1024
+        ))
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        asyncio.run(self._serve())
+
+    async def _serve(self):
+        probes = [asyncio.create_task(self.monitor.run_loop_probe()),
+                  asyncio.create_task(self.monitor.run_memory_probe())]
+        await self.server.serve()
+        self.monitor.stop()
+        await asyncio.gather(*probes, return_exceptions=True)
+
+    def start(self, timeout_s: float = 60.0):
+        self._thread.start()
+        deadline = time.monotonic() + timeout_s
+        while not self.server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("In-process server failed to start")
+            time.sleep(0.05)
+
+    def stop(self):
+        self.server.should_exit = True
+        self._thread.join(timeout=10)
+
+
+class LoadTest:
+    """Virtual users picking scenarios from a traffic profile until the deadline."""
+
+    def __init__(self, base_url: str, profile: Dict[str, float], args, monitor: ServerMonitor):
+        self.base_url = base_url.rstrip("/")
+        self.ws_url = (self.base_url.replace("http", "ws", 1)
+                       + f"/ws/voice?playback={args.voice_playback}&uplink_rate={args.voice_uplink_rate}"
+                       + (f"&stt_rate={args.voice_stt_rate}" if args.voice_stt_rate else "")
+                       + (f"&language={args.voice_language}" if args.voice_language else ""))
+        self.profile = profile
+        self.args = args
+        self.monitor = monitor
+        self.stats = {name: ScenarioStats() for name in profile}
+        self.voice_status: Optional[Dict] = None
+        # Connect -> "ready" status of each measured voice session (agent start or pool hand-off)
+        self.voice_ready_ms: List[float] = []
+        # Connect -> first greeting audio (cached greeting, or synthesized by the agent)
+        self.voice_greeting_ms: List[float] = []
+        self.measuring = False
+        self.questions = [q["question"] for q in
+                          json.loads(SCHEMES_QUESTIONS_PATH.read_text(encoding="utf-8"))["questions"]]
+
+        # Speech-like utterance (150 Hz voiced harmonics in 4 syllables per second, passed by
+        # the server's VAD) and a quiet room-noise frame for the pause before it
+        frame_samples = args.voice_uplink_rate * args.voice_frame_ms // 1000
+        frame_count = max(1, int(args.voice_utterance_s * 1000 / args.voice_frame_ms))
+        rng = np.random.default_rng(0)
+        t = np.arange(frame_samples * frame_count) / args.voice_uplink_rate
+        voiced = sum(3000 / k * np.sin(2 * np.pi * 150 * k * t) for k in range(1, 6))
+        voiced *= 0.5 * (1 - np.cos(2 * np.pi * 4 * t))
+        utterance = np.clip(voiced + rng.normal(0, 30, len(t)), -32768, 32767).astype("<i2").tobytes()
+        frame_bytes = frame_samples * VOICE_SAMPLE_WIDTH
+        self.voice_frames = [utterance[i:i + frame_bytes] for i in range(0, len(utterance), frame_bytes)]
+        self.silence_frame = np.clip(rng.normal(0, 30, frame_samples), -32768, 32767).astype("<i2").tobytes()
+        self.silence_frames = int(args.voice_silence_s * 1000 / args.voice_frame_ms)
+
+    async def schemes_query(self, http, rng: random.Random):
+        response = await http.post("/api/v1/schemes/query", data={"query": rng.choice(self.questions)})
+        response.raise_for_status()
+
+    async def crop_recommendation(self, http, rng: random.Random):
+        response = await http.post("/api/v1/crop/recommendation", data={"query": rng.choice(CROP_QUERIES)})
+        response.raise_for_status()
+
+    async def voice_session(self, http, rng: random.Random) -> float:
+        """
+        Streams one utterance and returns the time from its last frame to the
+        first reply audio (the WAV message, or the first PCM frame when streaming), in ms.
+        """
+        import websockets
+
+        connect_start = time.perf_counter()
+        async with websockets.connect(self.ws_url, max_size=None) as ws:
+            await self._wait_for(ws, "status")
+            if self.measuring:
+                self.voice_ready_ms.append((time.perf_counter() - connect_start) * 1000)
+            self.monitor.open_connections += 1
+            try:
+                # The greeting plays before the caller speaks
+                greeting = await self._wait_for_reply_audio(ws)
+                if self.measuring:
+                    self.voice_greeting_ms.append((time.perf_counter() - connect_start) * 1000)
+                await self._wait_for_reply_end(ws, greeting)
+
+                pacing_s = self.args.voice_frame_ms / 1000 if self.args.voice_realtime else 0
+                for _ in range(self.silence_frames):
+                    await ws.send(self.silence_frame)
+                    await asyncio.sleep(pacing_s)
+                for frame in self.voice_frames:
+                    await ws.send(frame)
+                    await asyncio.sleep(pacing_s)
+
+                start = time.perf_counter()
+                reply = await self._wait_for_reply_audio(ws)
+                latency_ms = (time.perf_counter() - start) * 1000
+                await self._wait_for_reply_end(ws, reply)
+
+                await ws.send(json.dumps({"type": "command", "command": "stop"}))
+            finally:
+                self.monitor.open_connections -= 1
+        return latency_ms
+
+    async def _wait_for_reply_audio(self, ws):
+        """Waits for the first audio of a reply (the first WAV segment, or the first PCM frame when streaming)."""
+        if self.args.voice_playback == "stream":
+            await self._wait_for(ws, "agent_audio_start")
+            await self._wait_for(ws, bytes)
+            return None
+        return await self._wait_for(ws, "agent_audio_wav")
+
+    async def _wait_for_reply_end(self, ws, segment: Optional[Dict]):
+        """Waits until the reply whose audio has started (`segment`: its first WAV segment) is complete."""
+        if self.args.voice_playback == "stream":
+            await self._wait_for(ws, "agent_audio_end")
+            return
+        while not segment.get("final", True):
+            segment = await self._wait_for(ws, "agent_audio_wav")
+
+    async def _wait_for(self, ws, message_type):
+        """Waits for a JSON message of `message_type`, or for any binary frame when it is `bytes`."""
+        async def receive():
+            while True:
+                message = await ws.recv()
+                if message_type is bytes and isinstance(message, bytes):
+                    return message
+                if isinstance(message, str):
+                    payload = json.loads(message)
+                    if payload.get("type") == "error":
+                        raise RuntimeError(payload.get("message"))
+                    if payload.get("type") == message_type:
+                        return payload
+        return await asyncio.wait_for(receive(), timeout=self.args.timeout)
+
+    async def run_scenario(self, name: str, http, rng: random.Random, record: bool = True):
+        start = time.perf_counter()
+        try:
+            latency_ms = await getattr(self, name)(http, rng)
+            if latency_ms is None:
+                latency_ms = (time.perf_counter() - start) * 1000
+            if record:
+                self.stats[name].record(latency_ms)
+        except Exception as e:
+            if record:
+                self.stats[name].record_error(e)
+            else:
+                print(f"   ⚠️ Warm-up of {name} failed: {e}")
+
+    async def virtual_user(self, user_id: int, http, deadline: float):
+        rng = random.Random(self.args.seed + user_id)
+        names, weights = list(self.profile), list(self.profile.values())
+        while time.monotonic() < deadline:
+            await self.run_scenario(rng.choices(names, weights)[0], http, rng)
+            if self.args.think_time_ms:
+                await asyncio.sleep(rng.expovariate(1000 / self.args.think_time_ms))
+
+    async def run(self) -> float:
+        import httpx
+
+        limits = httpx.Limits(max_connections=self.args.users, max_keepalive_connections=self.args.users)
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=self.args.timeout, limits=limits) as http:
+            if self.args.warmup:
+                print("🔥 Warming up (first request of each scenario initializes models and indexes)...")
+                for name in self.profile:
+                    await self.run_scenario(name, http, random.Random(self.args.seed), record=False)
+
+            print(f"🚀 {self.args.users} users for {self.args.duration}s...")
+            start = time.monotonic()
+            deadline = start + self.args.duration
+            self.measuring = True
+            await asyncio.gather(*(self.virtual_user(i, http, deadline) for i in range(self.args.users)))
+            duration_s = time.monotonic() - start
+
+            if "voice_session" in self.profile:
+                # Session limit, rejections and keep-alive/reaping counters of the voice scheduler
+                response = await http.get("/api/v1/voice/status")
+                if response.status_code == 200:
+                    self.voice_status = response.json()
+            return duration_s
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Krishi Jyoti API with mixed traffic")
+    parser.add_argument("--target", default="inprocess",
+                        help="'inprocess' (default) or the base URL of a running server")
+    parser.add_argument("--server-pid", type=int, default=None,
+                        help="PID of the target server, to sample its RSS when not in-process")
+    parser.add_argument("--profile", default="mixed", choices=list(PROFILES), help="Traffic mix")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured duration in seconds")
+    parser.add_argument("--think-time-ms", type=float, default=0.0,
+                        help="Mean pause between a user's requests (exponential)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument("--voice-utterance-s", type=float, default=1.0, help="Audio streamed per voice session")
+    parser.add_argument("--voice-silence-s", type=float, default=0.0,
+                        help="Silence streamed before each utterance (held back by the server's VAD)")
+    parser.add_argument("--voice-frame-ms", type=int, default=20, help="Duration of each uplink audio frame")
+    parser.add_argument("--voice-playback", default="wav", choices=["wav", "stream"],
+                        help="Reply audio as one WAV message or as streamed PCM frames")
+    parser.add_argument("--voice-uplink-rate", type=int, default=48000, choices=VOICE_SAMPLE_RATES,
+                        help="Sample rate of the PCM streamed by each voice session")
+    parser.add_argument("--voice-stt-rate", type=int, default=None, choices=VOICE_SAMPLE_RATES,
+                        help="Rate the server forwards to speech-to-text (16000 decimates 48 kHz uplink)")
+    parser.add_argument("--voice-language", default=None,
+                        help="Language requested by each voice session (default: the server's default)")
+    parser.add_argument("--no-voice-realtime", dest="voice_realtime", action="store_false",
+                        help="Send voice frames as fast as possible instead of in real time")
+    parser.add_argument("--no-warmup", dest="warmup", action="store_false", help="Skip the warm-up requests")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed for scenario selection")
+    parser.add_argument("--output", default="load_test_results.json", help="Where to write the JSON report")
+    args = parser.parse_args()
+
+    in_process = args.target == "inprocess"
+    monitor = ServerMonitor(pid=None if in_process else args.server_pid)
+    server = None
+
+    print("🌾 Krishi Jyoti API Load Test")
+    print("=" * 60)
+
+    if in_process:
+        os.environ.setdefault("KRISHI_UPSTREAMS", "stub")
+        sys.path.insert(0, str(API_DIR))
+        from main import app
+
+        server = InProcessServer(app, monitor)
+        server.start()
+        base_url = server.base_url
+        print(f"🖥️  In-process server on {base_url} (upstreams: {os.environ['KRISHI_UPSTREAMS']})")
+    else:
+        base_url = args.target
+        print(f"🌐 Target: {base_url}")
+
+    baseline_rss = read_rss_mb(monitor.pid) if in_process or args.server_pid else None
+    load_test = LoadTest(base_url, PROFILES[args.profile], args, monitor)
+
+    async def run_with_remote_probe():
+        # Out of process we can only sample memory; loop lag needs the server's own loop
+        probe = asyncio.create_task(monitor.run_memory_probe()) if args.server_pid else None
+        try:
+            return await load_test.run()
+        finally:
+            monitor.stop()
+            if probe:
+                await probe
+
+    try:
+        duration_s = asyncio.run(load_test.run() if in_process else run_with_remote_probe())
+    finally:
+        if server:
+            server.stop()
+
+    scenarios = {name: stats.summary(duration_s) for name, stats in load_test.stats.items()}
+    total = sum(s["requests"] for s in scenarios.values())
+    report = {
+        "generated_at": datetime.now().isoformat(),
+        "target": args.target,
+        "profile": args.profile,
+        "users": args.users,
+        "voice_playback": args.voice_playback,
+        "voice_language": args.voice_language,
+        "duration_s": round(duration_s, 2),
+        "upstreams": os.environ.get("KRISHI_UPSTREAMS", "live") if in_process else None,
+        "total_requests": total,
+        "total_errors": sum(s["errors"] for s in scenarios.values()),
+        "throughput_rps": round(total / duration_s, 2),
+        "scenarios": scenarios,
+        **monitor.summary(baseline_rss),
+        "voice_sessions": load_test.voice_status,
+        "voice_time_to_ready_ms": {
+            "p50": percentile(load_test.voice_ready_ms, 50),
+            "p95": percentile(load_test.voice_ready_ms, 95),
+        } if load_test.voice_ready_ms else None,
+        "voice_time_to_greeting_ms": {
+            "p50": percentile(load_test.voice_greeting_ms, 50),
+            "p95": percentile(load_test.voice_greeting_ms, 95),
+        } if load_test.voice_greeting_ms else None,
+    }
+
+    print(f"\n{'Scenario':<22}{'req':>7}{'err':>6}{'rps':>9}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for name, s in scenarios.items():
+        latency = s["latency_ms"]
+        print(f"{name:<22}{s['requests']:>7}{s['errors']:>6}{s['throughput_rps']:>9}"
+              f"{latency['p50'] or '-':>10}{latency['p95'] or '-':>10}{latency['p99'] or '-':>10}")
+    if report["event_loop_lag_ms"]:
+        lag = report["event_loop_lag_ms"]
+        print(f"\n⏱️  Event-loop lag: p50={lag['p50']}ms p99={lag['p99']}ms max={lag['max']}ms")
+    if report["memory"]:
+        memory = report["memory"]
+        print(f"🧠 RSS peak {memory['peak_rss_mb']} MB, {memory['peak_open_voice_connections']} voice connections, "
+              f"~{memory['rss_per_voice_connection_kb']} KB per connection")
+    if report["peak_threads"]:
+        print(f"🧵 Peak threads: {report['peak_threads']}")
+    if report["voice_time_to_ready_ms"]:
+        ready = report["voice_time_to_ready_ms"]
+        print(f"🔌 Voice time to ready: p50={ready['p50']}ms p95={ready['p95']}ms")
+    if report["voice_time_to_greeting_ms"]:
+        greeting = report["voice_time_to_greeting_ms"]
+        print(f"👋 Voice time to greeting audio: p50={greeting['p50']}ms p95={greeting['p95']}ms")
+    if load_test.voice_status:
+        voice = load_test.voice_status
+        print(f"🎙️  Voice sessions: peak {voice['peak_sessions']}/{voice['max_sessions']}, "
+              f"{voice['rejected']} rejected, {voice['keep_alives_sent']} keep-alives, "
+              f"{voice['reaped_idle']} reaped idle")
+        uplink = voice["uplink"]
+        if uplink["vad_input_bytes"]:
+            saved = uplink["vad_suppressed_bytes"]
+            print(f"🤫 VAD held back {saved / 1024:.0f} KB of {uplink['vad_input_bytes'] / 1024:.0f} KB uplink PCM "
+                  f"({100 * saved / uplink['vad_input_bytes']:.0f}%)")
+        think = voice.get("think")
+        if think and any(think["answers"].values()):
+            routes = ", ".join(f"{route} {count} ({think['avg_ms'][route]}ms)"
+                               for route, count in think["answers"].items() if count)
+            print(f"🧭 Voice answers by route: {routes}; {think['no_llm_ratio']:.0%} without an LLM call")
+
+    Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"\n💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
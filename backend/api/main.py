@@ -10,7 +10,12 @@ import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from routers import queries_router, feedback_router, escalation_router, health_router, crop_router, schemes_router, voice_ws_router
+from routers import queries_router, feedback_router, escalation_router, health_router, crop_router, schemes_router, voice_ws_router, advisory_router
+from Wheather.crop_model_registry import CropModelRegistry
+from Wheather.wheatherapi import close_http_client
+from Wheather.district_advisories import DistrictAdvisoryScheduler
+from ai.Voice.session_scheduler import VoiceSessionScheduler
+from ai.Voice.agent_pool import VoiceAgentPool
 
 app = FastAPI(
     title="Krishi Jyoti API",
@@ -27,14 +32,45 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Include routers
-app.include_router(queries_router)
-app.include_router(feedback_router)
-app.include_router(escalation_router)
+# Include routers (the database-backed ones only when their `models` services exist)
+for database_router in (queries_router, feedback_router, escalation_router):
+    if database_router is not None:
+        app.include_router(database_router)
 app.include_router(health_router)
 app.include_router(crop_router)
 app.include_router(schemes_router)
 app.include_router(voice_ws_router)
+app.include_router(advisory_router)
+
+@app.on_event("startup")
+def load_crop_model():
+    # Load the shared crop model once per worker; a missing file leaves the crop endpoint degraded
+    CropModelRegistry.get_instance().get()
+
+@app.on_event("startup")
+async def start_advisory_scheduler():
+    # Precompute district weather advisories in the background (ADVISORY_SCHEDULER=off disables it);
+    # only the worker holding the snapshot lock refreshes, the others reload its snapshot
+    if os.getenv("ADVISORY_SCHEDULER", "on").strip().lower() not in ("0", "off", "false", "no"):
+        DistrictAdvisoryScheduler.get_instance().start()
+
+@app.on_event("startup")
+async def warm_voice_agents():
+    # Connect VOICE_AGENT_POOL_SIZE voice agents ahead of the first /ws/voice session (default 0: off)
+    VoiceAgentPool.get_instance().start()
+
+@app.on_event("shutdown")
+async def stop_voice_scheduler():
+    # The voice session scheduler starts with the first session; stop its keep-alive task
+    # and close the warm agents
+    await VoiceSessionScheduler.get_instance().stop()
+    await VoiceAgentPool.get_instance().stop()
+
+@app.on_event("shutdown")
+async def close_weather_client():
+    # Stop the advisory refresh and release the pooled OpenWeatherMap connections of this worker
+    await DistrictAdvisoryScheduler.get_instance().stop()
+    await close_http_client()
 
 @app.get("/")
 def read_root():
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, HTTPException
+from Wheather.district_advisories import DistrictAdvisoryScheduler
+
+router = APIRouter(prefix="/api/v1/advisory", tags=["advisory"])
+
+advisory_scheduler = DistrictAdvisoryScheduler.get_instance()
+
+
+@router.get("/status")
+def get_advisory_status():
+    """State of the district advisory scheduler (last run, call budget, snapshot size)."""
+    return advisory_scheduler.status()
+
+
+@router.get("/districts")
+def list_district_advisories():
+    """Districts with a precomputed weather advisory and when each was last refreshed."""
+    return {"districts": advisory_scheduler.store.summaries()}
+
+
+@router.get("/district/{place}")
+def get_district_advisory(place: str):
+    """
+    Precomputed weather advisory (irrigation, pest/disease/frost risk, weekly outlook)
+    for a district, alias or Hindi/Malayalam name. Served from the in-memory snapshot.
+    """
+    advisory = advisory_scheduler.store.lookup(place)
+    if advisory is None:
+        raise HTTPException(status_code=404, detail=f"No precomputed advisory for {place}")
+    return advisory
@@ -1,22 +1,53 @@
 
+import asyncio
 from fastapi import APIRouter, Form, HTTPException
 from typing import Optional
 from schemas import *
-from models import QueryService
 from Wheather.crop_recommendation import CropChatBot
+from Wheather.crop_model_registry import CropModelRegistry, CropModelUnavailable
+from Wheather.crop_batch import recommend_for_locations
 
 router = APIRouter(prefix="/api/v1/crop", tags=["crop"])
 
+crop_model_registry = CropModelRegistry.get_instance()
 
 
+@router.get("/model/status")
+def get_crop_model_status():
+    """Status of the shared crop recommendation model ('ok' or 'degraded')."""
+    return crop_model_registry.status()
+
 
 @router.post("/recommendation")
 async def get_crop_recommendation(query: str = Form(...)):
     """Simple crop recommendation chatbot endpoint. Receives a user query and returns the chatbot response."""
     try:
-        chatbot = CropChatBot()
-        response_text = chatbot.get_response(query)
+        chatbot = CropChatBot(model_registry=crop_model_registry)
+        # The chatbot blocks on weather and LLM calls; keep them off the event loop
+        response_text = await asyncio.to_thread(chatbot.get_response, query)
         return {"response_text": response_text}
+    except CropModelUnavailable as e:
+        raise HTTPException(status_code=503, detail=f"Crop recommendation is degraded: {e}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
+
+@router.post("/recommendation/batch", response_model=CropBatchResponse)
+async def get_batch_crop_recommendations(request: CropBatchRequest):
+    """
+    Crop recommendations for many locations at once (e.g. all villages of a cooperative).
+    Weather is fetched concurrently and the model scores every location in a single call;
+    locations that cannot be resolved are reported as 'failed' without failing the batch.
+    """
+    try:
+        model = crop_model_registry.require()
+        results = await recommend_for_locations(
+            request.locations, model, top_k=request.top_k, filter_by_zone=request.filter_by_zone
+        )
+        succeeded = sum(1 for result in results if result["status"] == "ok")
+        return {"results": results, "succeeded": succeeded, "failed": len(results) - succeeded}
+    except CropModelUnavailable as e:
+        raise HTTPException(status_code=503, detail=f"Crop recommendation is degraded: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
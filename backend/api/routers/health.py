@@ -1,4 +1,5 @@
 from fastapi import APIRouter
+from ai.Voice.voice_languages import available_languages, default_language, get_profile
 
 router = APIRouter(prefix="/api/v1", tags=["health"])
 
@@ -9,8 +10,14 @@ def health_check():
 
 @router.get("/languages")
 def get_languages():
-    """Returns supported languages."""
-    return {"languages": ["Malayalam", "English", "Hindi"]}
+    """Returns supported languages, and the languages offered for voice sessions (/ws/voice?language=)."""
+    return {
+        "languages": ["Malayalam", "English", "Hindi"],
+        "voice": {
+            "default": default_language(),
+            "languages": [{"code": code, "name": get_profile(code)["name"]} for code in available_languages()],
+        },
+    }
 
 @router.get("/docs")
 def get_docs():
@@ -7,6 +7,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from schemas import *
+from ai.services.msp_store import MSPStore, SEASONS
 
 router = APIRouter(prefix="/api/v1/schemes", tags=["government_schemes"])
 
@@ -14,45 +15,25 @@ router = APIRouter(prefix="/api/v1/schemes", tags=["government_schemes"])
 async def get_msp_rates(
     crop_type: Optional[str] = Query(None, description="Filter by crop type"),
     year: Optional[str] = Query(None, description="Filter by year"),
-    state: Optional[str] = Query(None, description="Filter by state")
+    state: Optional[str] = Query(None, description="Filter by state"),
+    season: Optional[str] = Query(None, description="Filter by season (kharif or rabi)")
 ):
     """Get Minimum Support Price (MSP) rates for crops."""
     try:
-        # TODO: Fetch real MSP data from government APIs or database
-        sample_msp_data = {
-            "year": "2024-25",
-            "crops": [
-                {
-                    "crop_name": "Rice (Paddy)",
-                    "variety": "Common",
-                    "msp_rate": 2183,
-                    "unit": "per quintal",
-                    "increase_from_previous": 117
-                },
-                {
-                    "crop_name": "Wheat",
-                    "variety": "Common",
-                    "msp_rate": 2275,
-                    "unit": "per quintal", 
-                    "increase_from_previous": 150
-                },
-                {
-                    "crop_name": "Cotton",
-                    "variety": "Medium Staple",
-                    "msp_rate": 6620,
-                    "unit": "per quintal",
-                    "increase_from_previous": 300
-                }
-            ]
+        # Same table the voice agent answers from (ai/config/msp_rates.json, hot reloaded)
+        store = MSPStore.get_instance()
+        year = year or store.current_year
+        if year not in store.years:
+            raise HTTPException(status_code=404, detail=f"No MSP data for {year}")
+        if season and season.lower() not in SEASONS:
+            raise HTTPException(status_code=400, detail=f"season must be one of: {', '.join(SEASONS)}")
+
+        return {
+            "year": year,
+            "crops": store.rates(year=year, crop=crop_type, state=state, season=season)
         }
-        
-        # Filter by crop if specified
-        if crop_type:
-            filtered_crops = [crop for crop in sample_msp_data["crops"] 
-                            if crop_type.lower() in crop["crop_name"].lower()]
-            sample_msp_data["crops"] = filtered_crops
-            
-        return sample_msp_data
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
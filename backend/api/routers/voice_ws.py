@@ -5,32 +5,37 @@ import json
 import base64
 import wave
 import io
+import hmac
+import time
+import uuid
 
 # Add parent directories to path for imports
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'ai')))
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-
-# Import the VoiceAgent - note the capital V in Voice folder
-try:
-    from ai.Voice.voice_agent_class import VoiceAgent
-except ImportError as e:
-    print(f"Failed to import VoiceAgent: {e}")
-    # Create a dummy VoiceAgent for now to prevent import errors
-    class VoiceAgent:
-        def __init__(self, callback=None):
-            self.callback = callback
-        def start(self):
-            return False
-        def stop(self):
-            pass
-        def send_audio(self, data):
-            pass
-        def is_running(self):
-            return False
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
+from ai.Voice.audio_codecs import UplinkDecoder, DownlinkEncoder
+from ai.Voice.session_scheduler import VoiceSessionScheduler
+from ai.Voice.uplink_queue import UplinkQueue
+from ai.Voice.audio_buffers import AudioBufferPool
+from ai.Voice.agent_pool import VoiceAgentPool
+from ai.Voice.voice_activity import VoiceActivityGate, VAD_ENABLED
+from ai.Voice.think_router import VoiceThinkRouter, THINK_TOKEN
+from ai.Voice.voice_languages import available_languages, get_profile, resolve_language
+from ai.services.msp_store import SEASONS
 
 router = APIRouter()
 
+# Agent audio as produced by Deepgram (options.audio.output in VoiceAgent)
+AGENT_AUDIO_FORMAT = {"encoding": "linear16", "sample_rate": 24000, "channels": 1, "container": "none"}
+
+# Playback modes: "wav" buffers each reply into one base64 WAV message (older
+# clients); "stream" forwards PCM chunks as binary frames as they arrive
+PLAYBACK_MODES = ("wav", "stream")
+
 def create_wav_header(sample_rate, bits_per_sample, channels, data_size):
     """Creates a valid WAV header for the given audio data parameters."""
     header_io = io.BytesIO()
@@ -48,21 +53,135 @@ def create_wav_header(sample_rate, bits_per_sample, channels, data_size):
     
     return header_bytes
 
+async def reject_session(websocket: WebSocket, message: str):
+    """Tells the client why its session parameters were refused and closes the socket."""
+    await websocket.send_json({"type": "error", "message": message})
+    await websocket.close(code=1003)
+
 @router.websocket("/ws/voice")
-async def voice_ws(websocket: WebSocket):
+async def voice_ws(websocket: WebSocket, playback: str = "wav", uplink_codec: str = "linear16",
+                   uplink_rate: int = 48000, stt_rate: Optional[int] = None, downlink_codec: str = "linear16",
+                   vad: bool = VAD_ENABLED, state: Optional[str] = None, season: Optional[str] = None,
+                   language: Optional[str] = None):
     """
     WebSocket handler for real-time voice streaming.
-    Buffers audio chunks and sends complete WAV files to frontend.
+
+    Playback is chosen with the `playback` query parameter:
+    - wav (default): audio chunks are buffered (in a pooled buffer capped at
+      VOICE_MAX_BUFFERED_AUDIO_BYTES) and each reply is sent as one base64
+      WAV file ("agent_audio_wav"); longer replies arrive as several WAV
+      segments, the last one with "final": true
+    - stream: each reply starts with an "agent_audio_start" JSON preamble
+      carrying the audio format, continues as binary frames as soon as the
+      agent produces them, and ends with "agent_audio_end"
+
+    Audio transport is negotiated with the other query parameters and
+    confirmed in a "session" message:
+    - uplink_codec: linear16 (default) or opus (one packet per binary message)
+    - uplink_rate: sample rate of the client's audio, 48000 (default) or 16000
+    - stt_rate: rate forwarded to Deepgram (default: uplink_rate); 16000
+      decimates 48 kHz PCM server-side
+    - downlink_codec: linear16 (default) or opus (20 ms packets, stream playback only)
+    - vad: hold back silence between utterances before it reaches Deepgram
+      (default: VOICE_VAD); clients doing their own gating can turn it off
+    Decoding, resampling, voice activity detection and encoding run in a
+    worker thread.
+
+    `state` and `season` (kharif or rabi) narrow the MSP rates in the agent's
+    prompt to the caller's crops; such sessions get a freshly started agent.
+
+    `language` (code, name or alias such as ml, Malayalam or hi-IN; default:
+    VOICE_DEFAULT_LANGUAGE) selects the agent's speech models, reply language
+    and greeting; unsupported languages are refused with the offered ones.
+
+    Sessions are admitted, kept alive and reaped when idle by the shared
+    VoiceSessionScheduler; when it is full the socket is closed with 1013.
+    Admitted sessions get a pre-connected agent from the VoiceAgentPool.
+    Client audio goes through a bounded UplinkQueue drained by its own sender
+    task; "flow_control" messages ask the client to pause and resume when the
+    upstream falls behind.
     """
     await websocket.accept()
-    print("✅ Voice WebSocket client connected")
+    if playback not in PLAYBACK_MODES:
+        await reject_session(
+            websocket, f"Unsupported playback mode '{playback}' (use one of: {', '.join(PLAYBACK_MODES)})")
+        return
+    if downlink_codec != "linear16" and playback != "stream":
+        await reject_session(websocket, f"downlink_codec={downlink_codec} needs playback=stream")
+        return
+    if season is not None and season.lower() not in SEASONS:
+        await reject_session(websocket, f"Unsupported season '{season}' (use one of: {', '.join(SEASONS)})")
+        return
+    session_language = resolve_language(language)
+    if session_language is None:
+        offered = ", ".join(f"{code} ({get_profile(code)['name']})" for code in available_languages())
+        await reject_session(websocket, f"Unsupported language '{language}' (use one of: {offered})")
+        return
+    stt_rate = stt_rate or uplink_rate
+    try:
+        decoder = UplinkDecoder(uplink_codec, uplink_rate=uplink_rate, output_rate=stt_rate)
+        encoder = DownlinkEncoder(downlink_codec, sample_rate=AGENT_AUDIO_FORMAT["sample_rate"])
+    except ValueError as e:
+        await reject_session(websocket, str(e))
+        return
+    await websocket.send_json({
+        "type": "session",
+        "playback": playback,
+        "uplink": {"encoding": uplink_codec, "sample_rate": uplink_rate, "stt_sample_rate": stt_rate, "vad": vad},
+        "downlink": encoder.format,
+        "msp": {"state": state, "season": season},
+        "language": {"code": session_language, "name": get_profile(session_language)["name"]}
+    })
+    print(f"✅ Voice WebSocket client connected ({session_language}, {playback} playback, "
+          f"uplink {uplink_codec}@{uplink_rate}->{stt_rate}{' with VAD' if vad else ''}, downlink {downlink_codec})")
 
-    # Audio buffer for collecting Deepgram audio chunks
-    audio_buffer = bytearray()
+    # Pooled buffer collecting the current reply's audio, None between replies (wav playback only)
+    buffer_pool = AudioBufferPool.get_instance()
+    reply_buffer = None
+    # Bytes of the reply being streamed, None between replies (stream playback only)
+    streamed_bytes = None
+    # Scheduler bookkeeping (admitted below, once the agent exists)
+    session = None
+
+    async def send_wav(final):
+        nonlocal reply_buffer
+        try:
+            # Create WAV header for the buffered audio and encode straight from the buffer
+            wav_header = create_wav_header(
+                sample_rate=AGENT_AUDIO_FORMAT["sample_rate"],
+                bits_per_sample=16,
+                channels=AGENT_AUDIO_FORMAT["channels"],
+                data_size=reply_buffer.length
+            )
+            audio_b64 = base64.b64encode(reply_buffer.wav_view(wav_header)).decode('ascii')
+        finally:
+            buffer_pool.release(reply_buffer)
+            reply_buffer = None
+
+        await websocket.send_json({
+            "type": "agent_audio_wav", 
+            "audio_data": audio_b64,
+            "final": final,
+            "timestamp": asyncio.get_event_loop().time()
+        })
+
+    async def send_frames(frames):
+        nonlocal streamed_bytes
+        for frame in frames:
+            streamed_bytes += len(frame)
+            await websocket.send_bytes(bytes(frame))
+    # Callbacks run as separate tasks; the lock (FIFO) keeps their messages in order
+    send_lock = asyncio.Lock()
 
     # Define a callback to send responses back to the client
     async def on_response(role, content):
-        nonlocal audio_buffer
+        async with send_lock:
+            await send_response(role, content)
+
+    async def send_response(role, content):
+        nonlocal reply_buffer, streamed_bytes
+        if session is not None:
+            session.touch()
         try:
             if role == "assistant":
                 print(f"🤖 Assistant: {content}")
@@ -78,30 +197,40 @@ async def voice_ws(websocket: WebSocket):
                     "text": content,
                     "timestamp": asyncio.get_event_loop().time()
                 })
-            elif role == "audio":
-                # Buffer audio chunks instead of sending immediately
-                audio_buffer.extend(content)
-            elif role == "audio_complete":
-                # Send complete WAV file when agent finishes speaking
-                if audio_buffer:
-                    # Create WAV header for the complete audio buffer
-                    wav_header = create_wav_header(
-                        sample_rate=24000,
-                        bits_per_sample=16,
-                        channels=1,
-                        data_size=len(audio_buffer)
-                    )
-                    
-                    full_wav_data = wav_header + audio_buffer
-                    audio_b64 = base64.b64encode(full_wav_data).decode('utf-8')
-                    
+            elif role == "audio" and playback == "stream":
+                if streamed_bytes is None:
+                    streamed_bytes = 0
                     await websocket.send_json({
-                        "type": "agent_audio_wav", 
-                        "audio_data": audio_b64,
+                        "type": "agent_audio_start",
+                        "format": encoder.format,
                         "timestamp": asyncio.get_event_loop().time()
                     })
-                    
-                    audio_buffer.clear()
+                if encoder.passthrough:
+                    await send_frames(encoder.encode(content))
+                else:
+                    await send_frames(await asyncio.to_thread(encoder.encode, content))
+            elif role == "audio_complete" and playback == "stream":
+                if streamed_bytes is not None:
+                    await send_frames(encoder.flush())
+                    await websocket.send_json({
+                        "type": "agent_audio_end",
+                        "bytes": streamed_bytes,
+                        "timestamp": asyncio.get_event_loop().time()
+                    })
+                    streamed_bytes = None
+            elif role == "audio":
+                # Buffer audio chunks instead of sending immediately; a full buffer goes out as a WAV segment
+                chunk = memoryview(content)
+                while chunk:
+                    if reply_buffer is None:
+                        reply_buffer = buffer_pool.acquire()
+                    chunk = chunk[reply_buffer.write(chunk):]
+                    if reply_buffer.full:
+                        await send_wav(final=False)
+            elif role == "audio_complete":
+                # Send the (rest of the) WAV file when agent finishes speaking
+                if reply_buffer is not None:
+                    await send_wav(final=True)
             elif role == "status":
                 # Send status updates only for important events
                 if content in ["listening", "ready"]:
@@ -113,28 +242,60 @@ async def voice_ws(websocket: WebSocket):
         except Exception as e:
             print(f"❌ Error sending WebSocket response: {e}")
 
-    # Initialize the VoiceAgent with the callback
-    agent = VoiceAgent(on_response)
-    
-    # Set the current event loop for the agent
-    try:
-        current_loop = asyncio.get_running_loop()
-        agent._main_loop = current_loop
-    except RuntimeError:
-        print("Could not get current event loop")
+    # The agent is taken from the pre-warmed pool once the session is admitted
+    agent = None
+    uplink = None
+
+    async def close_session(reason):
+        # Called by the scheduler for idle or over-long sessions
+        print(f"⏱️ Closing voice session ({reason})")
+        if agent is not None:
+            # stop() closes the Deepgram connection (blocking); keep it off the event loop
+            await asyncio.to_thread(agent.stop)
+        try:
+            await websocket.send_json({"type": "session_closed", "reason": reason})
+            await websocket.close(code=1000)
+        except Exception:
+            pass
+
+    scheduler = VoiceSessionScheduler.get_instance()
+    session = scheduler.open(None, on_close=close_session)
+    if session is None:
+        await websocket.send_json({"type": "error", "message": "Voice assistant is at capacity, try again shortly"})
+        await websocket.close(code=1013)
+        return
+
+    async def on_flow_control(state, stats):
+        async with send_lock:
+            await websocket.send_json({
+                "type": "flow_control",
+                "state": state,
+                "queued_bytes": stats["queued_bytes"],
+                "max_bytes": stats["max_bytes"],
+                "timestamp": asyncio.get_event_loop().time()
+            })
 
     try:
-        # Start the Deepgram Agent
-        success = agent.start()
-        if not success:
+        # Hand the session a connected Deepgram Agent (pre-warmed, or started now);
+        # a warm agent's parked ready status and greeting (or the cached greeting) are replayed to on_response
+        agent = await VoiceAgentPool.get_instance().acquire(on_response, input_sample_rate=stt_rate,
+                                                            state=state, season=season, language=session_language)
+        if agent is None:
             await websocket.send_json({
                 "type": "error", 
                 "message": "Failed to start voice agent"
             })
             await websocket.close(code=1011)
             return
+        session.agent = agent
+        # Keep-alives are due when no audio reached the agent (the VAD gate may hold back silence)
+        gate = VoiceActivityGate(sample_rate=stt_rate) if vad else None
+        uplink = UplinkQueue(agent, decoder, gate=gate, on_flow_control=on_flow_control,
+                             on_forwarded=lambda: session.touch(uplink=True))
+        session.uplink = uplink
         
         print("🎤 Voice agent ready for queries")
+        uplink.start()
 
         # Stream audio data from the client to Deepgram
         while agent.is_running():
@@ -144,9 +305,9 @@ async def voice_ws(websocket: WebSocket):
                 
                 if message["type"] == "websocket.receive":
                     if "bytes" in message:
-                        # Handle binary audio data - send to Deepgram without logging
-                        audio_data = message["bytes"]
-                        agent.send_audio(audio_data)
+                        # Handle binary audio data - queued for the uplink sender (decoded there), no logging
+                        session.touch()
+                        await uplink.put(message["bytes"])
                     elif "text" in message:
                         # Handle text messages (commands, etc.)
                         try:
@@ -171,10 +332,17 @@ async def voice_ws(websocket: WebSocket):
     except Exception as e:
         print(f"❌ Voice WebSocket error: {e}")
     finally:
+        if uplink is not None:
+            await uplink.close()
+        scheduler.close(session)
+        buffer_pool.release(reply_buffer)
+        reply_buffer = None
+
         # Stop the Deepgram Agent
         try:
-            agent.stop()
-            print("🧹 Voice agent stopped")
+            if agent is not None:
+                await asyncio.to_thread(agent.stop)
+                print("🧹 Voice agent stopped")
         except Exception as e:
             print(f"⚠️ Error stopping voice agent: {e}")
         
@@ -182,4 +350,59 @@ async def voice_ws(websocket: WebSocket):
         try:
             await websocket.close()
         except Exception:
-            pass
\ No newline at end of file
+            pass
+
+@router.get("/api/v1/voice/status")
+async def voice_status():
+    """Open voice sessions, limits, keep-alive/reaping counters, the warm agent pool and think routes of this worker."""
+    return {
+        **VoiceSessionScheduler.get_instance().status(),
+        "agent_pool": VoiceAgentPool.get_instance().status(),
+        "think": VoiceThinkRouter.get_instance().status(),
+    }
+
+@router.post("/api/v1/voice/think/chat/completions")
+async def voice_think(request: Request, language: str = "en", authorization: Optional[str] = Header(None)):
+    """
+    OpenAI-compatible chat completions for the voice agent's think step
+    (VOICE_THINK=local). MSP and scheme questions are answered locally, the
+    rest by the LLM, in the session `language`; the route taken is returned
+    in X-Think-Route. Disabled unless VOICE_THINK_TOKEN is set.
+    """
+    if not THINK_TOKEN:
+        raise HTTPException(status_code=404, detail="Voice think endpoint is disabled (set VOICE_THINK_TOKEN)")
+    if not hmac.compare_digest(authorization or "", f"Bearer {THINK_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid think token")
+
+    body = await request.json()
+    messages = body.get("messages")
+    if not isinstance(messages, list) or not messages:
+        raise HTTPException(status_code=400, detail="messages must be a non-empty list")
+
+    if language not in available_languages():
+        raise HTTPException(status_code=400, detail=f"Unsupported language '{language}'")
+
+    text, route = await VoiceThinkRouter.get_instance().answer(messages, language=language)
+    completion = {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "created": int(time.time()),
+        "model": body.get("model", "krishi-voice-think"),
+    }
+    headers = {"X-Think-Route": route}
+
+    if not body.get("stream"):
+        return JSONResponse({
+            **completion,
+            "object": "chat.completion",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        }, headers=headers)
+
+    # The whole answer is ready, so it goes out as one content chunk and the final chunk
+    def events():
+        for delta, finish_reason in (({"role": "assistant", "content": text}, None), ({}, "stop")):
+            chunk = {**completion, "object": "chat.completion.chunk",
+                     "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+            yield f"data: {json.dumps(chunk)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=headers)
@@ -4,6 +4,7 @@ from .query import QueryBase, QueryCreate, QueryUpdate, QueryResponse
 from .feedback import FeedbackBase, FeedbackCreate, FeedbackResponse
 from .escalation import EscalationBase, EscalationCreate, EscalationResponse
 from .notification import NotificationBase, NotificationCreate, NotificationResponse
+from .crop import CropBatchRequest, CropPrediction, CropLocationResult, CropBatchResponse
 
 __all__ = [
     # Enums
@@ -31,4 +32,10 @@ __all__ = [
     "NotificationBase",
     "NotificationCreate",
     "NotificationResponse",
+    
+    # Crop recommendation schemas
+    "CropBatchRequest",
+    "CropPrediction",
+    "CropLocationResult",
+    "CropBatchResponse",
 ]
@@ -0,0 +1,29 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+
+# Batch Crop Recommendation Schemas
+class CropBatchRequest(BaseModel):
+    locations: List[str] = Field(..., min_length=1, max_length=100)
+    top_k: int = Field(3, ge=1, le=10)
+    filter_by_zone: bool = True
+
+class CropPrediction(BaseModel):
+    crop: str
+    probability: float
+
+class CropLocationResult(BaseModel):
+    location: str
+    status: str  # "ok" or "failed"
+    recommendations: List[CropPrediction] = []
+    features: Optional[Dict[str, float]] = None
+    data_source: Optional[str] = None
+    agro_climatic_zone: Optional[str] = None
+    soil_district: Optional[str] = None
+    soil_source: Optional[str] = None  # "soil_health_card" or "indicative" (hand-written estimate)
+    warnings: List[str] = []
+    error: Optional[str] = None
+
+class CropBatchResponse(BaseModel):
+    results: List[CropLocationResult]
+    succeeded: int
+    failed: int
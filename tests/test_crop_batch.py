@@ -0,0 +1,133 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend" / "api"))
+
+from Wheather import crop_batch
+from Wheather.crop_batch import recommend_for_locations, top_k_classes, zone_masks
+from Wheather.crop_fast_path import AgroClimaticZones
+from Wheather.wheatherapi import WeatherAPIError
+
+CLASSES = ["rice", "maize", "chickpea", "kidneybeans", "pigeonpeas", "mothbeans", "mungbean", "blackgram",
+           "lentil", "pomegranate", "banana", "mango", "grapes", "watermelon", "muskmelon", "apple", "orange",
+           "papaya", "coconut", "cotton", "jute", "coffee"]
+
+
+def brute_force_top_k(probabilities, masks, k):
+    """Full sort of the allowed classes per row, padded with disallowed ones."""
+    rows = []
+    for probs, allowed in zip(probabilities, masks):
+        ranked = sorted(np.flatnonzero(allowed), key=lambda j: -probs[j])
+        rows.append([(j, probs[j]) for j in ranked[:k]])
+    return rows
+
+
+@pytest.mark.parametrize("k", [1, 3, 5, len(CLASSES)])
+def test_top_k_matches_a_full_sort_of_allowed_classes(k):
+    rng = np.random.default_rng(7)
+    probabilities = rng.dirichlet(np.ones(len(CLASSES)), size=200)
+    masks = rng.random(probabilities.shape) < 0.4
+    masks[:10] = True           # Unfiltered rows
+    masks[10:20] = False        # Rows allowing fewer than k classes
+    masks[10:20, :2] = True
+
+    top, top_probabilities = top_k_classes(probabilities, masks, k)
+
+    assert top.shape == top_probabilities.shape == (200, k)
+    for row, expected in enumerate(brute_force_top_k(probabilities, masks, k)):
+        allowed = top_probabilities[row] >= 0
+        assert list(top[row][allowed]) == [j for j, _ in expected]
+        assert np.allclose(top_probabilities[row][allowed], [p for _, p in expected])
+        assert np.all(top_probabilities[row][~allowed] == -1.0)
+
+
+def test_zone_masks_match_per_row_membership():
+    zones = AgroClimaticZones.get_instance().zones
+    no_overlap = {"id": -1, "crops": ["saffron"]}
+    row_zones = [*zones, None, no_overlap, zones[0]]
+
+    masks = zone_masks(row_zones, CLASSES)
+
+    for zone, mask in zip(row_zones, masks):
+        expected = [zone is None or crop in zone["crops"] for crop in CLASSES]
+        if not any(expected):
+            expected = [True] * len(CLASSES)
+        assert list(mask) == expected
+
+
+class FixedModel:
+    """Classifier stand-in with deterministic probabilities per feature row."""
+
+    classes_ = np.array(CLASSES)
+
+    def __init__(self):
+        self.calls = []
+
+    def predict_proba(self, features):
+        self.calls.append(len(features))
+        return np.array([np.random.default_rng(int(row.sum() * 100)).dirichlet(np.ones(len(CLASSES)))
+                         for row in features])
+
+
+def weather(temperature, humidity, rainfall):
+    return {"current_conditions": {"temperature": temperature, "humidity": humidity},
+            "weekly_outlook": {"total_precipitation": rainfall},
+            "location": {"coordinates": {}}}
+
+
+@pytest.fixture
+def fetches(monkeypatch):
+    calls = []
+
+    async def fetcher(city):
+        calls.append(city)
+        if city == "Srinagar":
+            raise WeatherAPIError("Request timed out")
+        if city == "Atlantis":
+            raise RuntimeError("connection reset")
+        return weather(27.0, 65, 18.0)
+
+    original = crop_batch.fetch_weather_concurrently
+    monkeypatch.setattr(crop_batch, "fetch_weather_concurrently",
+                        lambda locations, max_concurrency: original(locations, max_concurrency, fetcher))
+    return calls
+
+
+def test_batch_reports_failures_per_location(fetches):
+    model = FixedModel()
+    locations = ["Pune", "Atlantis", "  ", "Srinagar", "Pune"]
+
+    results = asyncio.run(recommend_for_locations(locations, model, top_k=3))
+
+    assert [r["location"] for r in results] == locations
+    assert [r["status"] for r in results] == ["ok", "failed", "failed", "ok", "ok"]
+    assert sorted(fetches) == ["Atlantis", "Pune", "Srinagar"]
+    assert model.calls == [2]
+
+    atlantis, empty, srinagar = results[1], results[2], results[3]
+    assert atlantis["error"].startswith("Location not recognised and weather unavailable")
+    assert "connection reset" in atlantis["error"]
+    assert empty["error"] == "Empty location"
+    assert srinagar["data_source"] == "Zone Normals"
+    assert srinagar["warnings"] == ["Weather unavailable (Request timed out); used zone climate normals"]
+    assert results[0] == results[4]
+
+
+def test_batch_recommendations_are_the_zone_filtered_top_k(fetches):
+    model = FixedModel()
+    results = asyncio.run(recommend_for_locations(["Pune", "Srinagar"], model, top_k=3))
+    zones = {zone["name"]: zone for zone in AgroClimaticZones.get_instance().zones}
+
+    for result in results:
+        features = np.array([[result["features"][f] for f in crop_batch.MODEL_FEATURES]])
+        probabilities = FixedModel().predict_proba(features)
+        zone = zones[result["agro_climatic_zone"]]
+        masks = zone_masks([zone], CLASSES)
+        expected = brute_force_top_k(probabilities, masks, 3)[0]
+
+        assert [r["crop"] for r in result["recommendations"]] == [CLASSES[j] for j, _ in expected]
+        assert all(r["crop"] in zone["crops"] for r in result["recommendations"])
@@ -0,0 +1,51 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend" / "api"))
+
+from Wheather.crop_fast_path import AgroClimaticZones, classify_intent_locally, resolve_location_features
+
+RAMPUR_WEATHER = {
+    "location": {"name": "Rampur", "coordinates": {"lat": 28.81, "lon": 79.03}},
+    "current_conditions": {"temperature": 31.0, "humidity": 62},
+    "weekly_outlook": {"total_precipitation": 12.0},
+}
+
+
+class InferredSoil:
+    """Soil table whose match for the place is in another state (as a fuzzy match would be)."""
+
+    def lookup(self, place):
+        return {"district": "Raipur", "state": "Chhattisgarh", "N": 62.0, "P": 38.0, "K": 42.0, "pH": 6.6,
+                "match": "exact"}
+
+
+@pytest.fixture(scope="module")
+def zones():
+    return AgroClimaticZones()
+
+
+def test_zone_comes_from_weather_coordinates_before_soil_state(zones):
+    local = resolve_location_features("Rampur", RAMPUR_WEATHER, zones, InferredSoil())
+    assert local["zone"]["name"] == "Upper Gangetic Plains"
+
+
+def test_zone_falls_back_to_soil_state_without_coordinates(zones):
+    local = resolve_location_features("Rampur", {"error": "Location not found"}, zones, InferredSoil())
+    assert local["zone"]["name"] == "Eastern Plateau and Hills"
+    assert local["data_source"] == "Zone Normals"
+
+
+@pytest.mark.parametrize("message, location", [
+    ("Which crops should I grow for Rabi in Sehore?", "Sehore"),
+    ("what to grow in June in Tonk", "Tonk"),
+    ("grow in Pune Kharif", "Pune"),
+])
+def test_season_and_month_words_are_not_locations(zones, message, location):
+    assert classify_intent_locally(message, zones)["location"] == location
+
+
+def test_season_alone_has_no_location(zones):
+    assert classify_intent_locally("What to sow in Kharif?", zones) is None
@@ -0,0 +1,72 @@
+import asyncio
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend" / "api"))
+
+from Wheather import district_advisories
+from Wheather.district_advisories import AdvisoryStore, CallBudget, DistrictAdvisoryScheduler
+from Wheather.wheatherapi import WeatherAPIError
+
+DISTRICTS = [
+    {"name": "Thrissur", "state": "Kerala", "lat": 10.53, "lon": 76.21},
+    {"name": "Sangrur", "state": "Punjab", "lat": 30.25, "lon": 75.84},
+]
+
+
+class FailingWeatherService:
+    def __init__(self):
+        self.calls = []
+
+    async def get_weather_snapshot(self, lat, lon):
+        self.calls.append((lat, lon))
+        raise WeatherAPIError("Invalid API key")
+
+
+def make_scheduler(service, budget=None):
+    store = AdvisoryStore(snapshot_path=":memory:")
+    # Thrissur is fresh, so only Sangrur is due
+    store._advisories = {"thrissur": {"district": "Thrissur", "state": "Kerala", "alerts": [],
+                                      "updated_at": datetime.now(timezone.utc).isoformat()}}
+    return DistrictAdvisoryScheduler(districts=DISTRICTS, store=store, service=service,
+                                     budget=budget or CallBudget(calls_per_minute=600, calls_per_day=40),
+                                     interval_s=3600, notification_sink=lambda rows: None)
+
+
+def test_refresh_fetches_only_due_districts():
+    service = FailingWeatherService()
+    run = asyncio.run(make_scheduler(service).refresh())
+
+    assert service.calls == [(30.25, 75.84)]
+    assert run["failed"] == 1 and run["refreshed"] == 0
+
+
+def test_failing_district_backs_off_instead_of_spinning(monkeypatch):
+    monkeypatch.setattr(district_advisories, "RETRY_MIN_S", 60.0)
+    service = FailingWeatherService()
+    scheduler = make_scheduler(service)
+
+    async def run_for(seconds):
+        scheduler.start()
+        await asyncio.sleep(seconds)
+        status = scheduler.status()
+        await scheduler.stop()
+        return status
+
+    status = asyncio.run(run_for(0.5))
+
+    assert len(service.calls) == 1
+    assert scheduler.budget.status()["used_today"] == district_advisories.CALLS_PER_DISTRICT
+    assert status["next_refresh_in_s"] >= 60.0
+
+
+def test_backoff_doubles_and_waits_for_the_budget_reset(monkeypatch):
+    monkeypatch.setattr(district_advisories, "RETRY_MIN_S", 60.0)
+    scheduler = make_scheduler(FailingWeatherService())
+    failed = {"failed": 1, "skipped_quota": 0}
+
+    assert scheduler._next_delay(failed) == 60.0
+    assert scheduler._next_delay(failed) == 120.0
+    assert scheduler._next_delay({"failed": 0, "skipped_quota": 1}) >= scheduler.budget.seconds_until_reset() - 1
+    assert scheduler._next_delay({"failed": 0, "skipped_quota": 0}) == 0.0
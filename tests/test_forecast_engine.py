@@ -0,0 +1,204 @@
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend" / "api"))
+
+from Wheather.forecast_engine import ForecastBatch, score_locations
+
+# 2025-01-10 10:30 IST: the first day is partial, so days are split mid-list
+START = 1736485200
+WEATHER = [{"id": 800, "main": "Clear"}, {"id": 500, "main": "Rain"}, {"id": 600, "main": "Snow"}]
+
+
+def fixed_forecast(seed, base_temp, steps=40):
+    """Deterministic 3-hourly /forecast payload with rain, snow and frost steps."""
+    rng = random.Random(seed)
+    items = []
+    for step in range(steps):
+        item = {
+            "dt": START + step * 3 * 3600,
+            "main": {"temp": round(base_temp + rng.uniform(-6, 6), 2), "humidity": rng.randint(20, 100)},
+            "weather": [rng.choice(WEATHER)],
+        }
+        if rng.random() < 0.3:
+            item["rain"] = {"3h": round(rng.uniform(0, 4), 2)}
+        if rng.random() < 0.1:
+            item["snow"] = {"3h": round(rng.uniform(0, 1), 2)}
+        items.append(item)
+    return {"list": items}
+
+
+def fixed_current(seed):
+    rng = random.Random(seed)
+    return {"temperature": round(rng.uniform(0, 40), 1), "humidity": rng.randint(20, 100),
+            "precipitation": rng.choice([0, 0.5, 3.0])}
+
+
+# Row-by-row implementation the engine replaced (WeatherService before the vectorized engine)
+
+def reference_daily_forecasts(data, days):
+    forecasts = []
+    current_date = None
+    daily_data = {}
+    for item in data['list'][:days * 8]:
+        forecast_date = datetime.fromtimestamp(item['dt']).date()
+        if current_date != forecast_date:
+            if current_date is not None:
+                forecasts.append(reference_aggregate_day(daily_data, current_date))
+            current_date = forecast_date
+            daily_data = {'temps': [], 'humidity': [], 'precipitation': 0, 'weather': []}
+        daily_data['temps'].append(item['main']['temp'])
+        daily_data['humidity'].append(item['main']['humidity'])
+        daily_data['precipitation'] += item.get('rain', {}).get('3h', 0) + item.get('snow', {}).get('3h', 0)
+        daily_data['weather'].append(item['weather'][0])
+    if daily_data['temps']:
+        forecasts.append(reference_aggregate_day(daily_data, current_date))
+    return forecasts
+
+
+def reference_aggregate_day(daily_data, date):
+    return {
+        'date': date.isoformat(),
+        'temperature': {
+            'min': min(daily_data['temps']),
+            'max': max(daily_data['temps']),
+            'avg': sum(daily_data['temps']) / len(daily_data['temps'])
+        },
+        'humidity_avg': sum(daily_data['humidity']) / len(daily_data['humidity']),
+        'precipitation_total': daily_data['precipitation'],
+        'weather': daily_data['weather'][0]
+    }
+
+
+def reference_farming_conditions(current, forecasts):
+    recent_precipitation = current.get('precipitation', 0)
+    forecast_precipitation = sum(day['precipitation_total'] for day in forecasts[:3])
+    humidity, temp = current['humidity'], current['temperature']
+
+    score = 0
+    if recent_precipitation < 2:
+        score += 2
+    if forecast_precipitation < 5:
+        score += 3
+    if humidity < 40:
+        score += 2
+    if temp > 30:
+        score += 2
+    level = "High" if score >= 6 else "Medium" if score >= 4 else "Low"
+
+    if temp > 25 and humidity > 70:
+        pest = "High"
+    elif temp > 20 and humidity > 60:
+        pest = "Medium"
+    else:
+        pest = "Low"
+    if humidity > 80 and recent_precipitation > 1:
+        disease = "High"
+    elif humidity > 70:
+        disease = "Medium"
+    else:
+        disease = "Low"
+
+    optimal = [day['date'] for day in forecasts[:3]
+               if 15 <= day['temperature']['max'] <= 28 and day['temperature']['min'] > 5
+               and day['precipitation_total'] < 1]
+    frost_days = [{'date': day['date'], 'min_temp': day['temperature']['min'],
+                   'risk_level': 'High' if day['temperature']['min'] <= 0 else 'Medium'}
+                  for day in forecasts if day['temperature']['min'] <= 2]
+    return {
+        'irrigation_needed': {
+            'level': level,
+            'score': score,
+            'factors': {'recent_precipitation': recent_precipitation, 'forecast_precipitation': forecast_precipitation,
+                        'humidity': humidity, 'temperature': temp}
+        },
+        'pest_risk': pest,
+        'disease_risk': disease,
+        'optimal_activity_time': optimal,
+        'frost_risk': {'has_risk': len(frost_days) > 0, 'risk_days': frost_days}
+    }
+
+
+def reference_weekly_outlook(forecasts):
+    total_precipitation = sum(day['precipitation_total'] for day in forecasts)
+    avg_temp = sum(day['temperature']['avg'] for day in forecasts) / len(forecasts)
+    avg_humidity = sum(day['humidity_avg'] for day in forecasts) / len(forecasts)
+    return {
+        'average_temperature': round(avg_temp, 1),
+        'total_precipitation': round(total_precipitation, 1),
+        'average_humidity': round(avg_humidity, 1),
+        'suitable_for_planting': 15 <= avg_temp <= 30 and total_precipitation > 5,
+        'suitable_for_harvesting': total_precipitation < 10 and avg_humidity < 80
+    }
+
+
+def assert_same(actual, expected):
+    """Equal structure and values; floats may differ by summation order only."""
+    if isinstance(expected, dict):
+        assert isinstance(actual, dict) and actual.keys() == expected.keys()
+        for key in expected:
+            assert_same(actual[key], expected[key])
+    elif isinstance(expected, list):
+        assert isinstance(actual, list) and len(actual) == len(expected)
+        for a, e in zip(actual, expected):
+            assert_same(a, e)
+    elif isinstance(expected, float):
+        assert actual == pytest.approx(expected)
+    else:
+        assert actual == expected
+
+
+@pytest.fixture(autouse=True)
+def india_time(monkeypatch):
+    # Forecast days follow the server's local dates in both implementations
+    monkeypatch.setenv("TZ", "Asia/Kolkata")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+# Cold (frost days), temperate (optimal days) and hot locations; a short list ends mid-day
+PAYLOADS = [
+    (fixed_forecast(1, 3.0), fixed_current(1)),
+    (fixed_forecast(2, 20.0), fixed_current(2)),
+    (fixed_forecast(3, 34.0), fixed_current(3)),
+    (fixed_forecast(4, 12.0, steps=19), fixed_current(4)),
+]
+
+
+@pytest.mark.parametrize("forecast, current", PAYLOADS)
+@pytest.mark.parametrize("days", [1, 3, 5])
+def test_engine_matches_the_row_by_row_formatter(forecast, current, days):
+    expected_days = reference_daily_forecasts(forecast, days)
+    batch = ForecastBatch([forecast], days)
+
+    assert_same(batch.daily_forecasts(0), expected_days)
+
+    scored = score_locations([current], [forecast], days, batch=batch)[0]
+    assert_same(scored['farming_conditions'], reference_farming_conditions(current, expected_days))
+    assert scored['weekly_outlook'] == reference_weekly_outlook(expected_days)
+
+
+def test_batch_of_many_locations_matches_each_location_alone():
+    forecasts = [forecast for forecast, _ in PAYLOADS]
+    currents = [current for _, current in PAYLOADS]
+
+    scored = score_locations(currents, forecasts)
+
+    for (forecast, current), result in zip(PAYLOADS, scored):
+        expected_days = reference_daily_forecasts(forecast, 5)
+        assert_same(result['farming_conditions'], reference_farming_conditions(current, expected_days))
+        assert result['weekly_outlook'] == reference_weekly_outlook(expected_days)
+
+
+def test_fixed_payloads_cover_every_risk_branch():
+    conditions = [score_locations([c], [f])[0]['farming_conditions'] for f, c in PAYLOADS]
+    assert any(c['frost_risk']['has_risk'] for c in conditions)
+    assert any(c['optimal_activity_time'] for c in conditions)
+    assert {c['irrigation_needed']['level'] for c in conditions} >= {"High", "Low"}
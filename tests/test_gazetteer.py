@@ -0,0 +1,74 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend" / "api"))
+
+from Wheather.gazetteer import Gazetteer
+from Wheather.district_advisories import AdvisoryStore
+from Wheather.wheatherapi import WeatherService
+
+# Prefixes or close spellings of seed districts that are other places
+NOT_SEED_DISTRICTS = ["Patan", "Sale", "Pun", "Sangh"]
+
+
+@pytest.fixture
+def gazetteer(tmp_path):
+    return Gazetteer(learned_path=tmp_path / "learned.csv")
+
+
+@pytest.mark.parametrize("name", NOT_SEED_DISTRICTS)
+def test_lookup_rejects_partial_and_close_names(gazetteer, name):
+    assert gazetteer.lookup(name) is None
+
+
+@pytest.mark.parametrize("name, district", [
+    ("Thrissur", "Thrissur"),
+    ("Trichur", "Thrissur"),
+    ("തൃശ്ശൂർ", "Thrissur"),
+    ("Poona", "Pune"),
+    ("pathanamthitta", "Pathanamthitta"),
+])
+def test_lookup_resolves_names_and_aliases(gazetteer, name, district):
+    place = gazetteer.lookup(name)
+    assert place["name"] == district
+    assert place["match"] == "exact"
+
+
+def test_complete_suggests_prefix_matches(gazetteer):
+    assert "Pathanamthitta" in [p["name"] for p in gazetteer.complete("Pathan")]
+    assert [p["name"] for p in gazetteer.complete("Sangrr")] == ["Sangrur"]
+
+
+def test_advisory_lookup_rejects_partial_names(gazetteer, tmp_path):
+    store = AdvisoryStore(snapshot_path=tmp_path / "advisories.sqlite3", gazetteer=gazetteer)
+    store._advisories = {"pathanamthitta": {"district": "Pathanamthitta"}, "thrissur": {"district": "Thrissur"}}
+
+    assert store.lookup("Patan") is None
+    assert store.lookup("Trichur")["district"] == "Thrissur"
+
+
+def test_get_coordinates_sends_partial_names_to_geo_api(gazetteer, monkeypatch):
+    monkeypatch.setenv("weather_api_key", "test")
+    service = WeatherService(gazetteer=gazetteer)
+    service.use_stub = False
+    service.cache = None
+    requests = []
+
+    async def make_request(url, params):
+        requests.append(params["q"])
+        return [{"lat": 23.85, "lon": 72.12, "name": "Patan", "country": "IN", "state": "Gujarat"}]
+
+    monkeypatch.setattr(service, "_make_request", make_request)
+
+    patan = asyncio.run(service.get_coordinates("Patan"))
+    assert (patan["name"], patan["state"]) == ("Patan", "Gujarat")
+    assert requests == ["Patan"]
+    # Learned, so the next lookup is answered offline
+    assert gazetteer.lookup("Patan")["state"] == "Gujarat"
+
+    thrissur = asyncio.run(service.get_coordinates("Trichur"))
+    assert thrissur["name"] == "Thrissur"
+    assert requests == ["Patan"]
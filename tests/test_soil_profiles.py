@@ -0,0 +1,66 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend" / "api"))
+
+from Wheather.soil_profiles import SoilProfileStore
+
+
+@pytest.fixture(scope="module")
+def store():
+    return SoilProfileStore()
+
+
+# Districts missing from the table that are spelled close to one in another state
+@pytest.mark.parametrize("place", ["Rampur", "Sale", "Pun", "Kot"])
+def test_lookup_does_not_resolve_close_spellings(store, place):
+    assert store.lookup(place) is None
+
+
+@pytest.mark.parametrize("place, district, state", [
+    ("Thrissur", "Thrissur", "Kerala"),
+    ("Trichur", "Thrissur", "Kerala"),
+    ("Poona", "Pune", "Maharashtra"),
+    ("Raipur district", "Raipur", "Chhattisgarh"),
+])
+def test_lookup_resolves_districts_and_aliases(store, place, district, state):
+    profile = store.lookup(place)
+    assert (profile["district"], profile["state"], profile["match"]) == (district, state, "exact")
+
+
+def test_lookup_resolves_states_to_their_average(store):
+    profile = store.lookup("Kerala")
+    assert (profile["district"], profile["match"]) == (None, "state")
+
+
+def test_close_spellings_are_only_suggested(store):
+    assert "Thrissur" in [p["district"] for p in store.suggest("Trichr")]
+    assert [p["district"] for p in store.suggest("Rampur")] == ["Raipur"]
+
+
+def test_shipped_profiles_are_flagged_indicative(store):
+    profile = store.lookup("Thrissur")
+    assert (profile["source"], profile["indicative"]) == ("indicative", True)
+
+
+def test_soil_health_card_export_replaces_estimates(tmp_path):
+    export = tmp_path / "shc.csv"
+    export.write_text(
+        "State Name,District Name,Available Nitrogen (kg/ha),P,K,pH\n"
+        "KERALA,THRISSUR,200,20,150,5.2\n"
+        "KERALA,THRISSUR,240,30,170,5.6\n"
+        "KERALA,THRISSUR,NA,30,170,5.6\n"
+        "UTTAR PRADESH,RAMPUR,180,25,210,7.6\n",
+        encoding="utf-8",
+    )
+    store = SoilProfileStore(shc_path=export)
+
+    thrissur = store.lookup("Trichur")
+    assert (thrissur["N"], thrissur["P"], thrissur["K"], thrissur["pH"]) == (220.0, 25.0, 160.0, 5.4)
+    assert (thrissur["source"], thrissur["indicative"], thrissur["samples"]) == ("soil_health_card", False, 2)
+    assert store.lookup("Rampur")["source"] == "soil_health_card"
+    # Other Kerala districts are still estimates, so the state average is too
+    assert store.lookup("Kozhikode")["indicative"] is True
+    assert store.lookup("Kerala")["indicative"] is True
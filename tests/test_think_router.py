@@ -0,0 +1,32 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from ai.Voice.think_router import VoiceThinkRouter
+
+
+def test_romanized_alias_is_answered_from_the_table():
+    assert VoiceThinkRouter.answer_msp("gehu ka bhav") == "The MSP of Wheat for 2025-26 is 2425 rupees per quintal."
+
+
+def test_comparison_is_answered_with_the_change_from_the_previous_year():
+    answer = VoiceThinkRouter.answer_msp("Is paddy MSP higher than last year?")
+    assert answer.endswith("That is 69 rupees higher for Common and 69 rupees higher for Grade 'A' than in 2024-25.")
+
+
+@pytest.mark.parametrize("question", ["What was wheat MSP last year?", "wheat msp 2024-25", "wheat msp in 2024"])
+def test_other_year_is_answered_with_that_years_rate(question):
+    assert VoiceThinkRouter.answer_msp(question) == "The MSP of Wheat for 2024-25 is 2275 rupees per quintal."
+
+
+@pytest.mark.parametrize("question", ["wheat msp in 2019-20", "Was wheat MSP higher in 2024-25?"])
+def test_years_missing_from_the_table_go_to_the_llm(question):
+    assert VoiceThinkRouter.answer_msp(question) is None
+
+
+def test_comparison_in_hindi():
+    answer = VoiceThinkRouter.answer_msp("पिछले साल से गेहूं का MSP कितना बढ़ा?", "hi")
+    assert answer.endswith("यह 2024-25 से 150 रुपये अधिक है।")
@@ -0,0 +1,139 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from ai.Voice.uplink_queue import UplinkQueue
+
+
+class RecordingAgent:
+    def __init__(self):
+        self.sent = []
+
+    def send_audio(self, audio):
+        self.sent.append(audio)
+
+
+def frames(count, size=10):
+    return [bytes([i]) * size for i in range(count)]
+
+
+def queued(uplink):
+    return [b"".join(item[0]) for item in uplink._items]
+
+
+def put_all(uplink, chunks):
+    async def run():
+        for chunk in chunks:
+            await uplink.put(chunk)
+    asyncio.run(run())
+
+
+def test_coalesce_joins_new_frames_to_the_newest_send():
+    uplink = UplinkQueue(RecordingAgent(), max_items=3, max_bytes=1000, overflow="coalesce")
+    chunks = frames(5)
+
+    put_all(uplink, chunks)
+
+    assert queued(uplink) == [chunks[0], chunks[1], b"".join(chunks[2:])]
+    stats = uplink.stats()
+    assert stats["queued_items"] == 3 and stats["queued_bytes"] == 50
+    assert stats["coalesced_frames"] == 2 and stats["dropped_frames"] == 0
+
+
+def test_drop_oldest_discards_the_oldest_send():
+    uplink = UplinkQueue(RecordingAgent(), max_items=3, max_bytes=1000, overflow="drop_oldest")
+    chunks = frames(5)
+
+    put_all(uplink, chunks)
+
+    assert queued(uplink) == chunks[2:]
+    stats = uplink.stats()
+    assert stats["queued_bytes"] == 30
+    assert stats["dropped_frames"] == 2 and stats["dropped_bytes"] == 20 and stats["coalesced_frames"] == 0
+
+
+@pytest.mark.parametrize("overflow", ["coalesce", "drop_oldest"])
+def test_byte_limit_evicts_the_oldest_audio(overflow):
+    uplink = UplinkQueue(RecordingAgent(), max_items=10, max_bytes=100, overflow=overflow)
+    chunks = frames(4, size=40)
+
+    put_all(uplink, chunks)
+
+    assert queued(uplink) == chunks[2:]
+    stats = uplink.stats()
+    assert stats["queued_bytes"] == 80 and stats["peak_bytes"] <= 100
+    assert stats["dropped_frames"] == 2 and stats["dropped_bytes"] == 80
+
+
+def test_byte_limit_evicts_whole_coalesced_sends():
+    uplink = UplinkQueue(RecordingAgent(), max_items=2, max_bytes=100, overflow="coalesce")
+    chunks = frames(6, size=20)
+
+    put_all(uplink, chunks)
+
+    # The second send absorbed frames 1-5 (100 bytes), so the first is dropped
+    assert queued(uplink) == [b"".join(chunks[1:])]
+    assert uplink.stats()["dropped_frames"] == 1 and uplink.stats()["coalesced_frames"] == 4
+
+
+def test_unknown_overflow_policy_is_rejected():
+    with pytest.raises(ValueError):
+        UplinkQueue(RecordingAgent(), overflow="block")
+
+
+class FlowControl:
+    def __init__(self):
+        self.events = []
+
+    async def __call__(self, state, stats):
+        self.events.append((state, stats["queued_items"], stats["queued_bytes"]))
+
+
+def test_pause_at_high_watermark_and_resume_at_low_watermark():
+    agent = RecordingAgent()
+    flow = FlowControl()
+    uplink = UplinkQueue(agent, max_items=100, max_bytes=100, overflow="coalesce", on_flow_control=flow)
+    chunks = frames(9)
+
+    async def run():
+        for chunk in chunks[:7]:
+            await uplink.put(chunk)
+        below_high = list(flow.events)
+        for chunk in chunks[7:]:
+            await uplink.put(chunk)
+
+        uplink.start()
+        for _ in range(200):
+            if not uplink.stats()["queued_items"]:
+                break
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.01)
+        await uplink.close()
+        return below_high
+
+    below_high = asyncio.run(run())
+
+    assert below_high == []
+    assert [state for state, _, _ in flow.events] == ["pause", "resume"]
+    _, _, paused_at_bytes = flow.events[0]
+    _, resumed_at_items, resumed_at_bytes = flow.events[1]
+    assert paused_at_bytes == 80            # First put at or above 75% of max_bytes
+    assert resumed_at_bytes <= 25 and resumed_at_items <= 25
+    assert b"".join(agent.sent) == b"".join(chunks)
+    assert uplink.stats()["flow_control_pauses"] == 1
+
+
+def test_pause_when_the_item_limit_is_reached():
+    flow = FlowControl()
+    uplink = UplinkQueue(RecordingAgent(), max_items=4, max_bytes=10000, overflow="drop_oldest",
+                         on_flow_control=flow)
+
+    put_all(uplink, frames(6))
+
+    # Paused once at the limit, not again while it stays saturated
+    assert flow.events == [("pause", 4, 40)]
+    assert uplink.paused
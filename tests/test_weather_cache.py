@@ -0,0 +1,127 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend" / "api"))
+
+from Wheather.weather_cache import WeatherCache
+
+
+class Upstream:
+    """Counts fetches and returns a new version on each one."""
+
+    def __init__(self, delay_s=0.01, error=None):
+        self.calls = 0
+        self.delay_s = delay_s
+        self.error = error
+
+    async def fetch(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay_s)
+        if self.error:
+            raise self.error
+        return {"version": self.calls}
+
+
+def test_concurrent_requests_for_one_cell_share_one_fetch():
+    cache = WeatherCache(grid_deg=0.1)
+    upstream = Upstream()
+    # Neighbouring farms in the same 0.1° cell
+    points = [(18.52, 73.82), (18.53, 73.83), (18.51, 73.81)] * 10
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_fetch("current", cache.cell(lat, lon), upstream.fetch)
+                                      for lat, lon in points))
+
+    values = asyncio.run(run())
+
+    assert upstream.calls == 1
+    assert all(value == {"version": 1} for value in values)
+    stats = cache.stats()
+    assert stats["upstream_calls"] == 1
+    assert stats["misses"] == 1 and stats["coalesced"] == len(points) - 1
+
+
+def test_fresh_entry_is_served_without_fetching():
+    cache = WeatherCache()
+    upstream = Upstream()
+
+    async def run():
+        await cache.get_or_fetch("forecast", (185, 739), upstream.fetch)
+        return await cache.get_or_fetch("forecast", (185, 739), upstream.fetch)
+
+    assert asyncio.run(run()) == {"version": 1}
+    assert upstream.calls == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_expired_entry_is_served_stale_and_refreshed_once_in_background():
+    # Every entry is past its TTL at once but stays inside the stale window
+    cache = WeatherCache(ttl_s={"current": 0}, stale_s={"current": 3600})
+    upstream = Upstream(delay_s=0.05)
+    cell = cache.cell(18.52, 73.85)
+
+    async def run():
+        await cache.get_or_fetch("current", cell, upstream.fetch)
+        stale = await asyncio.gather(*(cache.get_or_fetch("current", cell, upstream.fetch) for _ in range(5)))
+        refreshes_started = upstream.calls - 1
+        await asyncio.sleep(0.1)
+        return stale, refreshes_started
+
+    stale, refreshes_started = asyncio.run(run())
+
+    assert all(value == {"version": 1} for value in stale)
+    assert refreshes_started == 1
+    assert upstream.calls == 2
+    assert cache.peek("current", cell) == {"version": 2}
+    assert cache.stats()["stale_hits"] == 5
+
+
+def test_entry_past_its_stale_window_is_fetched_again():
+    cache = WeatherCache(ttl_s={"current": 0}, stale_s={"current": 0})
+    upstream = Upstream()
+
+    async def run():
+        await cache.get_or_fetch("current", (1, 1), upstream.fetch)
+        return await cache.get_or_fetch("current", (1, 1), upstream.fetch)
+
+    assert asyncio.run(run()) == {"version": 2}
+    assert cache.stats()["misses"] == 2
+
+
+def test_failed_fetch_reaches_every_waiter_and_is_not_cached():
+    cache = WeatherCache()
+    upstream = Upstream(error=RuntimeError("upstream down"))
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_fetch("current", (1, 1), upstream.fetch) for _ in range(3)),
+                                    return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert upstream.calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert cache.peek("current", (1, 1)) is None
+
+
+def test_failed_background_refresh_keeps_the_stale_value():
+    cache = WeatherCache(ttl_s={"current": 0}, stale_s={"current": 3600})
+    cache.put("current", (1, 1), {"version": 0})
+    upstream = Upstream(error=RuntimeError("upstream down"))
+
+    async def run():
+        value = await cache.get_or_fetch("current", (1, 1), upstream.fetch)
+        await asyncio.sleep(0.05)
+        return value
+
+    assert asyncio.run(run()) == {"version": 0}
+    assert cache.peek("current", (1, 1)) == {"version": 0}
+    assert cache.stats()["refresh_errors"] == 1
+
+
+@pytest.mark.parametrize("lat, lon, same", [(18.52, 73.82, True), (18.66, 73.82, False)])
+def test_cells_bucket_nearby_coordinates(lat, lon, same):
+    cache = WeatherCache(grid_deg=0.1)
+    assert (cache.cell(lat, lon) == cache.cell(18.53, 73.83)) is same
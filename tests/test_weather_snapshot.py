@@ -0,0 +1,58 @@
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend" / "api"))
+
+from Wheather.gazetteer import Gazetteer
+from Wheather.weather_cache import WeatherCache
+from Wheather.wheatherapi import WeatherService
+from services.local_stubs import stub_openweathermap_response
+
+
+def make_service(tmp_path, monkeypatch, cache):
+    monkeypatch.setenv("weather_api_key", "test")
+    service = WeatherService(cache=cache, gazetteer=Gazetteer(learned_path=tmp_path / "learned.csv"))
+    service.use_stub = False
+    service.cache = cache
+    calls = []
+
+    async def make_request(url, params):
+        calls.append(url.rsplit("/", 1)[-1])
+        await asyncio.sleep(0.01)
+        return stub_openweathermap_response(url, params)
+
+    monkeypatch.setattr(service, "_make_request", make_request)
+    return service, calls
+
+
+def test_concurrent_snapshots_of_an_unknown_city_share_one_fetch(tmp_path, monkeypatch):
+    service, calls = make_service(tmp_path, monkeypatch, WeatherCache())
+
+    async def run():
+        return await asyncio.gather(*(service.get_weather_snapshot(city="Patan") for _ in range(5)))
+
+    snapshots = asyncio.run(run())
+
+    assert sorted(calls) == ["forecast", "weather"]
+    assert len({(s["coordinates"]["lat"], s["coordinates"]["lon"]) for s in snapshots}) == 1
+
+
+def test_unknown_city_is_learned_then_served_from_the_cell_cache(tmp_path, monkeypatch):
+    service, calls = make_service(tmp_path, monkeypatch, WeatherCache())
+
+    first = asyncio.run(service.get_weather_snapshot(city="Patan"))
+    assert sorted(calls) == ["forecast", "weather"]
+    assert service.gazetteer.lookup("Patan")["lat"] == round(first["coordinates"]["lat"], 4)
+    assert (tmp_path / "learned.csv").exists()
+
+    calls.clear()
+    asyncio.run(service.get_weather_snapshot(city="Patan"))
+    assert calls == []
+
+
+def test_unknown_city_without_cache_makes_two_calls(tmp_path, monkeypatch):
+    service, calls = make_service(tmp_path, monkeypatch, None)
+
+    asyncio.run(service.get_weather_snapshot(city="Patan"))
+    assert sorted(calls) == ["forecast", "weather"]